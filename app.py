@@ -1,11 +1,50 @@
 """Main for database connection."""
 from decouple import config
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.common.leak_detector import ConnectionLeakDetector
+from core.common.query_counter import install_query_counter
 
 # Database connection url
 DATABASE_URL = config('DATABASE_URL')
 
+# Same database through asyncpg for the endpoints.
+ASYNC_DATABASE_URL = config(
+    'ASYNC_DATABASE_URL',
+    default=make_url(DATABASE_URL)
+    .set(drivername='postgresql+asyncpg')
+    .render_as_string(hide_password=False),
+)
+
 # Create the database engine
 # Add extra pool_size and max_overflow
 # because of sqlalchemy.exc.TimeoutError: QueuePool limit of size 5 overflow 10 reached
 engine = create_engine(DATABASE_URL, echo=True, pool_size=20, max_overflow=40)
+
+# asyncpg connections are bound to their event loop.
+# The test client runs every request on a new loop then it must not pool them.
+ASYNC_NULL_POOL = config('ASYNC_NULL_POOL', default=False, cast=bool)
+async_pool_options: dict = (
+    {'poolclass': NullPool} if ASYNC_NULL_POOL else {'pool_size': 20, 'max_overflow': 40}
+)
+
+# The endpoints await the database instead of blocking the event loop.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=True, **async_pool_options)
+
+# Loaded instances are used after commit. Do not expire them, it would need another IO.
+async_session_maker = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Report the number of queries per request.
+install_query_counter(engine)
+install_query_counter(async_engine.sync_engine)
+
+# Record the stack of the connections held longer than DB_LEAK_THRESHOLD_MS or never returned.
+# It captures a stack per checkout. Turn it on for debugging only.
+DB_LEAK_DETECTION = config('DB_LEAK_DETECTION', default=False, cast=bool)
+DB_LEAK_THRESHOLD_MS = config('DB_LEAK_THRESHOLD_MS', default=1000, cast=int)
+leak_detector = ConnectionLeakDetector(threshold_ms=DB_LEAK_THRESHOLD_MS, enabled=DB_LEAK_DETECTION)
+leak_detector.install(engine, 'engine')
+leak_detector.install(async_engine.sync_engine, 'async_engine')
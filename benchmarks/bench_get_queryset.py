@@ -0,0 +1,118 @@
+"""
+Benchmark the latency of `get_queryset` against the size of the task table.
+
+It mutates the database. Then be careful.
+`python -m benchmarks.bench_get_queryset --sizes 10000 100000 1000000`
+"""
+import argparse
+import statistics
+import time
+import typing as typ
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlmodel import Session
+
+from app import engine
+from core.methods.crud import _sync_view_statement
+from core.methods.get_list_method.get_queryset import get_queryset
+from core.models.models import (CurrentTaskContent, StatusEnum, TaskContent,
+                                User, content_hash, new_identifier)
+from core.tests.test_gadgets import (prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+
+CHUNK_SIZE = 10_000
+USER_IDS = (1, 2, 10)
+STATUSES = (StatusEnum.PENDING, StatusEnum.IN_PROGRESS, StatusEnum.COMPLETED)
+
+
+def seed_tasks(size: int) -> None:
+    """Insert `size` tasks with one revision each."""
+    now = datetime.now()
+    with Session(engine) as session:
+        for start in range(1, size + 1, CHUNK_SIZE):
+            contents, currents = [], []
+            for _id in range(start, min(start + CHUNK_SIZE, size + 1)):
+                identifier = new_identifier()
+                user_id = USER_IDS[_id % len(USER_IDS)]
+                title = f"Task {_id}"
+                due_date = date(2024, 1, 1) + timedelta(days=_id % 365)
+                _status = STATUSES[_id % len(STATUSES)]
+                contents.append({
+                    'identifier': identifier,
+                    'id': _id,
+                    'title': title,
+                    'description': 'Benchmark task',
+                    'due_date': due_date,
+                    'status': _status,
+                    'content_hash': content_hash(
+                        title, 'Benchmark task', due_date, _status, user_id,
+                    ),
+                    'is_deleted': False,
+                    'created_by': user_id,
+                    'created_at': now,
+                })
+                currents.append({
+                    'identifier': identifier,
+                    'id': _id,
+                    'created_by': user_id,
+                    'updated_by': USER_IDS[(_id + 1) % len(USER_IDS)],
+                    'created_at': now,
+                    'updated_at': now,
+                    'revision_created_at': now,
+                })
+            session.execute(insert(TaskContent), contents)
+            session.execute(insert(CurrentTaskContent), currents)
+            session.execute(_sync_view_statement([row['id'] for row in currents]))
+            session.commit()
+        session.execute(text('ANALYZE'))
+
+
+def measure(func: typ.Callable[[], typ.Any], repeat: int) -> float:
+    """Return the median milliseconds of `func`."""
+    timings = []
+    for __ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(sizes: typ.List[int], repeat: int) -> None:
+    """Run every scenario for every table size and print the table."""
+    with Session(engine) as session:
+        sarit = session.query(User).filter(User.username == 'sarit').one()
+        elcolie = session.query(User).filter(User.username == 'elcolie').one()
+
+    def fetch(**kwargs: typ.Any) -> typ.Callable[[], typ.Any]:
+        def _fetch() -> typ.Any:
+            with Session(engine) as session:
+                return session.execute(get_queryset(**kwargs)).all()
+        return _fetch
+
+    no_filter = {'_due_date': None, '_status': None, '_created_user': None, '_updated_user': None}
+    scenarios: typ.Dict[str, typ.Callable[[], typ.Any]] = {
+        'first 50, no filter': fetch(**no_filter, _limit=50),
+        'deep 50, no filter': lambda: fetch(**no_filter, _after_id=size // 2, _limit=50)(),
+        'first 50, created+updated by': fetch(
+            _due_date=None, _status=None, _created_user=sarit, _updated_user=elcolie, _limit=50),
+        'all, due_date+status': fetch(
+            _due_date=date(2024, 3, 1), _status=StatusEnum.PENDING,
+            _created_user=None, _updated_user=None),
+    }
+    print(f"{'tasks':>10} | {'scenario':<30} | {'median ms':>10}")
+    for size in sizes:
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+        seed_tasks(size)
+        for name, scenario in scenarios.items():
+            print(f"{size:>10} | {name:<30} | {measure(scenario, repeat):>10.2f}")
+    remove_all_tasks_and_users()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
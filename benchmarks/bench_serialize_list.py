@@ -0,0 +1,114 @@
+"""
+Benchmark the CPU time to turn the rows of the list into the JSON response, per 1,000 rows.
+
+`before` is the former path: marshmallow dump, `SummaryTask` models, the page,
+the validation against `response_model` by FastAPI and the JSON of `JSONResponse`.
+`after` is `serialize_tasks` and `ORJSONResponse`.
+It mutates the database. Then be careful.
+`python -m benchmarks.bench_serialize_list --rows 1000 --repeat 50`
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import typing as typ
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from fastapi_pagination import Page, Params
+from marshmallow import fields
+from sqlmodel import Session
+
+from app import engine
+from benchmarks.bench_get_queryset import seed_tasks
+from core.common.serializers import BaseTaskContentSchema
+from core.common.validate_input import SummaryTask
+from core.methods.get_list_method.get_queryset import get_queryset
+from core.methods.get_list_method.method import serialize_tasks
+from core.tests.test_gadgets import (prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+
+
+class LegacyListTaskSchemaOutput(BaseTaskContentSchema):
+    """The list schema of the former path."""
+
+    created_by_username: str | None = fields.String()
+    updated_by: int | None = fields.Integer()
+    updated_by_username: str | None = fields.String()
+
+
+PAGE_FIELD = create_response_field(name='response', type_=Page[SummaryTask])
+LOOP = asyncio.new_event_loop()
+
+
+def before(rows: typ.Sequence[typ.Any], params: Params) -> bytes:
+    """The former path of the list endpoint."""
+    raw_list_tasks = [
+        {
+            'id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'due_date': row.due_date,
+            'status': row.status,
+            'created_by': row.created_by,
+            'updated_by': row.updated_by,
+            'created_by_username': row.created_by_username,
+            'updated_by_username': row.updated_by_username,
+        }
+        for row in rows
+    ]
+    tasks = [SummaryTask(**i) for i in LegacyListTaskSchemaOutput().dump(raw_list_tasks, many=True)]
+    page = Page[SummaryTask].create(tasks, params, total=len(tasks))
+    # What FastAPI does with the value returned by the endpoint.
+    content = LOOP.run_until_complete(serialize_response(field=PAGE_FIELD, response_content=page))
+    return JSONResponse(content).body
+
+
+def after(rows: typ.Sequence[typ.Any], params: Params) -> bytes:
+    """The path of the list endpoint."""
+    return ORJSONResponse({
+        'items': serialize_tasks(rows),
+        'total': len(rows),
+        'page': params.page,
+        'size': params.size,
+        'pages': 1,
+    }).body
+
+
+def measure(func: typ.Callable[[], typ.Any], repeat: int) -> float:
+    """Return the median CPU milliseconds of `func`."""
+    timings = []
+    for __ in range(repeat):
+        started = time.process_time()
+        func()
+        timings.append((time.process_time() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(rows_count: int, repeat: int) -> None:
+    """Serialize the same rows with both paths and print the CPU time per 1,000 rows."""
+    remove_all_tasks_and_users()
+    prepare_users_for_test()
+    seed_tasks(rows_count)
+    with Session(engine) as session:
+        rows = session.execute(get_queryset(None, None, None, None)).all()
+    remove_all_tasks_and_users()
+    # One page with all the rows. Params limits the size of a request, not of a page.
+    params = Params.model_construct(page=1, size=len(rows))
+    results = {name: measure(lambda path=path: path(rows, params), repeat) * 1000 / len(rows)
+               for name, path in (('before', before), ('after', after))}
+    print(f"{'path':<8} | {'CPU ms per 1,000 rows':>22}")
+    for name, cpu_ms in results.items():
+        print(f"{name:<8} | {cpu_ms:>22.2f}")
+    print(f"{'speedup':<8} | {results['before'] / results['after']:>21.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -1,44 +1,84 @@
 """Get the instance by following FastAPI."""
 import logging
+import typing as typ
 
-import sqlalchemy
-from fastapi import HTTPException, status
-from pydantic import ValidationError
-from sqlmodel import Session
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import exists, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app import engine
+from core.common.request_session import (get_session, is_integer_id,
+                                         remember_references)
+from core.common.revision_cache import revision_cache
+from core.common.single_flight import single_flight
 from core.common.validate_input import CheckTaskId
-from core.models.models import CurrentTaskContent
+from core.models.models import CurrentTaskContent, TaskContent
 
 logger = logging.getLogger(__name__)
 
 
-async def valid_undo_task(task_id: int) -> CheckTaskId:
-    """Validate the undo task id and return the CheckTaskId."""
-    task_instance = CheckTaskId(id=task_id)
-    return task_instance
+async def task_id_exists(session: AsyncSession, task_id: int) -> bool:
+    """Check if the task id exists in the history."""
+    if not is_integer_id(task_id):
+        return False
+    return bool(await session.scalar(exists().where(TaskContent.id == task_id).select()))
 
 
-async def valid_task(task_id: int) -> CurrentTaskContent:
-    """Validate the task id and return the CurrentTaskContent."""
-    try:
-        _ = CheckTaskId(id=task_id)
-    except ValidationError as e:
-        logger.error(f"Validation failed GET method: {e}")  # pylint: disable=logging-fstring-interpolation
+async def valid_undo_task(
+    task_id: int,
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> CheckTaskId:
+    """Validate the undo task id and return the CheckTaskId."""
+    if not await task_id_exists(session, task_id):
+        logger.error('Validation failed UNDO method: Task with this id does not exist %s', task_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail='Task not found'
-        ) from e
-
-    with Session(engine) as session:
-        try:
-            current_task = (
-                session.query(CurrentTaskContent)
-                .filter(CurrentTaskContent.id == task_id)
-                .one()
+        )
+    remember_references(task_ids=[task_id])
+    # Already validated above. Skip the blocking validator.
+    return CheckTaskId.model_construct(id=task_id)
+
+
+async def load_current(session: AsyncSession, task_id: int) -> CurrentTaskContent | None:
+    """Read the current task and cache it, unless a write invalidated it meanwhile."""
+    generation = revision_cache.current_generation(task_id)
+    current_task = await session.scalar(
+        select(CurrentTaskContent).where(CurrentTaskContent.id == task_id)
+    )
+    if current_task is not None:
+        await revision_cache.put_current(current_task, generation)
+    return current_task
+
+
+def _copy_current(current: CurrentTaskContent | None) -> CurrentTaskContent | None:
+    """A copy of the current task, not bound to the session of the request that read it."""
+    return None if current is None else CurrentTaskContent.model_validate(current.model_dump())
+
+
+async def valid_task(
+    task_id: int,
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> CurrentTaskContent:
+    """Validate the task id and return the CurrentTaskContent."""
+    if not is_integer_id(task_id):
+        current_task = None
+    else:
+        current_task = await revision_cache.get_current(task_id)
+        if current_task is None:
+            # The requests of the same task at once share one query.
+            # They get copies, not bound to the session.
+            current_task = await single_flight.do(
+                ('current', task_id), lambda: load_current(session, task_id), copy=_copy_current,
             )
-        except sqlalchemy.orm.exc.NoResultFound as err:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Task not found: {task_id}",
-            ) from err
+    if current_task is not None:
+        remember_references(task_ids=[task_id])
         return current_task
+
+    if not await task_id_exists(session, task_id):
+        logger.error('Validation failed GET method: Task with this id does not exist %s', task_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail='Task not found'
+        )
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Task not found: {task_id}",
+    )
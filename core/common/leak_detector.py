@@ -0,0 +1,158 @@
+"""Detect pool connections held too long or never returned."""
+import asyncio
+import collections
+import logging
+import threading
+import time
+import traceback
+import typing as typ
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Keep the latest slow checkouts only.
+MAX_SLOW_CHECKOUTS = 100
+
+
+class ConnectionCheckout(BaseModel):
+    """A connection taken from the pool."""
+
+    engine: str
+    task: str | None
+    thread: str
+    held_ms: float
+    returned: bool
+    stack: typ.List[str]
+
+
+class ConnectionDiagnostics(BaseModel):
+    """Report of the leak detector."""
+
+    enabled: bool
+    threshold_ms: int
+    held: typ.List[ConnectionCheckout]
+    slow: typ.List[ConnectionCheckout]
+
+
+class _Checkout:
+    """Where and when a connection was checked out."""
+
+    def __init__(self, engine_name: str) -> None:
+        self.engine_name = engine_name
+        self.started = time.monotonic()
+        self.thread = threading.current_thread().name
+        self.task = self._current_task_name()
+        self.reported = False
+        # Drop the frames of this module.
+        self.stack = traceback.format_stack()[:-2]
+
+    @staticmethod
+    def _current_task_name() -> str | None:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            return None
+        return task.get_name() if task is not None else None
+
+    def held_ms(self) -> float:
+        """Milliseconds since the checkout."""
+        return (time.monotonic() - self.started) * 1000
+
+    def report(self, returned: bool, held_ms: float | None = None) -> ConnectionCheckout:
+        """Turn into the response model."""
+        return ConnectionCheckout(
+            engine=self.engine_name,
+            task=self.task,
+            thread=self.thread,
+            held_ms=round(self.held_ms() if held_ms is None else held_ms, 3),
+            returned=returned,
+            stack=self.stack,
+        )
+
+
+class ConnectionLeakDetector:
+    """Record the stack of every checkout held longer than `threshold_ms` or never returned.
+
+    It captures a stack per checkout. Turn it on for debugging only.
+    """
+
+    def __init__(self, threshold_ms: int, enabled: bool = False) -> None:
+        self.threshold_ms = threshold_ms
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._checkouts: typ.Dict[int, _Checkout] = {}
+        self._slow: typ.Deque[ConnectionCheckout] = collections.deque(maxlen=MAX_SLOW_CHECKOUTS)
+
+    def install(self, engine: Engine, name: str) -> None:
+        """Listen to the pool of the engine."""
+
+        def _on_checkout(
+            _dbapi_connection: typ.Any, connection_record: typ.Any, _proxy: typ.Any,
+        ) -> None:
+            if self.enabled:
+                with self._lock:
+                    self._checkouts[id(connection_record)] = _Checkout(name)
+
+        def _on_checkin(_dbapi_connection: typ.Any, connection_record: typ.Any) -> None:
+            with self._lock:
+                checkout = self._checkouts.pop(id(connection_record), None)
+            if checkout is not None:
+                self._finish(checkout)
+
+        event.listen(engine, 'checkout', _on_checkout)
+        event.listen(engine, 'checkin', _on_checkin)
+
+    def _finish(self, checkout: _Checkout) -> None:
+        """Log the checkout if it was held too long."""
+        held_ms = checkout.held_ms()
+        if held_ms <= self.threshold_ms:
+            return
+        logger.warning(
+            'Connection of %s was held for %.1f ms, over %d ms. Checked out at:\n%s',
+            checkout.engine_name, held_ms, self.threshold_ms, ''.join(checkout.stack),
+        )
+        with self._lock:
+            self._slow.append(checkout.report(returned=True, held_ms=held_ms))
+
+    def held(self) -> typ.List[ConnectionCheckout]:
+        """Connections not returned yet and held longer than the threshold."""
+        with self._lock:
+            checkouts = list(self._checkouts.values())
+        return [
+            checkout.report(returned=False) for checkout in checkouts
+            if checkout.held_ms() > self.threshold_ms
+        ]
+
+    def log_held(self) -> None:
+        """Log once every connection held longer than the threshold and not returned yet."""
+        with self._lock:
+            checkouts = [
+                checkout for checkout in self._checkouts.values()
+                if not checkout.reported and checkout.held_ms() > self.threshold_ms
+            ]
+            for checkout in checkouts:
+                checkout.reported = True
+        for checkout in checkouts:
+            logger.warning(
+                'Connection of %s is held for %.1f ms and not returned yet. Checked out at:\n%s',
+                checkout.engine_name, checkout.held_ms(), ''.join(checkout.stack),
+            )
+
+    def diagnostics(self) -> ConnectionDiagnostics:
+        """Report the held and the slow checkouts."""
+        with self._lock:
+            slow = list(self._slow)
+        return ConnectionDiagnostics(
+            enabled=self.enabled,
+            threshold_ms=self.threshold_ms,
+            held=self.held(),
+            slow=slow,
+        )
+
+    def reset(self) -> None:
+        """Forget the slow checkouts."""
+        with self._lock:
+            self._slow.clear()
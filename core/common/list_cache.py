@@ -0,0 +1,142 @@
+"""In-process cache of the serialized list pages.
+
+Dashboards poll the same filters every few seconds. A page is cached by its normalized
+filters and its page or cursor, under the generation of the cache. Every write of
+`TaskRepository` bumps the generation, the pages cached before it are never served again.
+Another process does not see the bumps of this one, the time to live bounds how long it
+serves a stale page.
+"""
+import collections
+import threading
+import time
+import typing as typ
+
+from decouple import config
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from core.common.lookups import Lookups
+from core.models.models import CurrentTaskContent, TaskContent, TaskCurrentView
+
+LIST_CACHE_SIZE = config('LIST_CACHE_SIZE', default=256, cast=int)
+# 0 disables the cache of the endpoint.
+LIST_CACHE_TTL_SECONDS = config('LIST_CACHE_TTL_SECONDS', default=5.0, cast=float)
+LIST_CACHE_CURSOR_TTL_SECONDS = config('LIST_CACHE_CURSOR_TTL_SECONDS', default=5.0, cast=float)
+
+# The transaction of the session wrote tasks. The generation is bumped again once it ends.
+_WROTE_TASKS = 'wrote_tasks'
+
+
+class ListCacheStats(BaseModel):
+    """Counters of the list cache."""
+
+    hits: int
+    misses: int
+    hit_rate: float
+    size: int
+    max_size: int
+    generation: int
+    ttl_seconds: typ.Dict[str, float]
+
+
+class ListCache:
+    """Bounded LRU of JSON bodies with a time to live per endpoint."""
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: typ.Dict[str, float],
+        clock: typ.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self.lookups = Lookups()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._bodies: collections.OrderedDict[typ.Tuple[typ.Any, ...], typ.Tuple[bytes, float]] = (
+            collections.OrderedDict()
+        )
+
+    def key(self, endpoint: str, *parts: typ.Hashable) -> typ.Tuple[typ.Any, ...]:
+        """Key of a page of the endpoint, in the current generation.
+
+        Take it before reading the tasks.
+        """
+        return (self.generation, endpoint, *parts)
+
+    def get(self, key: typ.Tuple[typ.Any, ...]) -> bytes | None:
+        """Return the cached body or None."""
+        with self._lock:
+            entry = self._bodies.get(key)
+            if entry is None or entry[1] <= self._clock():
+                if entry is not None:
+                    del self._bodies[key]
+                self.lookups.misses += 1
+                return None
+            self._bodies.move_to_end(key)
+            self.lookups.hits += 1
+            return entry[0]
+
+    def put(self, key: typ.Tuple[typ.Any, ...], body: bytes) -> None:
+        """Cache the body. Skipped when a write bumped the generation since the key was taken."""
+        ttl_seconds = self.ttl_seconds.get(key[1], 0.0)
+        if ttl_seconds <= 0:
+            return
+        with self._lock:
+            if key[0] != self.generation:
+                return
+            self._bodies[key] = (body, self._clock() + ttl_seconds)
+            self._bodies.move_to_end(key)
+            while len(self._bodies) > self.max_size:
+                self._bodies.popitem(last=False)
+
+    def bump(self) -> None:
+        """Start a new generation. Forget all pages."""
+        with self._lock:
+            self.generation += 1
+            self._bodies.clear()
+
+    def stats(self) -> ListCacheStats:
+        """Return the counters."""
+        with self._lock:
+            return ListCacheStats(
+                hits=self.lookups.hits,
+                misses=self.lookups.misses,
+                hit_rate=self.lookups.hit_rate,
+                size=len(self._bodies),
+                max_size=self.max_size,
+                generation=self.generation,
+                ttl_seconds=dict(self.ttl_seconds),
+            )
+
+
+list_cache = ListCache(
+    max_size=LIST_CACHE_SIZE,
+    ttl_seconds={'page': LIST_CACHE_TTL_SECONDS, 'cursor': LIST_CACHE_CURSOR_TTL_SECONDS},
+)
+
+
+def forget_lists(session: typ.Any) -> None:
+    """Bump the generation for a write of tasks in the session. Again when the transaction ends."""
+    list_cache.bump()
+    session.info[_WROTE_TASKS] = True
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _bump_after_write(session: Session) -> None:
+    """A concurrent request could cache the tasks before the commit."""
+    if session.info.pop(_WROTE_TASKS, False):
+        list_cache.bump()
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_on_bulk_write(orm_execute_state: ORMExecuteState) -> None:
+    """Bump the generation on a bulk UPDATE or DELETE of tasks outside of the repository."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (CurrentTaskContent, TaskContent, TaskCurrentView):
+        list_cache.bump()
@@ -0,0 +1,15 @@
+"""Hit and miss counters of the in-process caches."""
+
+
+class Lookups:
+    """Hits and misses of one cache. The cache updates them under its own lock."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the lookups served from the cache, 0 before the first one."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,54 @@
+"""Count the SQL statements executed while serving a request."""
+import contextlib
+import contextvars
+import typing as typ
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """Number of statements sent to the database and of pool checkouts."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.connections = 0
+
+
+_current_counter: contextvars.ContextVar[QueryCounter | None] = contextvars.ContextVar(
+    'query_counter', default=None
+)
+
+
+def _count_query(*_: typ.Any) -> None:
+    """Increase the counter of the running request if any."""
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+
+
+def _count_connection(*_: typ.Any) -> None:
+    """Increase the connection counter of the running request if any."""
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.connections += 1
+
+
+def install_query_counter(engine: Engine) -> None:
+    """Count every statement executed by the engine and every connection taken from its pool."""
+    event.listen(engine, 'before_cursor_execute', _count_query)
+    event.listen(engine, 'checkout', _count_connection)
+
+
+@contextlib.contextmanager
+def count_queries() -> typ.Iterator[QueryCounter]:
+    """Count the statements executed inside the block.
+
+    Including the threads and tasks spawned from it.
+    """
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
@@ -0,0 +1,135 @@
+"""One session and one transaction per request."""
+import contextvars
+import json
+import typing as typ
+
+from fastapi import Depends, Request
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import async_session_maker
+from core.common.revision_cache import defer_invalidation, flush_written_tasks
+from core.common.user_cache import user_cache
+from core.models.models import TaskContent, User
+
+# Task id and user id are INTEGER columns. asyncpg refuses to bind a value outside of it.
+MAX_INTEGER_ID = 2 ** 31 - 1
+
+
+class KnownReferences:
+    """Ids the request already checked with its session.
+
+    The validators read them instead of the database.
+    """
+
+    def __init__(self) -> None:
+        self.user_ids: typ.Dict[int, bool] = {}
+        self.task_ids: typ.Dict[int, bool] = {}
+
+    def add_users(self, user_ids: typ.Iterable[int], exists: bool = True) -> None:
+        """Remember whether the users exist."""
+        self.user_ids.update(dict.fromkeys(user_ids, exists))
+
+    def add_tasks(self, task_ids: typ.Iterable[int], exists: bool = True) -> None:
+        """Remember whether the tasks exist."""
+        self.task_ids.update(dict.fromkeys(task_ids, exists))
+
+
+_known_references: contextvars.ContextVar[KnownReferences | None] = contextvars.ContextVar(
+    'known_references', default=None
+)
+
+
+def get_known_references() -> KnownReferences | None:
+    """Return the references of the running request if any."""
+    return _known_references.get()
+
+
+def remember_references(
+    user_ids: typ.Iterable[int | None] = (),
+    task_ids: typ.Iterable[int | None] = (),
+) -> None:
+    """Remember the ids loaded from the database. They exist, foreign keys guarantee it."""
+    known = get_known_references()
+    if known is not None:
+        known.add_users(i for i in user_ids if i is not None)
+        known.add_tasks(i for i in task_ids if i is not None)
+
+
+def is_integer_id(value: typ.Any) -> bool:
+    """Check the value can be an id of an INTEGER column."""
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value <= MAX_INTEGER_ID
+
+
+async def get_session() -> typ.AsyncIterator[AsyncSession]:
+    """Provide one session and one transaction for the whole request.
+
+    Commit when the request succeeds.
+    """
+    _known_references.set(KnownReferences())
+    async with async_session_maker() as session:
+        defer_invalidation(session)
+        try:
+            async with session.begin():
+                yield session
+        finally:
+            await flush_written_tasks(session)
+
+
+_INT_ADAPTER = TypeAdapter(int)
+
+
+def _coerce_id(value: typ.Any) -> int | None:
+    """The id the body validation makes of the value, e.g. 5 of "5". None when it is not an id."""
+    try:
+        coerced = _INT_ADAPTER.validate_python(value)
+    except ValidationError:
+        return None
+    return coerced if is_integer_id(coerced) else None
+
+
+def _collect_ids(body: typ.Any, field_name: str) -> typ.Set[int]:
+    """Collect the ids of `field_name` from a JSON object or a list of them."""
+    items = body if isinstance(body, list) else [body]
+    ids = {_coerce_id(item.get(field_name)) for item in items if isinstance(item, dict)}
+    ids.discard(None)
+    return ids  # type: ignore[return-value]
+
+
+async def prefetch_references(
+    request: Request,
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> None:
+    """Check the `created_by` and `id` of the body with the request session.
+
+    Before the body is validated.
+    """
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        # FastAPI reports the malformed body.
+        return
+
+    known = get_known_references()
+    user_ids = _collect_ids(body, 'created_by')
+    cached = {user_id for user_id in user_ids if user_cache.get_by_id(user_id) is not None}
+    known.add_users(cached)
+    missing = user_ids - cached
+    if missing:
+        found = set()
+        for user in await session.scalars(select(User).where(User.id.in_(missing))):  # type: ignore[attr-defined]  # pylint: disable=no-member
+            user_cache.put(user)
+            found.add(user.id)
+        known.add_users(found)
+        known.add_users(missing - found, exists=False)
+
+    task_ids = _collect_ids(body, 'id')
+    if task_ids:
+        found = set(
+            await session.scalars(
+                select(TaskContent.id).where(TaskContent.id.in_(task_ids)).distinct()  # type: ignore[attr-defined]  # pylint: disable=no-member
+            )
+        )
+        known.add_tasks(found)
+        known.add_tasks(task_ids - found, exists=False)
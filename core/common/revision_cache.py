@@ -0,0 +1,337 @@
+"""Cache of the immutable task revisions and of the current revision of every task.
+
+A revision never changes once written, an update writes a new `identifier`.
+Then a revision is cached by its identifier, until a long TTL bounds the shared
+backend. The pointer from the task id to the current revision changes on update,
+delete and undo. It is invalidated by the writes to `CurrentTaskContent` and expires
+after a short TTL, so another process never serves a stale pointer for long.
+"""
+import collections
+import json
+import threading
+import time
+import typing as typ
+import uuid
+
+from decouple import config
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, object_session
+from starlette.concurrency import run_in_threadpool
+
+from core.models.models import CurrentTaskContent, TaskContent
+
+T = typ.TypeVar('T')
+
+REVISION_CACHE_SIZE = config('REVISION_CACHE_SIZE', default=4096, cast=int)
+REVISION_CACHE_URL = config('REVISION_CACHE_URL', default='')
+REVISION_CACHE_CURRENT_TTL_SECONDS = config(
+    'REVISION_CACHE_CURRENT_TTL_SECONDS', default=5.0, cast=float,
+)
+# The shared backend is not bounded. A revision is dropped a day after it is cached.
+REVISION_CACHE_REVISION_TTL_SECONDS = config(
+    'REVISION_CACHE_REVISION_TTL_SECONDS', default=86400.0, cast=float,
+)
+# Invalidation generations of the current revisions. Tasks sharing a slot share a generation.
+GENERATION_SLOTS = 4096
+
+# Task ids written by the transaction of the session. They are invalidated once it ends.
+_WRITTEN_TASK_IDS = 'written_task_ids'
+# The owner of the session invalidates them with `flush_written_tasks`, off the event loop.
+_DEFER_INVALIDATION = 'defer_invalidation'
+
+
+class RevisionCacheBackend:
+    """Storage of the cache. Values are JSON compatible dictionaries."""
+
+    name = 'base'
+    # Round trips block. The endpoints run them in the thread pool.
+    blocking = False
+
+    def get(self, key: str) -> typ.Dict[str, typ.Any] | None:
+        """Return the value or None."""
+        raise NotImplementedError
+
+    def set(
+        self, key: str, value: typ.Dict[str, typ.Any], ttl_seconds: float | None = None,
+    ) -> None:
+        """Store the value, for `ttl_seconds` if given."""
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        """Remove the values, in one round trip."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove all values."""
+        raise NotImplementedError
+
+
+class InMemoryRevisionBackend(RevisionCacheBackend):
+    """Bounded LRU in the process."""
+
+    name = 'memory'
+
+    def __init__(self, max_size: int, clock: typ.Callable[[], float] = time.monotonic) -> None:
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        # The value and when it expires, None for never.
+        self._values: collections.OrderedDict[
+            str, typ.Tuple[typ.Dict[str, typ.Any], float | None]
+        ] = collections.OrderedDict()
+
+    def get(self, key: str) -> typ.Dict[str, typ.Any] | None:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._values[key]
+                return None
+            self._values.move_to_end(key)
+            return dict(value)
+
+    def set(
+        self, key: str, value: typ.Dict[str, typ.Any], ttl_seconds: float | None = None,
+    ) -> None:
+        expires_at = None if ttl_seconds is None else self._clock() + ttl_seconds
+        with self._lock:
+            self._values[key] = (dict(value), expires_at)
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class SharedRevisionBackend(RevisionCacheBackend):
+    """Cache shared by the processes, on a Redis compatible client.
+
+    The client needs `get`, `set(name, value, px=)`, `delete` and `scan_iter(match=)`.
+    """
+
+    name = 'shared'
+    blocking = True
+
+    def __init__(self, client: typ.Any, prefix: str = 'taskado:revision-cache:') -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> typ.Dict[str, typ.Any] | None:
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(
+        self, key: str, value: typ.Dict[str, typ.Any], ttl_seconds: float | None = None,
+    ) -> None:
+        px = None if ttl_seconds is None else int(ttl_seconds * 1000)
+        self.client.set(self.prefix + key, json.dumps(value), px=px)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+def make_backend(url: str, max_size: int) -> RevisionCacheBackend:
+    """Shared backend when `url` is given. Otherwise the in-memory one."""
+    if not url:
+        return InMemoryRevisionBackend(max_size)
+    try:
+        import redis  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError('REVISION_CACHE_URL requires the `redis` package.') from exc
+    return SharedRevisionBackend(redis.Redis.from_url(url))
+
+
+class RevisionCacheStats(BaseModel):
+    """Counters of the revision cache."""
+
+    backend: str
+    hits: int
+    misses: int
+
+
+class RevisionCache:
+    """Revisions by identifier and current revision by task id."""
+
+    def __init__(
+        self,
+        backend: RevisionCacheBackend,
+        current_ttl_seconds: float,
+        revision_ttl_seconds: float | None = None,
+    ) -> None:
+        self.backend = backend
+        self.current_ttl_seconds = current_ttl_seconds
+        self.revision_ttl_seconds = revision_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._generations = [0] * GENERATION_SLOTS
+
+    async def _call(self, method: typ.Callable[..., T], *args: typ.Any, **kwargs: typ.Any) -> T:
+        """Call a method of the backend without blocking the event loop."""
+        if self.backend.blocking:
+            return await run_in_threadpool(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    async def _get(self, key: str) -> typ.Dict[str, typ.Any] | None:
+        value = await self._call(self.backend.get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def get_revision(self, identifier: uuid.UUID | str) -> typ.Dict[str, typ.Any] | None:
+        """Return the detail payload of the revision or None."""
+        return await self._get(f"detail:{identifier}")
+
+    async def put_revision(
+        self, identifier: uuid.UUID | str, payload: typ.Dict[str, typ.Any],
+    ) -> None:
+        """Cache the detail payload of the revision. It never changes, it only expires."""
+        await self._call(
+            self.backend.set,
+            f"detail:{identifier}",
+            payload,
+            ttl_seconds=self.revision_ttl_seconds,
+        )
+
+    async def get_current(self, task_id: int) -> CurrentTaskContent | None:
+        """Return the current revision of the task or None. It is not bound to any session."""
+        value = await self._get(f"current:{task_id}")
+        return None if value is None else CurrentTaskContent.model_validate(value)
+
+    def current_generation(self, task_id: int) -> int:
+        """Generation of the current revision of the task. Take it before reading the task."""
+        return self._generations[task_id % GENERATION_SLOTS]
+
+    async def put_current(self, current_task: CurrentTaskContent, generation: int) -> None:
+        """Cache the current revision of the task for a short time.
+
+        Skipped when the task was invalidated since `generation` was taken, the read may be older.
+        The invalidations of another process are not seen, the time to live bounds them.
+        """
+        task_id = current_task.id
+        if self.current_generation(task_id) != generation:
+            return
+        key = f"current:{task_id}"
+        await self._call(
+            self.backend.set,
+            key,
+            current_task.model_dump(mode='json'),
+            ttl_seconds=self.current_ttl_seconds,
+        )
+        if self.current_generation(task_id) != generation:
+            # Invalidated while it was stored, maybe before.
+            await self._call(self.backend.delete, key)
+
+    def _bump(self, task_ids: typ.Iterable[int]) -> typ.List[str]:
+        """Start a new generation of the tasks. Return their keys."""
+        keys = []
+        for task_id in task_ids:
+            self._generations[task_id % GENERATION_SLOTS] += 1
+            keys.append(f"current:{task_id}")
+        return keys
+
+    async def invalidate_tasks(self, task_ids: typ.Iterable[int]) -> None:
+        """Forget the current revisions of the tasks, in one round trip."""
+        await self._call(self.backend.delete, *self._bump(task_ids))
+
+    def invalidate_tasks_sync(self, task_ids: typ.Iterable[int]) -> None:
+        """Same as `invalidate_tasks`, for the event hooks. It blocks on the shared backend."""
+        self.backend.delete(*self._bump(task_ids))
+
+    def clear(self) -> None:
+        """Forget everything."""
+        self._generations = [generation + 1 for generation in self._generations]
+        self.backend.clear()
+
+    def stats(self) -> RevisionCacheStats:
+        """Return the counters."""
+        return RevisionCacheStats(backend=self.backend.name, hits=self.hits, misses=self.misses)
+
+
+revision_cache = RevisionCache(
+    backend=make_backend(REVISION_CACHE_URL, REVISION_CACHE_SIZE),
+    current_ttl_seconds=REVISION_CACHE_CURRENT_TTL_SECONDS,
+    revision_ttl_seconds=REVISION_CACHE_REVISION_TTL_SECONDS,
+)
+
+
+def forget_tasks(session: typ.Any, task_ids: typ.Iterable[int]) -> None:
+    """Forget the current revisions of the tasks written in the session, once the transaction ends.
+
+    The ORM writes to `CurrentTaskContent` call it. Call it after a Core statement writes the table.
+    Until the transaction ends, the other sessions read the revisions it replaces.
+    """
+    session.info.setdefault(_WRITTEN_TASK_IDS, set()).update(task_ids)
+
+
+def defer_invalidation(session: typ.Any) -> None:
+    """Leave the tasks written in the session to `flush_written_tasks` of the caller.
+
+    The event hooks would block the event loop on the shared backend.
+    """
+    session.info[_DEFER_INVALIDATION] = True
+
+
+async def flush_written_tasks(session: typ.Any) -> None:
+    """Forget the tasks written in the session, in one round trip.
+
+    Call it once the transaction ends.
+    """
+    task_ids = session.info.pop(_WRITTEN_TASK_IDS, None)
+    if task_ids:
+        await revision_cache.invalidate_tasks(task_ids)
+
+
+@event.listens_for(CurrentTaskContent, 'after_insert')
+@event.listens_for(CurrentTaskContent, 'after_update')
+@event.listens_for(CurrentTaskContent, 'after_delete')
+def _invalidate_current_task(
+    _mapper: typ.Any, _connection: typ.Any, target: CurrentTaskContent,
+) -> None:
+    """Forget the current revision written through the ORM."""
+    session = object_session(target)
+    if session is None:
+        revision_cache.invalidate_tasks_sync([target.id])
+    else:
+        forget_tasks(session, [target.id])
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_written_tasks(session: Session) -> None:
+    """Forget the tasks written in the transaction, in one round trip."""
+    if session.info.get(_DEFER_INVALIDATION):
+        return
+    task_ids = session.info.pop(_WRITTEN_TASK_IDS, None)
+    if task_ids:
+        revision_cache.invalidate_tasks_sync(task_ids)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _invalidate_bulk_write(orm_execute_state: ORMExecuteState) -> None:
+    """Forget everything on a bulk UPDATE or DELETE of tasks. The rows are unknown."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (CurrentTaskContent, TaskContent):
+        revision_cache.clear()
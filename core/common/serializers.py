@@ -3,8 +3,7 @@ from marshmallow import fields, validate
 from marshmallow_sqlalchemy import SQLAlchemySchema
 from sqlmodel import Session
 
-from app import engine
-from core.models.models import StatusEnum, TaskContent, User
+from core.models.models import StatusEnum, TaskContent
 
 
 class BaseSchema(SQLAlchemySchema):
@@ -47,18 +46,3 @@ class TaskContentSchema(BaseTaskContentSchema):
     # created_by = SmartNested(UserSchema)  # Got {}
     # created_by = fields.Nested(UserSchema, attribute="id")  # created_by does not show up.
     # created_by = Nested(UserSchema, attribute="username")  # created_by does not show up.
-
-
-class ListTaskSchemaOutput(BaseTaskContentSchema):
-    """List task schema."""
-
-    created_by_username: str | None = fields.String()
-    updated_by: int | None = fields.Integer()
-    updated_by_username: str | None = fields.String()
-
-
-def get_user(user_id: int) -> User:
-    """Get user by id."""
-
-    with Session(engine) as session:
-        return session.query(User).filter(User.id == user_id).first()
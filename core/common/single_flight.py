@@ -0,0 +1,96 @@
+"""Coalesce identical concurrent reads of a worker.
+
+During an incident hundreds of clients read the same list or the same task at once.
+The first request of a key runs the read, the requests arriving before it ends await
+its result instead of running their own copy of the queries.
+"""
+import asyncio
+import threading
+import typing as typ
+
+from pydantic import BaseModel
+
+T = typ.TypeVar('T')
+
+
+class SingleFlightStats(BaseModel):
+    """Counters of the coalesced reads."""
+
+    executed: int
+    coalesced: int
+    in_flight: int
+
+
+class SingleFlight:
+    """Reads in flight by key. A key is the endpoint and its normalized parameters."""
+
+    def __init__(self) -> None:
+        self.executed = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls: typ.Dict[typ.Hashable, asyncio.Future[typ.Any]] = {}
+
+    async def do(
+        self,
+        key: typ.Hashable,
+        call: typ.Callable[[], typ.Awaitable[T]],
+        copy: typ.Callable[[T], T] | None = None,
+    ) -> T:
+        """Run `call`, or await the result of the same key in flight.
+
+        The requests awaiting get `copy` of the result when given,
+        e.g. when it is bound to the session of the first one.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._calls.get(key)
+            # Futures of another event loop, e.g. of another test client, cannot be awaited.
+            leading = future is None or future.get_loop() is not loop
+            if leading:
+                future = self._calls[key] = loop.create_future()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        if leading:
+            return await self._lead(key, future, call)
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # This request is cancelled
+            # The first request is cancelled, e.g. its client went away. Read alone.
+            return await call()
+        return result if copy is None else copy(result)
+
+    async def _lead(
+        self,
+        key: typ.Hashable,
+        future: asyncio.Future[typ.Any],
+        call: typ.Callable[[], typ.Awaitable[T]],
+    ) -> T:
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # Retrieved, nobody may await it
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+    def stats(self) -> SingleFlightStats:
+        """Return the counters."""
+        with self._lock:
+            return SingleFlightStats(
+                executed=self.executed, coalesced=self.coalesced, in_flight=len(self._calls),
+            )
+
+
+single_flight = SingleFlight()
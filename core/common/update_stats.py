@@ -0,0 +1,67 @@
+"""Count the revisions written and skipped by updates."""
+import threading
+import typing as typ
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Written and skipped updates of the transaction of the session. Counted once it commits.
+_PENDING_UPDATES = 'pending_updates'
+
+
+class UpdateStats(BaseModel):
+    """Counters of the updates."""
+
+    written: int
+    skipped: int
+
+
+class UpdateCounter:
+    """Updates which wrote a revision, and updates with the content of the current revision."""
+
+    def __init__(self) -> None:
+        self.written = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def record(self, written: int = 0, skipped: int = 0) -> None:
+        """Add the outcome of one request."""
+        with self._lock:
+            self.written += written
+            self.skipped += skipped
+
+    def reset(self) -> None:
+        """Start counting from zero."""
+        with self._lock:
+            self.written = 0
+            self.skipped = 0
+
+    def stats(self) -> UpdateStats:
+        """Return the counters."""
+        with self._lock:
+            return UpdateStats(written=self.written, skipped=self.skipped)
+
+
+update_counter = UpdateCounter()
+
+
+def record_updates(session: typ.Any, written: int = 0, skipped: int = 0) -> None:
+    """Count the outcome of updates in the session once its transaction commits."""
+    pending = session.info.setdefault(_PENDING_UPDATES, [0, 0])
+    pending[0] += written
+    pending[1] += skipped
+
+
+@event.listens_for(Session, 'after_commit')
+def _record_committed_updates(session: Session) -> None:
+    """The updates of the transaction are written, or skipped for good."""
+    pending = session.info.pop(_PENDING_UPDATES, None)
+    if pending is not None:
+        update_counter.record(written=pending[0], skipped=pending[1])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_rolled_back_updates(session: Session) -> None:
+    """Nothing of the transaction is written."""
+    session.info.pop(_PENDING_UPDATES, None)
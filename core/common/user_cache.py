@@ -0,0 +1,129 @@
+"""In-process cache of users by id and by username."""
+import collections
+import threading
+import time
+import typing as typ
+
+from decouple import config
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from core.common.lookups import Lookups
+from core.models.models import User
+
+USER_CACHE_SIZE = config('USER_CACHE_SIZE', default=1024, cast=int)
+USER_CACHE_TTL_SECONDS = config('USER_CACHE_TTL_SECONDS', default=60.0, cast=float)
+
+
+class UserCacheStats(BaseModel):
+    """Counters of the user cache."""
+
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+    ttl_seconds: float
+
+
+class UserCache:
+    """Bounded LRU of users with a time to live. Users are almost never written."""
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        clock: typ.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.lookups = Lookups()
+        self._clock = clock
+        self._lock = threading.Lock()
+        # The user and when it expires.
+        self._by_id: collections.OrderedDict[int, typ.Tuple[User, float]] = (
+            collections.OrderedDict()
+        )
+        self._id_by_username: typ.Dict[str, int] = {}
+
+    def get_by_id(self, user_id: int) -> User | None:
+        """Return the cached user or None."""
+        with self._lock:
+            return self._get(user_id)
+
+    def get_by_username(self, username: str) -> User | None:
+        """Return the cached user or None."""
+        with self._lock:
+            user_id = self._id_by_username.get(username)
+            if user_id is None:
+                self.lookups.misses += 1
+                return None
+            return self._get(user_id)
+
+    def _get(self, user_id: int) -> User | None:
+        entry = self._by_id.get(user_id)
+        if entry is None or entry[1] <= self._clock():
+            if entry is not None:
+                self._remove(user_id)
+            self.lookups.misses += 1
+            return None
+        self._by_id.move_to_end(user_id)
+        self.lookups.hits += 1
+        return entry[0]
+
+    def put(self, user: User) -> None:
+        """Cache a copy of the user. The copy is not bound to any session."""
+        copy = User(id=user.id, username=user.username)
+        with self._lock:
+            self._remove(user.id)
+            self._by_id[user.id] = (copy, self._clock() + self.ttl_seconds)
+            self._id_by_username[user.username] = user.id
+            while len(self._by_id) > self.max_size:
+                self._remove(next(iter(self._by_id)))
+
+    def _remove(self, user_id: int) -> None:
+        entry = self._by_id.pop(user_id, None)
+        if entry is not None and self._id_by_username.get(entry[0].username) == user_id:
+            del self._id_by_username[entry[0].username]
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget the user. Call it when the user changes."""
+        with self._lock:
+            self._remove(user_id)
+
+    def clear(self) -> None:
+        """Forget all users."""
+        with self._lock:
+            self._by_id.clear()
+            self._id_by_username.clear()
+
+    def stats(self) -> UserCacheStats:
+        """Return the counters."""
+        with self._lock:
+            return UserCacheStats(
+                hits=self.lookups.hits,
+                misses=self.lookups.misses,
+                size=len(self._by_id),
+                max_size=self.max_size,
+                ttl_seconds=self.ttl_seconds,
+            )
+
+
+user_cache = UserCache(max_size=USER_CACHE_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(_mapper: typ.Any, _connection: typ.Any, target: User) -> None:
+    """Forget the user written through the ORM."""
+    user_cache.invalidate(target.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _invalidate_bulk_write(orm_execute_state: ORMExecuteState) -> None:
+    """Forget all users on a bulk UPDATE or DELETE of users. The rows are unknown."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is User:
+        user_cache.clear()
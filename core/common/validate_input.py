@@ -3,10 +3,13 @@ import typing as typ
 from datetime import date, datetime
 
 from pydantic import BaseModel, Field, field_validator
-from sqlalchemy import exists
+from sqlalchemy import exists, select
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import engine
+from core.common.request_session import get_known_references, is_integer_id
+from core.common.user_cache import user_cache
 from core.models.models import StatusEnum, TaskContent, User
 
 
@@ -66,10 +69,25 @@ class GenericTaskInput(BaseModel):
     @classmethod
     def user_exists_in_db(cls, user_id: int) -> int | None:
         """Short call to check with database."""
+        if not is_integer_id(user_id):
+            # No row holds it. Do not open a connection to find out.
+            return False
+        # The request already checked it with its own session.
+        known = get_known_references()
+        if known is not None and user_id in known.user_ids:
+            return known.user_ids[user_id]
+
+        if user_cache.get_by_id(user_id) is not None:
+            return True
+
         # Implement the logic to check if the user exists in the database
         # This could be a database query or any other method to check user existence
-        session = Session(engine)
-        return session.scalar(exists().where(User.id == user_id).select())
+        with Session(engine) as session:
+            user = session.get(User, user_id)
+            if user is None:
+                return False
+            user_cache.put(user)
+            return True
 
 
 class CheckTaskId(BaseModel):
@@ -81,8 +99,15 @@ class CheckTaskId(BaseModel):
     @classmethod
     def task_id_exists_in_db(cls, task_id: int) -> typ.Optional[int]:
         """Check if the task id exists in the database."""
-        session = Session(engine)
-        is_exists = session.scalar(exists().where(TaskContent.id == task_id).select())
+        known = get_known_references()
+        if not is_integer_id(task_id):
+            # No row holds it. Do not open a connection to find out.
+            is_exists = False
+        elif known is not None and task_id in known.task_ids:
+            is_exists = known.task_ids[task_id]
+        else:
+            with Session(engine) as session:
+                is_exists = session.scalar(exists().where(TaskContent.id == task_id).select())
         if not is_exists:
             raise ValueError('Task with this id does not exist')
         return task_id
@@ -92,6 +117,20 @@ class UpdateTask(CheckTaskId, GenericTaskInput):
     """Include id to the model by mixin."""
 
 
+class TaskOut(BaseModel):
+    """Output detail of a task.
+
+    No validators, build it from the database rows with `model_construct`.
+    """
+
+    title: str | None
+    description: str | None
+    status: StatusEnum
+    due_date: date | None
+    created_by: int | None
+    id: int
+
+
 class ErrorDetail(BaseModel):
     """Error details model."""
 
@@ -117,13 +156,41 @@ class TaskSuccessMessage(BaseModel):
     message: str
 
 
+class BulkItemResult(BaseModel):
+    """Outcome of one item of a bulk request. `index` is its position in the request."""
+    index: int
+    id: int | None = None
+    errors: typ.List[ErrorDetail] = []
+
+
+class BulkResult(BaseModel):
+    """Outcome of a bulk request. Failed items do not abort the others."""
+    succeeded: int
+    failed: int
+    results: typ.List[BulkItemResult]
+
+
+class RevisionSummary(BaseModel):
+    """One revision of a task.
+
+    Revert the task to it by its identifier, the 32 hex digits of the UUID.
+    """
+    identifier: str
+    revision_no: int
+    title: str | None
+    status: StatusEnum
+    created_by: int | None
+    created_at: datetime
+    is_current: bool
+
+
 class SummaryTask(BaseModel):
     """Output summary task with created_by, and updated_by."""
 
     id: int
-    title: str
-    description: str
-    due_date: date
+    title: str | None
+    description: str | None
+    due_date: date | None
     status: str
     created_by: int | None
     updated_by: int | None
@@ -139,6 +206,13 @@ class ResponsePayload(BaseModel):
     previous: typ.Optional[str]
 
 
+class CursorPage(BaseModel):
+    """Keyset paginated tasks. Pass `next_cursor` as `after_id` to get the next page."""
+    items: typ.List[SummaryTask]
+    limit: int
+    next_cursor: typ.Optional[str]
+
+
 def parse_date(date_str: str) -> date:
     """Function to parse date string."""
     year, month, day = date_str.split('-')
@@ -160,10 +234,13 @@ def validate_status(str_status: str) -> StatusEnum | None:
     return None
 
 
-def validate_username(str_username: str) -> User:
+async def validate_username(session: AsyncSession, str_username: str) -> User:
     """Validate the username."""
-    with Session(engine) as session:
-        user = session.query(User).filter(User.username == str_username).first()
-        if user is None:
-            raise ValueError('User does not exist.')
+    user = user_cache.get_by_username(str_username)
+    if user is not None:
         return user
+    user = await session.scalar(select(User).where(User.username == str_username))
+    if user is None:
+        raise ValueError('User does not exist.')
+    user_cache.put(user)
+    return user
@@ -0,0 +1,165 @@
+"""
+Move the revisions outside of the retention policy to `taskcontentarchive`.
+
+A chunk of tasks is moved per transaction. Its current tasks are locked like an undo does,
+then undo and redo never point a task to a revision being archived.
+`python -m core.jobs.compact_history --keep-revisions 20 --keep-days 90`
+"""
+import argparse
+import logging
+import typing as typ
+from datetime import timedelta
+
+from decouple import config
+from pydantic import BaseModel
+from sqlalchemy import (ARRAY, Integer, any_, bindparam, func, insert, select,
+                        union_all)
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from core.models.models import (CurrentTaskContent, TaskContent,
+                                TaskContentArchive)
+
+logger = logging.getLogger(__name__)
+
+
+def _optional_int(value: str | None) -> int | None:
+    return int(value) if value else None
+
+
+REVISION_RETENTION_COUNT = config('REVISION_RETENTION_COUNT', default=None, cast=_optional_int)
+REVISION_RETENTION_DAYS = config('REVISION_RETENTION_DAYS', default=None, cast=_optional_int)
+# Tasks per transaction. Their current tasks are locked until it commits.
+COMPACTION_CHUNK_SIZE = config('COMPACTION_CHUNK_SIZE', default=500, cast=int)
+
+
+class RetentionPolicy(BaseModel):
+    """Which revisions before the current one to keep. A revision kept by either rule is kept.
+
+    The current revision, the revisions to redo, and the deleted revision undo restores
+    are always kept.
+    """
+
+    keep_revisions: int | None = None  # The current revision and the revisions before it.
+    keep_days: int | None = None
+
+
+class CompactionReport(BaseModel):
+    """Outcome of a compaction run."""
+
+    tasks: int
+    archived: int
+    chunks: int
+
+
+def _archive_statement(task_ids: typ.Sequence[int], policy: RetentionPolicy) -> typ.Any:
+    """Move the revisions of the tasks outside of the policy to the archive, in one statement."""
+    task_table = TaskContent.__table__
+    current_table = CurrentTaskContent.__table__
+    archive_table = TaskContentArchive.__table__
+    ids = bindparam('ids', list(task_ids), type_=ARRAY(Integer))
+    # The revision a task points to. A deleted task points to its deleted revision,
+    # undo restores it.
+    anchors = union_all(
+        select(current_table.c.id, current_table.c.revision_no)
+        .where(current_table.c.id == any_(ids)),
+        select(task_table.c.id, task_table.c.revision_no)
+        .where(task_table.c.id == any_(ids), task_table.c.is_deleted),
+    ).cte('anchors')
+    conditions = [
+        task_table.c.id == any_(ids),
+        task_table.c.id == anchors.c.id,
+        task_table.c.revision_no < anchors.c.revision_no,
+    ]
+    if policy.keep_revisions is not None:
+        conditions.append(task_table.c.revision_no <= anchors.c.revision_no - policy.keep_revisions)
+    if policy.keep_days is not None:
+        conditions.append(task_table.c.created_at < func.now() - timedelta(days=policy.keep_days))
+    moved = (
+        task_table.delete()
+        .where(*conditions)
+        .returning(*task_table.c)
+        .cte('moved')
+    )
+    columns = [column.name for column in task_table.c]
+    return (
+        insert(archive_table)
+        .from_select(columns, select(*(moved.c[name] for name in columns)))
+        .returning(archive_table.c.identifier)
+    )
+
+
+def compact_chunk(session: Session, task_ids: typ.Sequence[int], policy: RetentionPolicy) -> int:
+    """Archive the revisions of the tasks. Return how many. The caller commits."""
+    # Lock like undo and redo, in the order of id.
+    # They wait for the chunk, the chunk waits for them.
+    ids = bindparam('ids', list(task_ids), type_=ARRAY(Integer))
+    session.execute(
+        select(CurrentTaskContent.id)
+        .where(CurrentTaskContent.id == any_(ids))
+        .order_by(CurrentTaskContent.id)
+        .with_for_update()
+    )
+    # Undo of a delete restores from the deleted revision. Lock it too.
+    session.execute(
+        select(TaskContent.identifier)
+        .where(TaskContent.id == any_(ids), TaskContent.is_deleted)
+        .order_by(TaskContent.id)
+        .with_for_update()
+    )
+    return len(session.execute(_archive_statement(task_ids, policy)).all())
+
+
+def compact_history(
+    engine: Engine,
+    policy: RetentionPolicy,
+    chunk_size: int = COMPACTION_CHUNK_SIZE,
+) -> CompactionReport:
+    """Archive the revisions outside of the policy, a chunk of tasks per transaction."""
+    if policy.keep_revisions is None and policy.keep_days is None:
+        raise ValueError('Set keep_revisions or keep_days.')
+    if policy.keep_revisions is not None and policy.keep_revisions < 1:
+        raise ValueError('keep_revisions counts the current revision, it must be at least 1.')
+    tasks = archived = chunks = 0
+    last_id = 0
+    while True:
+        with Session(engine) as session:
+            task_ids = list(
+                session.scalars(
+                    select(TaskContent.id)
+                    .where(TaskContent.id > last_id)
+                    .distinct()
+                    .order_by(TaskContent.id)
+                    .limit(chunk_size)
+                )
+            )
+            if not task_ids:
+                break
+            archived += compact_chunk(session, task_ids, policy)
+            session.commit()
+        tasks += len(task_ids)
+        chunks += 1
+        last_id = task_ids[-1]
+        logger.info('Compacted the tasks up to %s, %s revisions archived so far', last_id, archived)
+    return CompactionReport(tasks=tasks, archived=archived, chunks=chunks)
+
+
+if __name__ == '__main__':
+    from app import engine as app_engine
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--keep-revisions', type=int, default=REVISION_RETENTION_COUNT)
+    parser.add_argument('--keep-days', type=int, default=REVISION_RETENTION_DAYS)
+    parser.add_argument('--chunk-size', type=int, default=COMPACTION_CHUNK_SIZE)
+    args = parser.parse_args()
+    try:
+        report = compact_history(
+            app_engine,
+            RetentionPolicy(keep_revisions=args.keep_revisions, keep_days=args.keep_days),
+            chunk_size=args.chunk_size,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(report.model_dump_json())
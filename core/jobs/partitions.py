@@ -0,0 +1,68 @@
+"""
+Create the monthly partitions of `taskcontent` ahead of time.
+
+A revision of a month without a partition goes to `taskcontent_default`. A month cannot be created
+once its rows are there, run this job before the months begin, e.g. daily.
+`python -m core.jobs.partitions --months-ahead 3`
+"""
+import argparse
+import typing as typ
+from datetime import date
+
+from decouple import config
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+PARTITIONED_TABLE = 'taskcontent'
+PARTITION_MONTHS_AHEAD = config('PARTITION_MONTHS_AHEAD', default=3, cast=int)
+
+
+def next_month(month: date) -> date:
+    """The first day of the month after."""
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """`taskcontent_p2024_01` holds the revisions created in January 2024."""
+    return f"{PARTITIONED_TABLE}_p{month:%Y_%m}"
+
+
+def create_partition_statement(month: date) -> str:
+    """Create the partition of the month unless it exists.
+
+    Its indexes are created like the parent ones.
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARTITIONED_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    )
+
+
+def ensure_partitions(
+    engine: Engine,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    today: date | None = None,
+) -> typ.List[str]:
+    """Create the partitions of this month and the months ahead.
+
+    Return the names of the partitions.
+    """
+    month = (today or date.today()).replace(day=1)
+    names = []
+    with engine.begin() as connection:
+        for _ in range(months_ahead + 1):
+            connection.execute(text(create_partition_statement(month)))
+            names.append(partition_name(month))
+            month = next_month(month)
+    return names
+
+
+if __name__ == '__main__':
+    from app import engine as app_engine
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD)
+    args = parser.parse_args()
+    print('\n'.join(ensure_partitions(app_engine, args.months_ahead)))
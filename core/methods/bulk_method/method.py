@@ -0,0 +1,158 @@
+"""Bulk methods. Every item is validated on its own and reported in the result."""
+import logging
+import typing as typ
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.common.request_session import is_integer_id
+from core.common.validate_input import (BulkItemResult, BulkResult,
+                                        ErrorDetail, GenericTaskInput,
+                                        UpdateTask)
+from core.methods.crud import TaskRepository, undo_error_message
+
+logger = logging.getLogger(__name__)
+
+# Items of one bulk request.
+MAX_BULK_ITEMS = 10000
+
+
+def check_bulk_size(items: typ.Sequence[typ.Any]) -> None:
+    """Reject a request too large for one transaction."""
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_ITEMS} items per request.",
+        )
+
+
+def id_errors(msg: str) -> typ.List[ErrorDetail]:
+    """The error of the id of one item."""
+    return [ErrorDetail(loc=['id'], msg=msg, type='ValueError')]
+
+
+def validation_errors(exc: ValidationError) -> typ.List[ErrorDetail]:
+    """Convert the pydantic errors of one item."""
+    return [
+        ErrorDetail(loc=[str(loc) for loc in error['loc']], msg=error['msg'], type=error['type'])
+        for error in exc.errors()
+    ]
+
+
+def id_results(
+    task_ids: typ.List[int], verb: str,
+) -> typ.Tuple[typ.List[BulkItemResult], typ.Dict[int, BulkItemResult]]:
+    """One result per id. A repeated id is reported, the first one is kept."""
+    results: typ.List[BulkItemResult] = []
+    unique: typ.Dict[int, BulkItemResult] = {}
+    for index, task_id in enumerate(task_ids):
+        result = BulkItemResult(index=index, id=task_id)
+        results.append(result)
+        if task_id in unique:
+            result.errors = id_errors(f"Task is {verb} twice in the request.")
+        elif not is_integer_id(task_id):
+            result.errors = id_errors('Task not found')
+        else:
+            unique[task_id] = result
+    return results, unique
+
+
+def make_bulk_result(results: typ.List[BulkItemResult]) -> BulkResult:
+    """Count the outcomes."""
+    failed = sum(1 for result in results if result.errors)
+    return BulkResult(succeeded=len(results) - failed, failed=failed, results=results)
+
+
+async def bulk_create_tasks(
+    items: typ.List[typ.Any],
+    session: AsyncSession,
+) -> BulkResult:
+    """Endpoint to create many tasks in one transaction."""
+    check_bulk_size(items)
+    results: typ.List[BulkItemResult] = []
+    valid: typ.List[typ.Tuple[BulkItemResult, GenericTaskInput]] = []
+    for index, item in enumerate(items):
+        result = BulkItemResult(index=index)
+        results.append(result)
+        try:
+            # `created_by` ids were checked at once by `prefetch_references`.
+            valid.append((result, GenericTaskInput.model_validate(item)))
+        except ValidationError as exc:
+            logger.info('Bulk create item %s is not valid. %s', index, exc)
+            result.errors = validation_errors(exc)
+
+    task_repository = TaskRepository(session)
+    ids = await task_repository.create_many([task_input for _, task_input in valid])
+    for (result, _), _id in zip(valid, ids):
+        result.id = _id
+    return make_bulk_result(results)
+
+
+async def bulk_update_tasks(
+    items: typ.List[typ.Any],
+    session: AsyncSession,
+) -> BulkResult:
+    """Endpoint to update many tasks in one transaction."""
+    check_bulk_size(items)
+    results: typ.List[BulkItemResult] = []
+    valid: typ.Dict[int, typ.Tuple[BulkItemResult, UpdateTask]] = {}
+    for index, item in enumerate(items):
+        result = BulkItemResult(index=index)
+        results.append(result)
+        try:
+            # `id` and `created_by` were checked at once by `prefetch_references`.
+            payload = UpdateTask.model_validate(item)
+        except ValidationError as exc:
+            logger.info('Bulk update item %s is not valid. %s', index, exc)
+            result.errors = validation_errors(exc)
+            continue
+        result.id = payload.id
+        if payload.id in valid:
+            # The revisions of one task in one transaction could not be ordered for undo.
+            result.errors = id_errors('Task is updated twice in the request.')
+            continue
+        valid[payload.id] = (result, payload)
+
+    task_repository = TaskRepository(session)
+    updated_ids = await task_repository.update_many([payload for _, payload in valid.values()])
+    for task_id, (result, _) in valid.items():
+        if task_id not in updated_ids:
+            result.errors = id_errors(f"Task not found: {task_id}")
+    return make_bulk_result(results)
+
+
+async def bulk_delete_tasks(
+    task_ids: typ.List[int],
+    session: AsyncSession,
+) -> BulkResult:
+    """Endpoint to delete many tasks in one transaction."""
+    check_bulk_size(task_ids)
+    results, unique = id_results(task_ids, 'deleted')
+    task_repository = TaskRepository(session)
+    deleted, deleted_before = await task_repository.delete_many(list(unique))
+    for task_id, result in unique.items():
+        if task_id in deleted_before:
+            result.errors = id_errors(f"Task not found: {task_id}")
+        elif task_id not in deleted:
+            result.errors = id_errors('Task not found')
+    return make_bulk_result(results)
+
+
+async def bulk_undo_tasks(
+    task_ids: typ.List[int],
+    session: AsyncSession,
+) -> BulkResult:
+    """Endpoint to undo many tasks in one transaction."""
+    check_bulk_size(task_ids)
+    results, unique = id_results(task_ids, 'undone')
+    task_repository = TaskRepository(session)
+    undone, refused = await task_repository.undo_many(list(unique))
+    for task_id, result in unique.items():
+        if task_id in refused:
+            result.errors = [
+                ErrorDetail(loc=['id'], msg=undo_error_message(refused[task_id]), type='UndoError')
+            ]
+        elif task_id not in undone:
+            result.errors = id_errors('Task not found')
+    return make_bulk_result(results)
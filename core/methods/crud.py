@@ -1,23 +1,197 @@
 """Try implement using OOP. This supposed to be a data layer."""
 import logging
+import typing as typ
 import uuid
-from datetime import date, datetime
 
 import sqlalchemy
-from sqlalchemy import desc, func
-from sqlmodel import Session
-
-from app import engine
+from sqlalchemy import (ARRAY, DateTime, Integer, Uuid, and_, any_, bindparam,
+                        case, column, event, exists, func, insert, literal,
+                        literal_column, or_, select, update, values)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import object_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.common.list_cache import forget_lists, list_cache
+from core.common.revision_cache import forget_tasks
+from core.common.update_stats import record_updates
 from core.common.validate_input import (CheckTaskId, GenericTaskInput,
                                         UndoError, UpdateTask, parse_date)
-from core.methods.get_list_method.get_queryset import get_queryset
-from core.models.models import (CurrentTaskContent, StatusEnum, TaskContent,
-                                User)
+from core.methods.get_list_method.get_queryset import (TaskFilters,
+                                                       count_queryset,
+                                                       get_queryset)
+from core.models.models import (TASK_ID_SEQUENCE, CurrentTaskContent,
+                                TaskContent, TaskCurrentView, User,
+                                content_hash, new_identifier)
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT statement. asyncpg binds at most 32767 parameters in one statement.
+BULK_INSERT_CHUNK_SIZE = 1000
+
+
+def chunked(items: typ.Sequence[typ.Any], size: int) -> typ.Iterator[typ.Sequence[typ.Any]]:
+    """Split the items into chunks of at most `size`."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def id_array(task_ids: typ.Iterable[int]) -> sqlalchemy.BindParameter:
+    """One array parameter for all the ids. Compare with `== any_(...)`."""
+    return bindparam('ids', list(task_ids), type_=ARRAY(Integer))
+
 
-class CreateTask:
+def identifier_array(identifiers: typ.Iterable[uuid.UUID]) -> sqlalchemy.BindParameter:
+    """One array parameter for all the identifiers. Compare with `== any_(...)`."""
+    return bindparam('identifiers', list(identifiers), type_=ARRAY(Uuid))
+
+
+async def reserve_task_ids(session: AsyncSession, count: int) -> typ.List[int]:
+    """Reserve `count` task ids in one round trip."""
+    return list(
+        await session.scalars(
+            select(TASK_ID_SEQUENCE.next_value()).select_from(func.generate_series(1, count))
+        )
+    )
+
+
+def _upsert_view(rows: sqlalchemy.Select) -> postgresql.Insert:
+    """Write the read model rows selected by `rows`.
+
+    In the order of the columns of the read model.
+    """
+    view_table = TaskCurrentView.__table__
+    columns = [view_column.name for view_column in view_table.c]
+    statement = postgresql.insert(view_table).from_select(columns, rows)
+    return statement.on_conflict_do_update(
+        index_elements=['id'],
+        set_={name: statement.excluded[name] for name in columns if name != 'id'},
+    )
+
+
+def _view_rows(current: typ.Any, content: typ.Sequence[typ.Any]) -> sqlalchemy.Select:
+    """Rows of the read model from the current tasks in `current` and the content of their revision.
+
+    `content` is the title, description, due date, status and created_by of the revision.
+    """
+    user_table = User.__table__
+    created_user = user_table.alias('created_user')
+    updated_user = user_table.alias('updated_user')
+    return (
+        select(
+            current.c.id, current.c.identifier, current.c.revision_no, *content,
+            current.c.created_by, created_user.c.username,
+            current.c.updated_by, updated_user.c.username,
+        )
+        .outerjoin(created_user, current.c.created_by == created_user.c.id)
+        .outerjoin(updated_user, current.c.updated_by == updated_user.c.id)
+    )
+
+
+def _sync_view_statement(task_ids: typ.Collection[int]) -> postgresql.Insert:
+    """Rewrite the read model rows of the tasks from their current revision.
+
+    Remove the rows of the deleted tasks.
+    """
+    task_table = TaskContent.__table__
+    current_table = CurrentTaskContent.__table__
+    view_table = TaskCurrentView.__table__
+    ids = id_array(task_ids)
+    removed = (
+        sqlalchemy.delete(view_table)
+        .where(view_table.c.id == any_(ids), ~exists().where(current_table.c.id == view_table.c.id))
+        .returning(view_table.c.id)
+        .cte('removed')
+    )
+    rows = (
+        _view_rows(
+            current_table,
+            [
+                task_table.c.title, task_table.c.description, task_table.c.due_date,
+                task_table.c.status, task_table.c.created_by,
+            ],
+        )
+        .join(
+            task_table,
+            and_(
+                task_table.c.identifier == current_table.c.identifier,
+                task_table.c.created_at == current_table.c.revision_created_at,
+            ),
+        )
+        .where(current_table.c.id == any_(ids))
+    )
+    return _upsert_view(rows).add_cte(removed)
+
+
+def _rename_user_statement(user_id: int, username: str) -> sqlalchemy.Update:
+    """Rewrite the usernames of the user in the read model."""
+    view_table = TaskCurrentView.__table__
+    return (
+        update(view_table)
+        .where(or_(view_table.c.created_by == user_id, view_table.c.updated_by == user_id))
+        .values(
+            created_by_username=case(
+                (view_table.c.created_by == user_id, username),
+                else_=view_table.c.created_by_username,
+            ),
+            updated_by_username=case(
+                (view_table.c.updated_by == user_id, username),
+                else_=view_table.c.updated_by_username,
+            ),
+        )
+    )
+
+
+@event.listens_for(User, 'after_update')
+def _rename_user_in_view(_mapper: typ.Any, connection: sqlalchemy.Connection, target: User) -> None:
+    """Follow a rename of a user written through the ORM, in its transaction.
+
+    Forget the cached list pages.
+    """
+    if not sqlalchemy.inspect(target).attrs.username.history.has_changes():
+        return
+    connection.execute(_rename_user_statement(target.id, target.username))
+    session = object_session(target)
+    if session is None:
+        list_cache.bump()
+    else:
+        forget_lists(session)
+
+
+def _current_hashes_statement(task_ids: typ.Collection[int]) -> sqlalchemy.Select:
+    """Select the id and the content hash of the current revision of the tasks."""
+    return (
+        select(CurrentTaskContent.id, TaskContent.content_hash)
+        .join(
+            TaskContent,
+            and_(
+                TaskContent.identifier == CurrentTaskContent.identifier,
+                # Finds the partition of the current revision.
+                TaskContent.created_at == CurrentTaskContent.revision_created_at,
+            ),
+        )
+        .where(CurrentTaskContent.id == any_(id_array(task_ids)))
+    )
+
+
+class RepositoryBase:
+    """Hold the session of the request. The caller owns the transaction."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def sync_view(self, task_ids: typ.Collection[int]) -> None:
+        """Rewrite the read model rows of the tasks.
+
+        Call it after writing them, in the same transaction.
+
+        The cached list pages are forgotten.
+        """
+        if task_ids:
+            await self.session.execute(_sync_view_statement(task_ids))
+            forget_lists(self.session)
+
+
+class CreateTask(RepositoryBase):
     """Mixin class for creating a task."""
 
     @staticmethod
@@ -26,233 +200,703 @@ class CreateTask:
         instance = GenericTaskInput(**task_input.dict())
         return instance
 
-    @staticmethod
-    def _create_task(instance: GenericTaskInput) -> None:
+    async def _create_task(self, instance: GenericTaskInput) -> None:
         """Create a task."""
         # Validation successful, save the data to the database
-        with Session(engine) as session:
-            # Parse the due_date string to date object
-            due_date_instance = parse_date(instance.due_date) if instance.due_date else None
-
-            # Generate a unique identifier for the task
-            _identifier = uuid.uuid4().hex
-
-            # id is for human reference, identifier is for redo mechanism
-            _max_id = session.query(func.max(TaskContent.id)).scalar()
-            max_id = 0 if _max_id is None else _max_id
-            _id = max_id + 1
-
-            instance_dict = instance.dict()
-            instance_dict['due_date'] = due_date_instance
-
-            # Add the history record.
-            task_content = TaskContent(
-                **{
-                    'id': _id,
-                    'identifier': _identifier,
-                    **instance_dict,
-                }
-            )
+        # Parse the due_date string to date object
+        due_date_instance = parse_date(instance.due_date) if instance.due_date else None
 
-            # Save the current task table.
-            current_task = CurrentTaskContent(
-                **{
-                    'id': _id,
-                    'identifier': _identifier,
-                    'created_by': instance.created_by,
-                    'updated_by': instance.created_by,
-                    'created_at': task_content.created_at,
-                    'updated_at': task_content.created_at,
-                }
-            )
-            session.add(task_content)
-            session.add(current_task)
-            session.commit()
+        # Generate a unique identifier for the task
+        _identifier = new_identifier()
 
-    def create_task(self, task_input: GenericTaskInput):
-        """Create a task."""
-        validated_input_task = self.validate_input_task(task_input)
-        self._create_task(validated_input_task)
+        # id is for human reference, identifier is for redo mechanism
+        _id = await self.session.scalar(select(TASK_ID_SEQUENCE.next_value()))
 
+        instance_dict = instance.dict()
+        instance_dict['due_date'] = due_date_instance
+        instance_dict['content_hash'] = content_hash(
+            instance.title, instance.description, due_date_instance,
+            instance.status, instance.created_by,
+        )
 
-class DeleteTask:
-    """Mixin class for deleting a task."""
+        # Add the history record.
+        task_content = TaskContent(
+            **{
+                'id': _id,
+                'identifier': _identifier,
+                'revision_no': 1,
+                **instance_dict,
+            }
+        )
 
-    @staticmethod
-    def _delete_task(task_instance: CurrentTaskContent) -> None:
-        """Delete a task."""
-        with Session(engine) as session:
-            # Delete the instance from the current_task table
-            current_task_instance = (
-                session.query(CurrentTaskContent)
-                .filter(CurrentTaskContent.id == task_instance.id)
-                .first()
-            )
+        # Save the current task table.
+        current_task = CurrentTaskContent(
+            **{
+                'id': _id,
+                'identifier': _identifier,
+                'revision_no': 1,
+                'created_by': instance.created_by,
+                'updated_by': instance.created_by,
+                # created_at, updated_at and revision_created_at are the database now(),
+                # same as the revision.
+            }
+        )
+        self.session.add(task_content)
+        self.session.add(current_task)
+        await self.session.flush()
+        await self.sync_view([_id])
 
-            # Mark the history as `is_deleted`
-            task = (
-                session.query(TaskContent)
-                .filter(TaskContent.id == task_instance.id)
-                .order_by(desc(TaskContent.created_at))
-                .first()
+    async def create_task(self, task_input: GenericTaskInput):
+        """Create a task."""
+        validated_input_task = self.validate_input_task(task_input)
+        await self._create_task(validated_input_task)
+
+    async def create_many(self, task_inputs: typ.Sequence[GenericTaskInput]) -> typ.List[int]:
+        """Create validated tasks with multi-row INSERTs. Return their ids in the same order."""
+        if not task_inputs:
+            return []
+        ids = await reserve_task_ids(self.session, len(task_inputs))
+        task_contents = []
+        current_tasks = []
+        for _id, instance in zip(ids, task_inputs):
+            _identifier = new_identifier()
+            due_date = parse_date(instance.due_date) if instance.due_date else None
+            task_contents.append({
+                'id': _id,
+                'identifier': _identifier,
+                'revision_no': 1,
+                'title': instance.title,
+                'description': instance.description,
+                'due_date': due_date,
+                'status': instance.status,
+                'content_hash': content_hash(
+                    instance.title, instance.description, due_date,
+                    instance.status, instance.created_by,
+                ),
+                'is_deleted': False,
+                'created_by': instance.created_by,
+            })
+            current_tasks.append({
+                'id': _id,
+                'identifier': _identifier,
+                'revision_no': 1,
+                'created_by': instance.created_by,
+                'updated_by': instance.created_by,
+            })
+        for chunk in chunked(task_contents, BULK_INSERT_CHUNK_SIZE):
+            await self.session.execute(insert(TaskContent).values(chunk))
+        for chunk in chunked(current_tasks, BULK_INSERT_CHUNK_SIZE):
+            await self.session.execute(insert(CurrentTaskContent).values(chunk))
+        await self.sync_view(ids)
+        return ids
+
+
+class DeleteTask(RepositoryBase):
+    """Mixin class for deleting a task."""
+
+    async def _delete_task(self, task_instance: CurrentTaskContent) -> bool:
+        """Delete a task. Return False when a concurrent request deleted it."""
+        # Delete the instance from the current_task table
+        # Lock it. A concurrent update or undo of the task finishes first.
+        current_task_instance = await self.session.scalar(
+            select(CurrentTaskContent)
+            .where(CurrentTaskContent.id == task_instance.id)
+            .limit(1)
+            .with_for_update()
+        )
+        if current_task_instance is None:
+            return False
+
+        # Mark the history as `is_deleted`. The current revision, undo restores it.
+        task = await self.session.scalar(
+            select(TaskContent).where(
+                TaskContent.identifier == current_task_instance.identifier,
+                TaskContent.created_at == current_task_instance.revision_created_at,
             )
-            task.is_deleted = True
-            session.delete(current_task_instance)
-            session.commit()
+        )
+        task.is_deleted = True
+        await self.session.delete(current_task_instance)
+        await self.session.flush()
+        await self.sync_view([task_instance.id])
+        return True
 
-    def delete_task(self, task_instance: CurrentTaskContent):
+    async def delete_task(self, task_instance: CurrentTaskContent) -> bool:
         """Delete a task."""
-        self._delete_task(task_instance)
+        return await self._delete_task(task_instance)
+
+    async def delete_many(
+        self, task_ids: typ.Collection[int],
+    ) -> typ.Tuple[typ.Set[int], typ.Set[int]]:
+        """Delete the tasks like `delete_task`, with set-based statements.
+
+        Return the ids deleted, and the ids deleted before. Other ids do not exist.
+        """
+        if not task_ids:
+            return set(), set()
+        session = self.session
+        # Lock like update and undo, in the order of id. Concurrent bulk requests do not deadlock.
+        locked_ids = list(await session.scalars(_lock_current(task_ids)))
+        # Core statements on the tables. The ORM would not know the rows to synchronize.
+        current_table = CurrentTaskContent.__table__
+        deleted = (
+            await session.execute(
+                sqlalchemy.delete(current_table)
+                .where(current_table.c.id == any_(id_array(locked_ids)))
+                .returning(
+                    current_table.c.id,
+                    current_table.c.identifier,
+                    current_table.c.revision_created_at,
+                )
+            )
+        ).all() if locked_ids else []
+        # Mark the current revisions, undo restores them.
+        if deleted:
+            task_table = TaskContent.__table__
+            identifiers = identifier_array(row.identifier for row in deleted)
+            created_ats = bindparam(
+                'created_ats', [row.revision_created_at for row in deleted], type_=ARRAY(DateTime),
+            )
+            await session.execute(
+                update(task_table)
+                .where(
+                    task_table.c.identifier == any_(identifiers),
+                    # Only the partitions of the revisions.
+                    task_table.c.created_at == any_(created_ats),
+                )
+                .values(is_deleted=True)
+            )
+        deleted_ids = {row.id for row in deleted}
+        forget_tasks(session, deleted_ids)
+        await self.sync_view(deleted_ids)
+
+        missing = set(task_ids) - deleted_ids
+        deleted_before = set(
+            await session.scalars(
+                select(TaskContent.id).where(TaskContent.id == any_(id_array(missing))).distinct()
+            )
+        ) if missing else set()
+        return deleted_ids, deleted_before
 
 
-class ListTask:
+class ListTask(RepositoryBase):
     """Mixin class for listing tasks."""
 
-    def list_tasks(
+    async def list_tasks(
         self,
-        due_date_instance: date | None,
-        status_instance: StatusEnum | None,
-        user_instance: User | None,
-        updated_user_instance: User | None
-    ) -> sqlalchemy.orm.query.Query:
-        """List tasks."""
-        tasks_results = get_queryset(
-            _due_date=due_date_instance,
-            _status=status_instance,
-            _created_user=user_instance,
-            _updated_user=updated_user_instance,
+        filters: TaskFilters,
+        after_id: int | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+    ) -> typ.Sequence[sqlalchemy.Row]:
+        """List tasks. The rows have the columns of `SummaryTask`."""
+        tasks_results = await self.session.execute(
+            get_queryset(*filters, _after_id=after_id, _limit=limit, _offset=offset)
         )
-        return tasks_results
+        return tasks_results.all()
+
+    async def count_tasks(self, filters: TaskFilters) -> int:
+        """Count the tasks `list_tasks` lists without pagination."""
+        return await self.session.scalar(count_queryset(*filters))
 
 
-class DetailTask:
+class DetailTask(RepositoryBase):
     """Mixin class for getting task."""
 
-    def get_task_by_id(self, current_task: CurrentTaskContent) -> TaskContent:
-        """Get task by id."""
-        with Session(engine) as session:
-            task = (
-                session.query(TaskContent)
-                .filter(
-                    TaskContent.id == current_task.id,
-                    TaskContent.identifier == current_task.identifier,
-                    TaskContent.is_deleted == False,  # noqa E712  # pylint: disable=singleton-comparison
-                )
-                .one()
+    async def get_task_by_id(self, current_task: CurrentTaskContent) -> TaskCurrentView | None:
+        """Get the current revision of the task from the read model.
+
+        None when the task is deleted since.
+        """
+        task = (
+            await self.session.scalars(
+                select(TaskCurrentView).where(TaskCurrentView.id == current_task.id)
             )
+        ).one_or_none()
         return task
 
-
-class UndoTask:
-    """Mixin class for undoing."""
-
-    def undo_task(self, task_instance: CheckTaskId) -> None:
-        """Undo a task."""
-        with Session(engine) as session:
-            # Get the last revision of the task
-            task = (
-                session.query(TaskContent)
-                .filter(TaskContent.id == task_instance.id)
-                .order_by(TaskContent.created_at.desc())  # type: ignore[attr-defined]  # pylint: disable=no-member
-                .first()
+    async def list_revisions(self, current_task: CurrentTaskContent) -> typ.Sequence[TaskContent]:
+        """List the revisions of a task, the first one first."""
+        return (
+            await self.session.scalars(
+                select(TaskContent)
+                .where(TaskContent.id == current_task.id)
+                .order_by(TaskContent.revision_no)
             )
-
-            current_task_instance = (
-                session.query(CurrentTaskContent)
-                .filter(CurrentTaskContent.id == task.id)
-                .first()
+        ).all()
+
+
+def _lock_current(task_ids: typ.Collection[int]) -> sqlalchemy.Select:
+    """Lock the current tasks in the order of id.
+
+    Concurrent requests on the same tasks do not deadlock.
+
+    Update, delete, undo and redo of a task then run one after another,
+    and the statements after the lock see what the others committed.
+    """
+    return (
+        select(CurrentTaskContent.id, CurrentTaskContent.revision_no)
+        .where(CurrentTaskContent.id == any_(id_array(task_ids)))
+        .order_by(CurrentTaskContent.id)
+        .with_for_update()
+    )
+
+
+def _move_pointer_statement(
+    task_ids: typ.Collection[int], target: sqlalchemy.ColumnElement[bool],
+) -> sqlalchemy.Update:
+    """Point the current tasks to the revision matching `target`. Nothing when there is none.
+
+    The history is kept, undo and redo only move the pointer.
+    """
+    task_table = TaskContent.__table__
+    current_table = CurrentTaskContent.__table__
+    return (
+        update(current_table)
+        .where(
+            current_table.c.id == any_(id_array(task_ids)),
+            task_table.c.id == current_table.c.id,
+            target,
+        )
+        .values(
+            identifier=task_table.c.identifier,
+            revision_no=task_table.c.revision_no,
+            revision_created_at=task_table.c.created_at,
+        )
+        .returning(current_table.c.id)
+    )
+
+
+def _restore_statement(task_ids: typ.Collection[int]) -> sqlalchemy.Update:
+    """Restore the deleted tasks from their deleted revision.
+
+    Nothing for a task a concurrent undo restored.
+    """
+    task_table = TaskContent.__table__
+    current_table = CurrentTaskContent.__table__
+    restored = (
+        postgresql.insert(current_table)
+        .from_select(
+            [
+                'identifier', 'id', 'revision_no', 'created_by', 'updated_by',
+                'created_at', 'revision_created_at',
+            ],
+            select(
+                task_table.c.identifier, task_table.c.id, task_table.c.revision_no,
+                task_table.c.created_by, task_table.c.created_by,
+                task_table.c.created_at, task_table.c.created_at,
             )
+            .where(task_table.c.id == any_(id_array(task_ids)), task_table.c.is_deleted),
+        )
+        .on_conflict_do_nothing(index_elements=['id'])
+        .returning(current_table.c.identifier)
+        .cte('restored')
+    )
+    return (
+        update(task_table)
+        .where(task_table.c.identifier.in_(select(restored.c.identifier)))
+        .values(is_deleted=False)
+        .returning(task_table.c.id)
+    )
+
+
+def undo_error_message(revision_no: int) -> str:
+    """Why a task at `revision_no` cannot be undone."""
+    if revision_no == 1:
+        # It means task is created and immediately run undo.
+        return 'Task is created and immediately run undo.'
+    return 'The previous revisions are archived.'
+
+
+class UndoTask(RepositoryBase):
+    """Mixin class for undoing."""
 
+    async def move_pointers(
+        self, task_ids: typ.Collection[int], step: int,
+    ) -> typ.Tuple[typ.Set[int], typ.Dict[int, int]]:
+        """Move the current revision of the tasks `step` revisions back or forth.
+
+        Return the ids moved, and the revision number of the ids without a revision there.
+        Other ids are deleted or do not exist.
+        """
+        session = self.session
+        locked = dict((await session.execute(_lock_current(task_ids))).all())
+        if not locked:
+            return set(), {}
+        task_table = TaskContent.__table__
+        current_table = CurrentTaskContent.__table__
+        target = and_(
+            task_table.c.revision_no == current_table.c.revision_no + step,
+            # A later revision is created later. Skip the partitions on the other side.
+            task_table.c.created_at >= current_table.c.revision_created_at if step > 0
+            else task_table.c.created_at <= current_table.c.revision_created_at,
+        )
+        moved_ids = set(await session.scalars(_move_pointer_statement(locked, target)))
+        forget_tasks(session, moved_ids)
+        unmoved = {
+            task_id: revision_no
+            for task_id, revision_no in locked.items()
+            if task_id not in moved_ids
+        }
+        return moved_ids, unmoved
+
+    async def _undo(
+        self, task_ids: typ.Collection[int],
+    ) -> typ.Tuple[typ.Set[int], typ.Dict[int, int]]:
+        """Undo the existing tasks.
+
+        Return the ids undone, and the revision number of the ids at their oldest revision.
+        """
+        session = self.session
+        undone: typ.Set[int] = set()
+        refused: typ.Dict[int, int] = {}
+        pending = set(task_ids)
+        while pending:
             # Undo the PUT operation
-            if current_task_instance is not None:
-                # Remove the latest of tast_content
-                last_task_instance = (
-                    session.query(TaskContent)
-                    .filter(TaskContent.id == task.id)
-                    .order_by(desc(TaskContent.created_at))
-                    .first()
-                )
-
-                session.delete(last_task_instance)
-                session.commit()
-
-                new_last_task_instance = (
-                    session.query(TaskContent)
-                    .filter(TaskContent.id == task.id)
-                    .order_by(desc(TaskContent.created_at))
-                    .first()
-                )
-
-                if new_last_task_instance is None:
-                    # It means task is created and immediately run undo.
-                    raise UndoError('Task is created and immediately run undo.')
-                # Change the identifier on current_task_instance
-                current_task_instance.identifier = new_last_task_instance.identifier
-
-            else:
-                # Undo the DELETE operation
-                # Get the current task instance
-                current_task_instance = CurrentTaskContent(
-                    **{
-                        'identifier': task.identifier,
-                        'id': task.id,
-                        'created_by': task.created_by,
-                        'updated_by': task.created_by,
-                        'created_at': task.created_at,
-                        'updated_at': datetime.now(),
-                    }
+            moved, oldest = await self.move_pointers(pending, -1)
+            undone |= moved
+            refused.update(oldest)
+            pending -= moved | oldest.keys()
+            if not pending:
+                break
+            # Undo the DELETE operation
+            restored = set(await session.scalars(_restore_statement(pending)))
+            forget_tasks(session, restored)
+            undone |= restored
+            if not (moved or oldest or restored):
+                # Neither a current task nor a deleted revision, e.g. purged by hand. Not found.
+                logger.warning(
+                    'Undo found neither a current task nor a deleted revision: %s', sorted(pending),
                 )
-
-            # Mark the history as `is_deleted`
-            task.is_deleted = False
-
-            # Save the current task table.
-            session.add(current_task_instance)
-            session.commit()
+                break
+            # A concurrent undo restored the rest first. Undo their PUT like a later request would.
+            pending -= restored
+        await self.sync_view(undone)
+        return undone, refused
+
+    async def undo_task(self, task_instance: CheckTaskId) -> bool:
+        """Undo a task. Restore a deleted task, otherwise point it to the previous revision.
+
+        Return False when the task has neither a current revision nor a deleted one.
+        """
+        undone, refused = await self._undo([task_instance.id])
+        if refused:
+            raise UndoError(undo_error_message(refused[task_instance.id]))
+        return task_instance.id in undone
+
+    async def undo_many(
+        self, task_ids: typ.Collection[int],
+    ) -> typ.Tuple[typ.Set[int], typ.Dict[int, int]]:
+        """Undo the tasks like `undo_task`, with set-based statements.
+
+        Return the ids undone, and the revision number of the ids at their oldest revision,
+        which `undo_task` refuses.
+        Other ids do not exist.
+        """
+        if not task_ids:
+            return set(), {}
+        existing = set(
+            await self.session.scalars(
+                select(TaskContent.id).where(TaskContent.id == any_(id_array(task_ids))).distinct()
+            )
+        )
+        return await self._undo(existing)
+
+    async def redo_task(self, task_instance: CurrentTaskContent) -> bool:
+        """Point the task to the revision after the current one. Return False when there is none."""
+        moved, _ = await self.move_pointers([task_instance.id], 1)
+        await self.sync_view(moved)
+        return task_instance.id in moved
+
+    async def revert_task(self, task_instance: CurrentTaskContent, identifier: uuid.UUID) -> bool:
+        """Point the task to any of its revisions.
+
+        Return False when the task has no such revision.
+        """
+        session = self.session
+        if await session.scalar(_lock_current([task_instance.id])) is None:
+            return False
+        moved_id = await session.scalar(
+            _move_pointer_statement(
+                [task_instance.id], TaskContent.__table__.c.identifier == identifier,
+            )
+        )
+        forget_tasks(session, [task_instance.id])
+        if moved_id is None:
+            return False
+        await self.sync_view([moved_id])
+        return True
+
+
+def _new_revisions(
+    payloads: typ.Sequence[UpdateTask],
+    revision_nos: typ.Dict[int, int],
+    current_hashes: typ.Dict[int, str],
+) -> typ.List[typ.Dict[str, typ.Any]]:
+    """The rows of the new revisions of the current tasks, ready to insert.
+
+    Nothing for a task with the same content as its current revision, like `update`.
+    """
+    new_contents = []
+    for payload in payloads:
+        if payload.id not in revision_nos:
+            continue
+        due_date = parse_date(payload.due_date) if payload.due_date else None
+        new_hash = content_hash(
+            payload.title, payload.description, due_date, payload.status, payload.created_by,
+        )
+        if new_hash == current_hashes.get(payload.id):
+            continue
+        new_contents.append({
+            'id': payload.id,
+            'identifier': new_identifier(),
+            'revision_no': revision_nos[payload.id] + 1,
+            'title': payload.title,
+            'description': payload.description,
+            'due_date': due_date,
+            'status': payload.status,
+            'content_hash': new_hash,
+            'is_deleted': False,
+            'created_by': payload.created_by,
+            'created_at': func.clock_timestamp(),
+        })
+    return new_contents
+
+
+def _truncate_redo_statement(task_ids: typ.Collection[int]) -> sqlalchemy.Delete:
+    """Delete the revisions after the current revision of the tasks."""
+    task_table = TaskContent.__table__
+    current_table = CurrentTaskContent.__table__
+    return (
+        sqlalchemy.delete(task_table)
+        .where(
+            current_table.c.id == any_(id_array(task_ids)),
+            task_table.c.id == current_table.c.id,
+            task_table.c.revision_no > current_table.c.revision_no,
+            # A later revision is created later. Skip the partitions before.
+            task_table.c.created_at >= current_table.c.revision_created_at,
+        )
+    )
+
+
+def _repoint_statement(
+    new_contents: typ.Sequence[typ.Dict[str, typ.Any]],
+    created_ats: typ.Dict[int, typ.Any],
+) -> sqlalchemy.Update:
+    """Point the current tasks to their new revision, inserted at `created_ats`."""
+    # Core statement on the table. The ORM would not know the rows to synchronize.
+    current_table = CurrentTaskContent.__table__
+    new_current = values(
+        column('id', Integer), column('identifier', Uuid), column('revision_no', Integer),
+        column('updated_by', Integer), column('revision_created_at', DateTime),
+        name='new_current',
+    ).data([
+        (
+            row['id'], row['identifier'], row['revision_no'],
+            row['created_by'], created_ats[row['id']],
+        )
+        for row in new_contents
+    ])
+    return (
+        update(current_table)
+        .where(current_table.c.id == new_current.c.id)
+        .values(
+            identifier=new_current.c.identifier,
+            revision_no=new_current.c.revision_no,
+            revision_created_at=new_current.c.revision_created_at,
+            updated_by=new_current.c.updated_by,
+            updated_at=new_current.c.revision_created_at,
+        )
+    )
 
 
-class ModifyTask:
+class ModifyTask(RepositoryBase):
     """Mixin class for updating a task."""
 
-    def update(self, task_content_instance: UpdateTask, payload: UpdateTask) -> None:
-        """Update a task."""
-        with Session(engine) as session:
-            task = (
-                session.query(TaskContent).filter(TaskContent.id == payload.id).first()
-            )
+    async def update(self, payload: UpdateTask) -> bool:
+        """Update a task in one round trip. Return False when the task is deleted."""
+        # In order to do undo mechanism. Create a new instance of the task.
+        due_date = parse_date(payload.due_date) if payload.due_date else None
+        new_values = {
+            'identifier': new_identifier(),
+            'title': payload.title,  # Update the rest of the payload.
+            'description': payload.description,
+            'due_date': due_date,
+            'status': payload.status,
+            'content_hash': content_hash(
+                payload.title,
+                payload.description,
+                due_date,
+                payload.status,
+                payload.created_by,
+            ),
+            'is_deleted': False,
+            'created_by': payload.created_by,
+        }
+        statement = self._update_statement(payload.id, new_values)
+        outcome = (await self.session.execute(statement)).one_or_none()
+        if outcome is not None and not outcome.fresh:
+            # A concurrent write committed after the statement began,
+            # which could not see its revisions.
+            # The lock is held now. The statement again sees them.
+            outcome = (await self.session.execute(statement)).one_or_none()
+        if outcome is None:
+            return False
+        if outcome.unchanged:
+            # Same content as the current revision. Nothing is written.
+            record_updates(self.session, skipped=1)
+            return True
+        record_updates(self.session, written=1)
+        forget_tasks(self.session, [payload.id])
+        forget_lists(self.session)  # The statement rewrote the read model row
+        return True
 
-            # In order to do undo mechanism. Create a new instance of the task.
-            new_identifier = uuid.uuid4().hex
-
-            # Create new revision.
-            new_content = TaskContent(
-                **{
-                    'id': task.id,  # Use existing id
-                    'identifier': new_identifier,
-                    'title': task_content_instance.title,  # Update the rest of the payload.
-                    'description': task_content_instance.description,
-                    'due_date': parse_date(
-                        task_content_instance.due_date
-                    ) if task_content_instance.due_date else None,
-                    'status': task_content_instance.status,
-                    'created_by': task_content_instance.created_by,
-                    'created_at': datetime.now(),
-                }
+    @staticmethod
+    def _update_statement(task_id: int, new_values: typ.Dict[str, typ.Any]) -> sqlalchemy.Select:
+        """Lock the current task and replace the redo revisions with the new revision.
+
+        Point the current task and its read model to it.
+        Select whether the statement saw the latest current task,
+        and whether the current revision has the same content.
+        Nothing when the task is deleted.
+        Nothing is written when it did not see the latest, or the content is the same.
+        """
+        task_table = TaskContent.__table__
+        current_table = CurrentTaskContent.__table__
+        snapshot = current_table.alias('snapshot')
+        locked = (
+            select(
+                current_table.c.id,
+                current_table.c.revision_no,
+                current_table.c.revision_created_at,
+                # The lock returns the latest row,
+                # the rest of the statement reads the rows when it began.
+                (
+                    literal_column(f"{current_table.name}.xmin")
+                    == select(literal_column('snapshot.xmin'))
+                    .where(snapshot.c.id == task_id)
+                    .scalar_subquery()
+                ).label('fresh'),
+                exists().where(
+                    task_table.c.identifier == current_table.c.identifier,
+                    # Finds the partition of the current revision.
+                    task_table.c.created_at == current_table.c.revision_created_at,
+                    task_table.c.content_hash == new_values['content_hash'],
+                ).label('unchanged'),
             )
-
-            # Update the timestamp on this task instance.
-            current_task_instance = (
-                session.query(CurrentTaskContent)
-                .filter(CurrentTaskContent.id == payload.id)
-                .first()
+            .where(current_table.c.id == task_id)
+            .with_for_update(of=current_table)
+            .cte('locked')
+        )
+        # Redo is lost on update.
+        truncated = (
+            sqlalchemy.delete(task_table)
+            .where(
+                task_table.c.id == locked.c.id,
+                task_table.c.revision_no > locked.c.revision_no,
+                # A later revision is created later. Skip the partitions before.
+                task_table.c.created_at >= locked.c.revision_created_at,
+                locked.c.fresh,
+                ~locked.c.unchanged,
             )
-            current_task_instance.identifier = new_identifier
-            current_task_instance.updated_by = new_content.created_by
-            current_task_instance.updated_at = new_content.created_at
-
-            session.add(new_content)
-            session.add(current_task_instance)
-            session.commit()
+            .returning(task_table.c.identifier)
+            .cte('truncated')
+        )
+        new_revision = (
+            insert(task_table)
+            .from_select(
+                ['id', 'revision_no', *new_values, 'created_at'],
+                select(
+                    locked.c.id,
+                    locked.c.revision_no + 1,
+                    *(
+                        literal(value, type_=task_table.c[name].type)
+                        for name, value in new_values.items()
+                    ),
+                    # The time after the lock.
+                    # now() is the start of the transaction, maybe before a concurrent write.
+                    func.clock_timestamp(),
+                ).where(locked.c.fresh, ~locked.c.unchanged),
+            )
+            .returning(
+                task_table.c.id, task_table.c.identifier, task_table.c.revision_no,
+                task_table.c.created_by, task_table.c.created_at,
+            )
+            .cte('new_revision')
+        )
+        repointed = (
+            update(current_table)
+            .where(current_table.c.id == new_revision.c.id)
+            .values(
+                identifier=new_revision.c.identifier,
+                revision_no=new_revision.c.revision_no,
+                revision_created_at=new_revision.c.created_at,
+                updated_by=new_revision.c.created_by,
+                updated_at=new_revision.c.created_at,
+            )
+            .returning(
+                current_table.c.id, current_table.c.identifier, current_table.c.revision_no,
+                current_table.c.created_by, current_table.c.updated_by,
+            )
+            .cte('repointed')
+        )
+        viewed = _upsert_view(
+            _view_rows(
+                repointed,
+                [
+                    literal(new_values[name], type_=task_table.c[name].type)
+                    for name in ('title', 'description', 'due_date', 'status', 'created_by')
+                ],
+            )
+        ).cte('viewed')
+        # Every data-modifying CTE runs, referenced or not.
+        return select(locked.c.fresh, locked.c.unchanged).add_cte(truncated, repointed, viewed)
+
+    async def update_many(self, payloads: typ.Sequence[UpdateTask]) -> typ.Set[int]:
+        """Write a new revision of every task and repoint its current revision.
+
+        Each task gets the same revision and undo as `update`, nothing when the content is the same.
+        Ids must be unique. Return the ids updated, a deleted task is not.
+        """
+        if not payloads:
+            return set()
+        session = self.session
+        # Lock the current tasks like `update`.
+        # In the order of id, concurrent bulk requests do not deadlock.
+        locked = (
+            await session.execute(
+                select(CurrentTaskContent.id, CurrentTaskContent.revision_no)
+                .where(CurrentTaskContent.id == any_(id_array(payload.id for payload in payloads)))
+                .order_by(CurrentTaskContent.id)
+                .with_for_update()
+            )
+        ).all()
+        if not locked:
+            return set()
+        current_ids = {row.id for row in locked}
+        current_hashes = dict((await session.execute(_current_hashes_statement(current_ids))).all())
+        new_contents = _new_revisions(
+            payloads, {row.id: row.revision_no for row in locked}, current_hashes,
+        )
+        record_updates(
+            session, written=len(new_contents), skipped=len(current_ids) - len(new_contents),
+        )
+        if not new_contents:
+            return current_ids
+
+        updated_ids = [row['id'] for row in new_contents]
+        # Redo is lost on update, like `update`.
+        await session.execute(_truncate_redo_statement(updated_ids))
+        created_ats: typ.Dict[int, typ.Any] = {}
+        for chunk in chunked(new_contents, BULK_INSERT_CHUNK_SIZE):
+            inserted = await session.execute(
+                insert(TaskContent).values(chunk).returning(TaskContent.id, TaskContent.created_at)
+            )
+            created_ats.update(inserted.all())
+        for chunk in chunked(new_contents, BULK_INSERT_CHUNK_SIZE):
+            await session.execute(_repoint_statement(chunk, created_ats))
+        forget_tasks(session, updated_ids)
+        await self.sync_view(updated_ids)
+        return current_ids
 
 
 class TaskRepository(ModifyTask,
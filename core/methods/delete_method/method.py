@@ -1,6 +1,9 @@
 """DELETE method to delete a task."""
 import logging
 
+from fastapi import HTTPException, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
 from core.common.validate_input import TaskSuccessMessage
 from core.methods.crud import TaskRepository
 from core.models.models import CurrentTaskContent
@@ -8,10 +11,17 @@ from core.models.models import CurrentTaskContent
 logger = logging.getLogger(__name__)
 
 
-def delete_task(task_instance: CurrentTaskContent) -> TaskSuccessMessage:
+async def delete_task(
+    task_instance: CurrentTaskContent,
+    session: AsyncSession,
+) -> TaskSuccessMessage:
     """Endpoint to delete a task."""
-    task_repository = TaskRepository()
-    task_repository.delete_task(task_instance)
+    task_repository = TaskRepository(session)
+    if not await task_repository.delete_task(task_instance):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task not found: {task_instance.id}",
+        )
 
     return TaskSuccessMessage(
         message='Instance deleted successfully!',
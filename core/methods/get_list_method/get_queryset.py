@@ -3,12 +3,53 @@ import typing as typ
 from datetime import date
 
 import sqlalchemy
-from sqlalchemy import and_, or_
-from sqlmodel import Session
+from sqlalchemy import func, select
 
-from app import engine
-from core.models.models import (CurrentTaskContent, StatusEnum, TaskContent,
-                                User)
+from core.models.models import StatusEnum, TaskCurrentView, User
+
+# The fields of `SummaryTask`, in its order.
+SUMMARY_COLUMNS = (
+    TaskCurrentView.id,
+    TaskCurrentView.title,
+    TaskCurrentView.description,
+    TaskCurrentView.due_date,
+    TaskCurrentView.status,
+    TaskCurrentView.created_by,
+    TaskCurrentView.updated_by,
+    TaskCurrentView.created_by_username,
+    TaskCurrentView.updated_by_username,
+)
+
+
+class TaskFilters(typ.NamedTuple):
+    """The filters of the list endpoints, in the order of `get_queryset`. None adds nothing."""
+
+    due_date: typ.Optional[date]
+    status: typ.Optional[StatusEnum]
+    created_user: typ.Optional[User]
+    updated_user: typ.Optional[User]
+
+
+def get_task_filters(
+    _due_date: typ.Optional[date],
+    _status: typ.Optional[StatusEnum],
+    _created_user: typ.Optional[User],
+    _updated_user: typ.Optional[User],
+    _after_id: typ.Optional[int] = None,
+) -> typ.List[sqlalchemy.ColumnElement[bool]]:
+    """Turn the query params into SQL predicates. Missing params add nothing."""
+    filters: typ.List[sqlalchemy.ColumnElement[bool]] = []
+    if _due_date is not None:
+        filters.append(TaskCurrentView.due_date == _due_date)
+    if _status is not None:
+        filters.append(TaskCurrentView.status == _status)  # pylint: disable=no-member
+    if _created_user is not None:
+        filters.append(TaskCurrentView.created_by == _created_user.id)
+    if _updated_user is not None:
+        filters.append(TaskCurrentView.updated_by == _updated_user.id)
+    if _after_id is not None:
+        filters.append(TaskCurrentView.id > _after_id)
+    return filters
 
 
 def get_queryset(
@@ -16,100 +57,38 @@ def get_queryset(
     _status: typ.Optional[StatusEnum],
     _created_user: typ.Optional[User],
     _updated_user: typ.Optional[User],
-) -> sqlalchemy.orm.query.Query:
-    """Get the queryset of tasks."""
-    with Session(engine) as session:
-        if _updated_user is not None and _created_user is not None:
-            # List out available id.
-            available_id_list = (
-                session.query(CurrentTaskContent)
-                .filter(
-                    or_(
-                        CurrentTaskContent.updated_by == _updated_user.id,
-                        _updated_user is None,
-                    ),
-                    or_(
-                        CurrentTaskContent.created_by == _created_user.id,
-                        _created_user is None,
-                    ),
-                )
-                .all()
-            )
-        elif _updated_user is None and _created_user is not None:
-            available_id_list = (
-                session.query(CurrentTaskContent)
-                .filter(
-                    or_(
-                        CurrentTaskContent.created_by == _created_user.id,
-                        _created_user is None,
-                    )
-                )
-                .all()
-            )
-        elif _updated_user is not None and _created_user is None:
-            available_id_list = (
-                session.query(CurrentTaskContent)
-                .filter(
-                    or_(
-                        CurrentTaskContent.updated_by == _updated_user.id,
-                        _updated_user is None,
-                    ),
-                )
-                .all()
-            )
-        else:
-            # elif _updated_user is None and _user is None:
-            available_id_list = session.query(CurrentTaskContent).all()
+    _after_id: typ.Optional[int] = None,
+    _limit: typ.Optional[int] = None,
+    _offset: typ.Optional[int] = None,
+) -> sqlalchemy.Select:
+    """Get the queryset of tasks.
 
-        cleaned_id_list = [i.id for i in available_id_list]
+    All the filters go into a single statement on the read model, without joins.
+    The rows have the columns of `SummaryTask`, not the ORM instances.
+    The caller executes it with its own session. `_after_id` and `_limit` turn on keyset pagination,
+    `_offset` and `_limit` the page number one.
+    """
+    final_query = (
+        select(*SUMMARY_COLUMNS)
+        .where(*get_task_filters(_due_date, _status, _created_user, _updated_user, _after_id))
+        .order_by(TaskCurrentView.id.asc())  # type: ignore[attr-defined]  # pylint: disable=no-member  # noqa: E501
+    )
+    if _limit is not None:
+        final_query = final_query.limit(_limit)
+    if _offset:
+        final_query = final_query.offset(_offset)
+    return final_query
 
-        # Find the latest identifier from available_id_list
-        _identifier_list = (
-            session.query(CurrentTaskContent.identifier)
-            .filter(CurrentTaskContent.id.in_(cleaned_id_list))  # type: ignore[attr-defined]  # pylint: disable=no-member  # noqa: E501
-            .all()
-        )
-        cleaned_identifier_list = [i[0] for i in _identifier_list]
 
-        final_query = (
-            session.query(
-                CurrentTaskContent,
-                TaskContent,
-                User,
-            )
-            .outerjoin(
-                TaskContent,
-                and_(
-                    CurrentTaskContent.id == TaskContent.id,
-                    CurrentTaskContent.identifier == TaskContent.identifier,
-                    TaskContent.is_deleted == False,    # noqa: E712  # pylint: disable=singleton-comparison  # noqa: E501
-                ),
-            )
-            .outerjoin(
-                User,
-                or_(TaskContent.created_by == User.id, TaskContent.created_by is None),  # noqa: E501  # pylint: disable=line-too-long
-            )
-            .filter(
-                TaskContent.due_date == _due_date if _due_date else True,
-                TaskContent.status == _status if _status else True,  # pylint: disable=no-member
-                CurrentTaskContent.identifier.in_(cleaned_identifier_list),     # type: ignore[attr-defined]  # noqa: 501  # pylint: disable=line-too-long, no-member
-            )
-            .filter(
-                or_(
-                    CurrentTaskContent.created_by == _created_user.id
-                    if _created_user is not None
-                    else None,
-                    _created_user is None,
-                )
-            )
-            .filter(
-                or_(
-                    CurrentTaskContent.updated_by == _updated_user.id
-                    if _updated_user is not None
-                    else None,
-                    _updated_user is None,
-                )
-            )
-            .order_by(TaskContent.id.asc())  # type: ignore[attr-defined]  # pylint: disable=no-member  # noqa: E501
-        )
-        return final_query
+def count_queryset(
+    _due_date: typ.Optional[date],
+    _status: typ.Optional[StatusEnum],
+    _created_user: typ.Optional[User],
+    _updated_user: typ.Optional[User],
+) -> sqlalchemy.Select:
+    """Count the tasks of `get_queryset` with the same filters."""
+    return (
+        select(func.count())
+        .select_from(TaskCurrentView)
+        .where(*get_task_filters(_due_date, _status, _created_user, _updated_user))
+    )
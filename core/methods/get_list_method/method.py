@@ -1,15 +1,26 @@
 """List tasks method."""
+import functools
+import inspect
 import logging
+import math
 import typing as typ
 from datetime import date
 
-from fastapi import HTTPException, Query, status
+import sqlalchemy
+from fastapi import Depends, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse
+from fastapi_pagination import Params
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from core.common.serializers import ListTaskSchemaOutput, get_user
-from core.common.validate_input import (ErrorDetail, SummaryTask,
-                                        validate_due_date, validate_status,
-                                        validate_username)
+from core.common.list_cache import list_cache
+from core.common.request_session import get_session
+from core.common.single_flight import single_flight
+from core.common.validate_input import (ErrorDetail, validate_due_date,
+                                        validate_status, validate_username)
 from core.methods.crud import TaskRepository
+from core.methods.get_list_method.get_queryset import TaskFilters
+from core.methods.get_list_method.pagination_gadgets import (decode_cursor,
+                                                             encode_cursor)
 from core.models.models import StatusEnum, User
 
 logger = logging.getLogger(__name__)
@@ -29,8 +40,34 @@ class ConcreteCommonTaskQueryParams:
         self.created_by_username = created_by_username
         self.updated_by_username = updated_by_username
 
+    def cache_key(self) -> typ.Tuple[typ.Any, ...]:
+        """The filters normalized. The same filters have the same key whatever the query string."""
+        return (
+            self.due_date,
+            self.task_status,
+            self.created_by_username.id if self.created_by_username else None,
+            self.updated_by_username.id if self.updated_by_username else None,
+        )
+
+    def filters(self) -> TaskFilters:
+        """The filters of the queryset."""
+        return TaskFilters(
+            due_date=self.due_date,
+            status=self.task_status,
+            created_user=self.created_by_username,
+            updated_user=self.updated_by_username,
+        )
+
 
-def validate_task_common_query_param(
+class ConcreteCursorQueryParams:
+    """Concrete keyset pagination query params. The cursor is decoded to the last seen id."""
+    def __init__(self, after_id: int | None, limit: int):
+        self.after_id = after_id
+        self.limit = limit
+
+
+async def validate_task_common_query_param(
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
     due_date: str = Query(None),
     task_status: str = Query(None),
     created_by_username: str = Query(None),
@@ -42,26 +79,27 @@ def validate_task_common_query_param(
     """
     errors: typ.List[ErrorDetail] = []
 
-    def validate_and_collect_error(
+    async def validate_and_collect_error(
         validation_func: typ.Callable[[typ.Any], typ.Any],
         value: typ.Any,
         field_name: str
     ) -> typ.Any:
         try:
-            return validation_func(value) if value else None
+            result = validation_func(value) if value else None
+            return await result if inspect.isawaitable(result) else result
         except ValueError as e:
             logger.info('%s validation failed. %s', field_name, e)
             errors.append(ErrorDetail(loc=[field_name], msg=str(e), type='ValueError'))
             return None
 
-    due_date_instance: date | None = validate_and_collect_error(
+    due_date_instance: date | None = await validate_and_collect_error(
         validate_due_date, due_date, 'due_date')
-    status_instance: StatusEnum | None = validate_and_collect_error(
+    status_instance: StatusEnum | None = await validate_and_collect_error(
         validate_status, task_status, 'status')
-    user_instance: User | None = validate_and_collect_error(
-        validate_username, created_by_username, 'created_by_username')
-    updated_user_instance: User | None = validate_and_collect_error(
-        validate_username, updated_by_username, 'updated_by_username')
+    user_instance: User | None = await validate_and_collect_error(
+        functools.partial(validate_username, session), created_by_username, 'created_by_username')
+    updated_user_instance: User | None = await validate_and_collect_error(
+        functools.partial(validate_username, session), updated_by_username, 'updated_by_username')
 
     if len(errors) > 0:
         raise HTTPException(
@@ -76,40 +114,103 @@ def validate_task_common_query_param(
     )
 
 
-def list_tasks(
+def validate_cursor_query_param(
+    after_id: str = Query(
+        None, description='Opaque cursor from `next_cursor` of the previous page',
+    ),
+    limit: int = Query(50, ge=1, le=100),
+) -> ConcreteCursorQueryParams:
+    """Validate the keyset pagination query params."""
+    try:
+        last_id = decode_cursor(after_id) if after_id else None
+    except ValueError as e:
+        logger.info('after_id validation failed. %s', e)
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail=[ErrorDetail(loc=['after_id'], msg=str(e), type='ValueError').__dict__]
+        ) from e
+    return ConcreteCursorQueryParams(after_id=last_id, limit=limit)
+
+
+async def cached_list_response(
+    key: typ.Tuple[typ.Any, ...],
+    build: typ.Callable[[], typ.Awaitable[typ.Dict[str, typ.Any]]],
+) -> Response:
+    """Serve the page from the list cache. Build, serialize and cache it on a miss.
+
+    The misses of the same page at once share one build.
+    """
+    body = list_cache.get(key)
+    if body is None:
+        body = await single_flight.do(
+            ('list', *key), functools.partial(build_list_body, key, build),
+        )
+    return Response(body, media_type=ORJSONResponse.media_type)
+
+
+async def build_list_body(
+    key: typ.Tuple[typ.Any, ...],
+    build: typ.Callable[[], typ.Awaitable[typ.Dict[str, typ.Any]]],
+) -> bytes:
+    """Build the page, serialize and cache it."""
+    body = ORJSONResponse(await build()).body
+    list_cache.put(key, body)
+    return body
+
+
+async def list_tasks(
     commons: ConcreteCommonTaskQueryParams,
-) -> typ.List[SummaryTask]:
-    """Endpoint to list all tasks."""
-    task_repository = TaskRepository()
-    tasks_results = task_repository.list_tasks(
-        commons.due_date,
-        commons.task_status,
-        commons.created_by_username,
-        commons.updated_by_username,
+    params: Params,
+    session: AsyncSession,
+) -> typ.Dict[str, typ.Any]:
+    """Endpoint to list all tasks. Return the page of `Page[SummaryTask]`, ready for JSON."""
+    task_repository = TaskRepository(session)
+    # Same page as `fastapi_pagination.paginate`. Only the rows of the page are read.
+    raw_params = params.to_raw_params()
+    total = await task_repository.count_tasks(commons.filters())
+    tasks_results = await task_repository.list_tasks(
+        commons.filters(), limit=raw_params.limit, offset=raw_params.offset,
+    ) if total > raw_params.offset else []
+    return {
+        'items': serialize_tasks(tasks_results),
+        'total': total,
+        'page': params.page,
+        'size': params.size,
+        'pages': math.ceil(total / params.size),
+    }
+
+
+async def list_tasks_by_cursor(
+    commons: ConcreteCommonTaskQueryParams,
+    cursor: ConcreteCursorQueryParams,
+    session: AsyncSession,
+) -> typ.Dict[str, typ.Any]:
+    """Endpoint to list tasks page by page with keyset pagination.
+
+    Return the `CursorPage`, ready for JSON.
+    """
+    task_repository = TaskRepository(session)
+    # Fetch one extra row to know whether there is a next page.
+    tasks_results = await task_repository.list_tasks(
+        commons.filters(),
+        after_id=cursor.after_id,
+        limit=cursor.limit + 1,
     )
-    list_task_schema_output = ListTaskSchemaOutput()
-
-    raw_list_tasks = []
-    for _task in tasks_results:
-        created_by: User = get_user(_task[0].created_by)
-        updated_by: User = get_user(_task[0].updated_by)
-        raw_list_tasks.append(
-            {
-                'id': _task[1].id,
-                'title': _task[1].title,
-                'description': _task[1].description,
-                'due_date': _task[1].due_date,
-                'status': _task[1].status,
-                'created_by': _task[0].created_by,
-                'updated_by': _task[0].updated_by,
-                # Should wrap into single query.
-                'created_by_username': created_by.username
-                if created_by is not None
-                else None,
-                'updated_by_username': updated_by.username
-                if updated_by is not None
-                else None,
-            }
-        )
-    serialized_tasks = list_task_schema_output.dump(raw_list_tasks, many=True)
-    return [SummaryTask(**i) for i in serialized_tasks]
+    has_next = len(tasks_results) > cursor.limit
+    tasks = serialize_tasks(tasks_results[:cursor.limit])
+    return {
+        'items': tasks,
+        'limit': cursor.limit,
+        'next_cursor': encode_cursor(tasks[-1]['id']) if has_next else None,
+    }
+
+
+def serialize_tasks(
+    tasks_results: typ.Iterable[sqlalchemy.Row],
+) -> typ.List[typ.Dict[str, typ.Any]]:
+    """Turn the rows of `get_queryset` into the summary tasks, ready for JSON.
+
+    The rows come from the database, they are not validated again.
+    The status keeps the `StatusEnum.X` format.
+    """
+    return [dict(zip(row._fields, row), status=str(row.status)) for row in tasks_results]
@@ -1,5 +1,8 @@
 """Code of pagination."""
+import base64
+import binascii
 import enum
+import json
 
 from pydantic import BaseModel
 
@@ -15,3 +18,21 @@ class Pagination(BaseModel):
     perPage: int
     page: int
     order: SortEnum
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the last seen task id into an opaque cursor."""
+    raw = json.dumps({'id': last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode an opaque cursor back to the last seen task id."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))['id']
+    except (binascii.Error, ValueError, KeyError, TypeError) as err:
+        raise ValueError('Invalid cursor.') from err
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError('Invalid cursor.')
+    return last_id
@@ -1,17 +1,22 @@
 """POST method to create task."""
 import logging
 
+from sqlmodel.ext.asyncio.session import AsyncSession
+
 from core.common.validate_input import GenericTaskInput, TaskSuccessMessage
 from core.methods.crud import TaskRepository
 
 logger = logging.getLogger(__name__)
 
 
-def create_task(task_input: GenericTaskInput) -> TaskSuccessMessage:
+async def create_task(
+    task_input: GenericTaskInput,
+    session: AsyncSession,
+) -> TaskSuccessMessage:
     """Endpoint to create a task."""
     # Instantiate the logic class
-    task_repository = TaskRepository()
-    task_repository.create_task(task_input)
+    task_repository = TaskRepository(session)
+    await task_repository.create_task(task_input)
 
     return TaskSuccessMessage(
         message='Instance created successfully!',
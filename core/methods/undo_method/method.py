@@ -1,25 +1,100 @@
 """Undo method to restore a task."""
 import logging
+import typing as typ
+import uuid
 
 from fastapi import HTTPException, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from core.common.validate_input import (CheckTaskId, TaskSuccessMessage,
-                                        UndoError)
+from core.common.validate_input import (CheckTaskId, RevisionSummary,
+                                        TaskSuccessMessage, UndoError)
 from core.methods.crud import TaskRepository
+from core.models.models import CurrentTaskContent
 
 logger = logging.getLogger(__name__)
 
 
-def undo_task(task_instance: CheckTaskId) -> TaskSuccessMessage:
+async def undo_task(
+    task_instance: CheckTaskId,
+    session: AsyncSession,
+) -> TaskSuccessMessage:
     """Endpoint to undo a task."""
     try:
-        task_repository = TaskRepository()
-        task_repository.undo_task(task_instance)
+        task_repository = TaskRepository(session)
+        found = await task_repository.undo_task(task_instance)
     except UndoError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail='Task is created and immediately run undo.',
+            detail=str(exc),
         ) from exc
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Task not found',
+        )
     return TaskSuccessMessage(
         message='Instance restored successfully!',
     )
+
+
+async def redo_task(
+    task_instance: CurrentTaskContent,
+    session: AsyncSession,
+) -> TaskSuccessMessage:
+    """Endpoint to redo a task."""
+    task_repository = TaskRepository(session)
+    if not await task_repository.redo_task(task_instance):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Nothing to redo.',
+        )
+    return TaskSuccessMessage(
+        message='Instance redone successfully!',
+    )
+
+
+async def revert_task(
+    task_instance: CurrentTaskContent,
+    identifier: str,
+    session: AsyncSession,
+) -> TaskSuccessMessage:
+    """Endpoint to revert a task to one of its revisions.
+
+    The identifier is the hex, dashes are accepted.
+    """
+    try:
+        revision_identifier = uuid.UUID(identifier)
+    except ValueError:
+        revision_identifier = None
+    task_repository = TaskRepository(session)
+    reverted = revision_identifier is not None and await task_repository.revert_task(
+        task_instance, revision_identifier,
+    )
+    if not reverted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Revision not found: {identifier}",
+        )
+    return TaskSuccessMessage(
+        message='Instance reverted successfully!',
+    )
+
+
+async def list_revisions(
+    task_instance: CurrentTaskContent,
+    session: AsyncSession,
+) -> typ.List[RevisionSummary]:
+    """Endpoint to list the revisions of a task."""
+    task_repository = TaskRepository(session)
+    return [
+        RevisionSummary(
+            identifier=revision.identifier.hex,
+            revision_no=revision.revision_no,
+            title=revision.title,
+            status=revision.status,
+            created_by=revision.created_by,
+            created_at=revision.created_at,
+            is_current=revision.identifier == task_instance.identifier,
+        )
+        for revision in await task_repository.list_revisions(task_instance)
+    ]
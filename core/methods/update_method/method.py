@@ -1,6 +1,9 @@
 """Update method to update a task."""
 import logging
 
+from fastapi import HTTPException, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+
 from core.common.validate_input import (TaskSuccessMessage,
                                         TaskValidationError, UpdateTask)
 from core.methods.crud import TaskRepository
@@ -8,13 +11,19 @@ from core.methods.crud import TaskRepository
 logger = logging.getLogger(__name__)
 
 
-def update_task(
+async def update_task(
     payload: UpdateTask,
+    session: AsyncSession,
 ) -> TaskSuccessMessage | TaskValidationError:
     """Endpoint to update a task."""
-    task_content_instance = UpdateTask(**payload.dict())
-    task_repository = TaskRepository()
-    task_repository.update(task_content_instance, payload)
+    # The payload is validated by FastAPI already.
+    # Building another `UpdateTask` runs the validators again.
+    task_repository = TaskRepository(session)
+    if not await task_repository.update(payload):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task not found: {payload.id}",
+        )
     return TaskSuccessMessage(
         message='Instance updated successfully!',
     )
@@ -1,10 +1,32 @@
 """Model classes for this application."""
 import enum
+import hashlib
+import json
+import os
+import time
+import typing as typ
+import uuid
 from datetime import date, datetime
 
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, Sequence, UniqueConstraint, func
 from sqlmodel import Field, SQLModel
 
+# Hand out the human id of the task. Never reuse an id even under concurrent creates.
+TASK_ID_SEQUENCE = Sequence('task_id_seq', metadata=SQLModel.metadata)
+
+
+def new_identifier() -> uuid.UUID:
+    """UUIDv7. The unix time in milliseconds then random bits.
+
+    An identifier created later sorts after.
+
+    New rows are appended to the end of the indexes instead of random pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76  # Version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
 
 class StatusEnum(enum.Enum):
     """Enum class of status field."""
@@ -17,33 +39,140 @@ class StatusEnum(enum.Enum):
 class TaskContent(SQLModel, table=True):  # type: ignore[call-arg]
     """Model class for TaskContent history."""
 
-    identifier: str = Field(primary_key=True)  # For redo mechanism
+    __table_args__ = (
+        # Revision of a task by number. A partitioned table cannot enforce it unique,
+        # the lock of the current task does.
+        Index('ix_taskcontent_id_revision_no', 'id', 'revision_no'),
+        # List filters.
+        Index('ix_taskcontent_due_date_status', 'due_date', 'status'),
+        # A partition per month. Lookups by created_at read one partition.
+        # See `core.jobs.partitions`.
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
+    # For redo mechanism
+    identifier: uuid.UUID = Field(default_factory=new_identifier, primary_key=True)
     id: int = Field(primary_key=False)  # For human use
     title: str = Field(nullable=True)
     description: str = Field(nullable=True)
     due_date: date = Field(default=None, nullable=True)
     status: StatusEnum = Field(default=StatusEnum.PENDING)
+    revision_no: int = Field(default=1, nullable=False)  # For undo and redo, 1 is the created one
+    # An update with the same hash is skipped
+    content_hash: str = Field(default=None, nullable=False, max_length=64)
     is_deleted: bool = Field(default=False)  # For redo mechanism
     created_by: int = Field(nullable=True, default=None, foreign_key='user.id')
-    created_at: datetime = Field(default=datetime.now())  # For redo mechanism
+    # The database now(). Every process orders the revisions with the same clock.
+    # Part of the primary key, the partition key must be.
+    created_at: datetime = Field(
+        default=None, primary_key=True, nullable=False,
+        sa_column_kwargs={'server_default': func.now()},
+    )
+
+
+class TaskContentArchive(SQLModel, table=True):  # type: ignore[call-arg]
+    """Model class for the revisions moved out of TaskContent by the retention policy."""
+
+    __table_args__ = (
+        Index('ix_taskcontentarchive_id_revision_no', 'id', 'revision_no'),
+    )
+
+    identifier: uuid.UUID = Field(primary_key=True)
+    id: int = Field(primary_key=False)
+    title: str = Field(nullable=True)
+    description: str = Field(nullable=True)
+    due_date: date = Field(default=None, nullable=True)
+    status: StatusEnum = Field(default=StatusEnum.PENDING)
+    revision_no: int = Field(nullable=False)
+    content_hash: str = Field(nullable=False, max_length=64)
+    is_deleted: bool = Field(default=False)
+    # Not a foreign key, users may be deleted later
+    created_by: int = Field(nullable=True, default=None)
+    created_at: datetime = Field(nullable=False)
+    archived_at: datetime = Field(
+        default=None, nullable=False, sa_column_kwargs={'server_default': func.now()},
+    )
+
+
+def content_hash(
+    title: str | None,
+    description: str | None,
+    due_date: date | None,
+    status: StatusEnum | str,
+    created_by: int | None,
+) -> str:
+    """Digest of the content of a revision. Revisions with the same content have the same digest."""
+    content: typ.List[typ.Any] = [
+        title,
+        description,
+        due_date.isoformat() if due_date else None,
+        StatusEnum(status).name,
+        created_by,
+    ]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
 
 
 class CurrentTaskContent(SQLModel, table=True):  # type: ignore[call-arg]
     """Model class for current."""
 
     # https://github.com/tiangolo/sqlmodel/issues/114
-    __table_args__ = (UniqueConstraint('identifier', 'id'),)
+    __table_args__ = (
+        UniqueConstraint('identifier', 'id'),
+        Index('ix_currenttaskcontent_id', 'id', unique=True),
+    )
 
-    identifier: str = Field(primary_key=True)  # For redo mechanism
+    identifier: uuid.UUID = Field(primary_key=True)  # For redo mechanism
     id: int = Field(primary_key=False)  # For human use
+    # Revision pointed to, undo and redo move it
+    revision_no: int = Field(default=1, nullable=False)
+    # created_at of the revision pointed to. Finds its partition.
+    revision_created_at: datetime = Field(
+        default=None, nullable=False, sa_column_kwargs={'server_default': func.now()},
+    )
     created_by: int = Field(nullable=True, default=None, foreign_key='user.id')
     updated_by: int = Field(nullable=True, default=None, foreign_key='user.id')
-    created_at: datetime = Field(default=datetime.now())
-    updated_at: datetime = Field(default=datetime.now())
+    created_at: datetime = Field(
+        default=None, nullable=False, sa_column_kwargs={'server_default': func.now()},
+    )
+    updated_at: datetime = Field(
+        default=None, nullable=False, sa_column_kwargs={'server_default': func.now()},
+    )
+
+
+class TaskCurrentView(SQLModel, table=True):  # type: ignore[call-arg]
+    """Read model of the current tasks.
+
+    The current revision with both usernames, read without joins.
+
+    Every write of the repository rewrites the rows of its tasks in the same transaction.
+    A rename of a user through the ORM rewrites its usernames, see `core.methods.crud`.
+    """
+
+    __tablename__ = 'task_current_view'
+    __table_args__ = (
+        # List filters.
+        Index('ix_task_current_view_due_date_status', 'due_date', 'status'),
+        Index('ix_task_current_view_created_by', 'created_by'),
+        Index('ix_task_current_view_updated_by', 'updated_by'),
+    )
+
+    id: int = Field(primary_key=True)
+    identifier: uuid.UUID = Field(nullable=False)  # Of the current revision
+    revision_no: int = Field(nullable=False)
+    title: str = Field(nullable=True)
+    description: str = Field(nullable=True)
+    due_date: date = Field(default=None, nullable=True)
+    status: StatusEnum = Field(default=StatusEnum.PENDING)
+    # created_by of the current revision
+    revision_created_by: int = Field(nullable=True, default=None)
+    created_by: int = Field(nullable=True, default=None)  # Of the task, like CurrentTaskContent
+    created_by_username: str = Field(nullable=True, default=None)
+    updated_by: int = Field(nullable=True, default=None)
+    updated_by_username: str = Field(nullable=True, default=None)
 
 
 class User(SQLModel, table=True):  # type: ignore[call-arg]
     """User model of this application."""
 
     id: int = Field(primary_key=True)
-    username: str = Field(nullable=False)
+    username: str = Field(nullable=False, unique=True, index=True)
@@ -0,0 +1,5 @@
+"""Tests mutate the database. Run them against a disposable one."""
+import os
+
+# The test client runs every request on a new event loop.
+os.environ.setdefault('ASYNC_NULL_POOL', 'True')
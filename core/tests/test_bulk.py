@@ -0,0 +1,294 @@
+"""Test the bulk endpoints."""
+import typing as typ
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import engine
+from core.common.update_stats import update_counter
+from core.common.user_cache import user_cache
+from core.methods.bulk_method.method import MAX_BULK_ITEMS
+from core.models.models import CurrentTaskContent, StatusEnum, TaskContent
+from core.tests.test_gadgets import (prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+from main import app
+
+client = TestClient(app)
+
+
+class TestBulkCreate(unittest.TestCase):
+    """Create many tasks in one request."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def test_bulk_create(self) -> None:
+        """Valid items are created, invalid items are reported."""
+        response = client.post(
+            '/tasks/bulk',
+            json=[
+                {'title': 'First', 'due_date': '2022-12-31', 'created_by': 1},
+                {'title': 'Bad date', 'due_date': '2022-99-31', 'created_by': 1},
+                {'title': 'No user', 'created_by': 999},
+                {'title': 'Second', 'status': 'in_progress', 'created_by': 2},
+                'not an object',
+            ],
+        )
+        assert response.status_code == status.HTTP_200_OK
+        payload = response.json()
+        assert payload['succeeded'] == 2
+        assert payload['failed'] == 3
+        results = payload['results']
+        assert [result['index'] for result in results] == [0, 1, 2, 3, 4]
+        assert results[1]['errors'][0]['loc'] == ['due_date']
+        assert results[2]['errors'][0]['msg'] == 'Value error, User with this id does not exist'
+        assert results[4]['errors'][0]['type'] == 'model_type'
+        assert all(results[i]['id'] is None for i in (1, 2, 4))
+
+        with Session(engine) as session:
+            first = session.exec(select(TaskContent).where(TaskContent.id == results[0]['id'])).one()
+            second = session.exec(select(TaskContent).where(TaskContent.id == results[3]['id'])).one()
+            current = session.exec(
+                select(CurrentTaskContent).where(CurrentTaskContent.id == results[3]['id'])
+            ).one()
+            assert first.title == 'First'
+            assert second.status == StatusEnum.IN_PROGRESS
+            assert current.identifier == second.identifier
+            assert current.updated_by == 2
+
+        response = client.get(f"/{results[0]['id']}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['title'] == 'First'
+
+    def test_bulk_create_query_count_is_constant(self) -> None:
+        """Query count does not grow with the items."""
+        counts = []
+        for size in (10, 100):
+            user_cache.clear()
+            response = client.post(
+                '/tasks/bulk',
+                json=[{'title': f"Task {i}", 'created_by': 1 + i % 2} for i in range(size)],
+            )
+            assert response.json()['succeeded'] == size
+            counts.append(response.headers['X-Query-Count'])
+        assert counts[0] == counts[1]
+        with Session(engine) as session:
+            ids = session.exec(select(CurrentTaskContent.id)).all()
+            assert len(set(ids)) == 110
+
+    def test_bulk_create_empty(self) -> None:
+        """Nothing to create."""
+        response = client.post('/tasks/bulk', json=[])
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {'succeeded': 0, 'failed': 0, 'results': []}
+
+    def test_bulk_create_too_many(self) -> None:
+        """Too many items are rejected as a whole."""
+        response = client.post('/tasks/bulk', json=[{}] * (MAX_BULK_ITEMS + 1))
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+class TestBulkUpdate(unittest.TestCase):
+    """Update many tasks in one request."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def create_tasks(self, size: int) -> typ.List[int]:
+        """Create the tasks to update."""
+        response = client.post(
+            '/tasks/bulk',
+            json=[{'title': f"Task {i}", 'due_date': '2022-12-31', 'created_by': 1} for i in range(size)],
+        )
+        return [result['id'] for result in response.json()['results']]
+
+    def test_bulk_update(self) -> None:
+        """Valid items are updated, the others are reported."""
+        first_id, second_id, deleted_id = self.create_tasks(3)
+        assert client.delete(f"/{deleted_id}").status_code == status.HTTP_204_NO_CONTENT
+        response = client.put(
+            '/tasks/bulk',
+            json=[
+                {'id': first_id, 'title': 'First updated', 'status': 'completed', 'created_by': 2},
+                {'id': second_id, 'title': 'Second updated', 'due_date': '2099-12-31', 'created_by': 1},
+                {'id': deleted_id, 'title': 'Deleted', 'created_by': 1},
+                {'id': first_id, 'title': 'Twice', 'created_by': 1},
+                {'id': 999, 'title': 'Unknown', 'created_by': 1},
+            ],
+        )
+        assert response.status_code == status.HTTP_200_OK
+        payload = response.json()
+        assert (payload['succeeded'], payload['failed']) == (2, 3)
+        results = payload['results']
+        assert results[2]['errors'][0]['msg'] == f"Task not found: {deleted_id}"
+        assert results[3]['errors'][0]['msg'] == 'Task is updated twice in the request.'
+        assert results[4]['errors'][0]['loc'] == ['id']
+
+        first = client.get(f"/{first_id}").json()
+        assert (first['title'], first['status'], first['created_by']) == ('First updated', 'completed', 2)
+        assert client.get(f"/{second_id}").json()['due_date'] == '2099-12-31'
+        with Session(engine) as session:
+            current = session.exec(select(CurrentTaskContent).where(CurrentTaskContent.id == first_id)).one()
+            assert current.updated_by == 2
+            assert len(session.exec(select(TaskContent).where(TaskContent.id == first_id)).all()) == 2
+
+    def test_undo_bulk_update(self) -> None:
+        """Undo restores the revision before the bulk update."""
+        task_id, = self.create_tasks(1)
+        before = client.get(f"/{task_id}").json()
+        client.put('/tasks/bulk', json=[{'id': task_id, 'title': 'Updated', 'created_by': 2}])
+        assert client.post(f"/undo/{task_id}").status_code == status.HTTP_200_OK
+        assert client.get(f"/{task_id}").json() == before
+
+    def test_bulk_update_with_same_content(self) -> None:
+        """Items with the content of the current revision write nothing and succeed."""
+        same_id, changed_id = self.create_tasks(2)
+        update_counter.reset()
+        response = client.put(
+            '/tasks/bulk',
+            json=[
+                {'id': same_id, 'title': 'Task 0', 'due_date': '2022-12-31', 'created_by': 1},
+                {'id': changed_id, 'title': 'Changed', 'due_date': '2022-12-31', 'created_by': 1},
+            ],
+        )
+        assert response.json()['succeeded'] == 2
+        assert client.get('/diagnostics/updates').json() == {'written': 1, 'skipped': 1}
+        with Session(engine) as session:
+            assert len(session.exec(select(TaskContent).where(TaskContent.id == same_id)).all()) == 1
+            assert len(session.exec(select(TaskContent).where(TaskContent.id == changed_id)).all()) == 2
+
+    def test_bulk_update_query_count_is_constant(self) -> None:
+        """Query count does not grow with the items."""
+        counts = []
+        for size in (10, 100):
+            task_ids = self.create_tasks(size)
+            user_cache.clear()
+            response = client.put(
+                '/tasks/bulk',
+                json=[{'id': task_id, 'title': 'Updated', 'created_by': 2} for task_id in task_ids],
+            )
+            assert response.json()['succeeded'] == size
+            counts.append(response.headers['X-Query-Count'])
+        assert counts[0] == counts[1]
+
+
+class TestBulkDeleteAndUndo(unittest.TestCase):
+    """Delete and undo many tasks in one request."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def create_tasks(self, size: int) -> typ.List[int]:
+        """Create the tasks."""
+        response = client.post(
+            '/tasks/bulk',
+            json=[{'title': f"Task {i}", 'due_date': '2022-12-31', 'created_by': 1} for i in range(size)],
+        )
+        return [result['id'] for result in response.json()['results']]
+
+    def bulk_delete(self, task_ids: typ.List[typ.Any]):
+        """DELETE with a body."""
+        return client.request('DELETE', '/tasks/bulk', json=task_ids)
+
+    def test_bulk_delete(self) -> None:
+        """Tasks are deleted, the others are reported."""
+        first_id, second_id, deleted_id = self.create_tasks(3)
+        client.delete(f"/{deleted_id}")
+        response = self.bulk_delete([first_id, second_id, deleted_id, first_id, 999])
+        assert response.status_code == status.HTTP_200_OK
+        payload = response.json()
+        assert (payload['succeeded'], payload['failed']) == (2, 3)
+        messages = [result['errors'][0]['msg'] for result in payload['results'][2:]]
+        assert messages == [f"Task not found: {deleted_id}", 'Task is deleted twice in the request.', 'Task not found']
+
+        assert client.get(f"/{first_id}").status_code == status.HTTP_404_NOT_FOUND
+        with Session(engine) as session:
+            assert session.exec(select(CurrentTaskContent)).all() == []
+            assert all(task.is_deleted for task in session.exec(select(TaskContent)).all())
+
+    def test_concurrent_bulk_writes_do_not_deadlock(self) -> None:
+        """Bulk deletes, updates and undos of the same tasks in any order run one after another."""
+        task_ids = self.create_tasks(20)
+
+        def _call(index: int) -> int:
+            ids = task_ids if index % 2 else task_ids[::-1]
+            if index % 3 == 0:
+                return self.bulk_delete(ids).status_code
+            if index % 3 == 1:
+                payload = [{'id': task_id, 'title': f"Title {index}", 'created_by': 1} for task_id in ids]
+                return client.put('/tasks/bulk', json=payload).status_code
+            return client.post('/undo/bulk', json=ids).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert set(executor.map(_call, range(24))) == {status.HTTP_200_OK}
+
+    def test_bulk_undo(self) -> None:
+        """Undo of DELETE and PUT like the single undo."""
+        deleted_id, updated_id, created_id = self.create_tasks(3)
+        deleted_before = client.get(f"/{deleted_id}").json()
+        updated_before = client.get(f"/{updated_id}").json()
+        self.bulk_delete([deleted_id])
+        client.put('/', json={'id': updated_id, 'title': 'Updated', 'created_by': 2})
+
+        response = client.post('/undo/bulk', json=[deleted_id, updated_id, created_id, 999])
+        assert response.status_code == status.HTTP_200_OK
+        payload = response.json()
+        assert (payload['succeeded'], payload['failed']) == (2, 2)
+        assert payload['results'][2]['errors'][0] == {
+            'loc': ['id'], 'msg': 'Task is created and immediately run undo.', 'type': 'UndoError',
+        }
+        assert payload['results'][3]['errors'][0]['msg'] == 'Task not found'
+
+        assert client.get(f"/{deleted_id}").json() == deleted_before
+        assert client.get(f"/{updated_id}").json() == updated_before
+        assert client.get(f"/{created_id}").status_code == status.HTTP_200_OK
+        with Session(engine) as session:
+            # Undo keeps the revision for redo.
+            current = session.exec(select(CurrentTaskContent).where(CurrentTaskContent.id == updated_id)).one()
+            assert current.revision_no == 1
+            assert len(session.exec(select(TaskContent).where(TaskContent.id == updated_id)).all()) == 2
+            assert not session.exec(select(TaskContent).where(TaskContent.id == deleted_id)).one().is_deleted
+
+    def test_bulk_undo_matches_single_undo(self) -> None:
+        """Undo twice walks back the revisions one by one."""
+        task_id, = self.create_tasks(1)
+        client.put('/', json={'id': task_id, 'title': 'First', 'created_by': 2})
+        client.put('/', json={'id': task_id, 'title': 'Second', 'created_by': 2})
+        client.post('/undo/bulk', json=[task_id])
+        assert client.get(f"/{task_id}").json()['title'] == 'First'
+        client.post('/undo/bulk', json=[task_id])
+        assert client.get(f"/{task_id}").json()['title'] == 'Task 0'
+        response = client.post('/undo/bulk', json=[task_id])
+        assert response.json()['failed'] == 1
+
+    def test_bulk_query_count_is_constant(self) -> None:
+        """Query count does not grow with the ids."""
+        counts = []
+        for size in (10, 100):
+            task_ids = self.create_tasks(size)
+            delete_response = self.bulk_delete(task_ids)
+            undo_response = client.post('/undo/bulk', json=task_ids)
+            assert delete_response.json()['succeeded'] == undo_response.json()['succeeded'] == size
+            counts.append((delete_response.headers['X-Query-Count'], undo_response.headers['X-Query-Count']))
+        assert counts[0] == counts[1]
@@ -0,0 +1,107 @@
+"""Test the retention policy of the revisions."""
+import unittest
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app import engine
+from core.jobs.compact_history import RetentionPolicy, compact_history
+from core.models.models import TaskContent, TaskContentArchive
+from core.tests.test_gadgets import (manual_create_task,
+                                     prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+from main import app
+
+client = TestClient(app)
+
+
+class TestCompaction(unittest.TestCase):
+    """Move old revisions to the archive."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def make_task(self, updates: int) -> int:
+        """Create a task with `updates` more revisions."""
+        task_id = manual_create_task()
+        for number in range(updates):
+            client.put('/', json={'id': task_id, 'title': f"Update {number}", 'created_by': 2})
+        return task_id
+
+    def revision_nos(self, task_id: int) -> tuple:
+        """Revision numbers kept, and archived."""
+        with Session(engine) as session:
+            kept = session.query(TaskContent.revision_no).filter(TaskContent.id == task_id).order_by(TaskContent.revision_no)
+            archived = (
+                session.query(TaskContentArchive.revision_no)
+                .filter(TaskContentArchive.id == task_id)
+                .order_by(TaskContentArchive.revision_no)
+            )
+            return [row[0] for row in kept], [row[0] for row in archived]
+
+    def test_keep_revisions(self) -> None:
+        """The last revisions up to the current one are kept, in chunks of tasks."""
+        first_id = self.make_task(4)
+        second_id = self.make_task(1)
+        report = compact_history(engine, RetentionPolicy(keep_revisions=2), chunk_size=1)
+        assert (report.tasks, report.archived, report.chunks) == (2, 3, 2)
+        assert self.revision_nos(first_id) == ([4, 5], [1, 2, 3])
+        assert self.revision_nos(second_id) == ([1, 2], [])
+        assert client.get(f"/{first_id}").json()['title'] == 'Update 3'
+
+    def test_undo_stops_at_the_archive(self) -> None:
+        """Undo walks back to the oldest revision kept."""
+        task_id = self.make_task(3)
+        compact_history(engine, RetentionPolicy(keep_revisions=2))
+        assert client.post(f"/undo/{task_id}").status_code == status.HTTP_200_OK
+        response = client.post(f"/undo/{task_id}")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {'detail': 'The previous revisions are archived.'}
+        assert client.get(f"/{task_id}").json()['title'] == 'Update 1'
+
+    def test_redo_and_deleted_revisions_are_kept(self) -> None:
+        """Revisions after the current one, and the deleted one, stay for redo and undo."""
+        redo_id = self.make_task(3)
+        client.post(f"/undo/{redo_id}")
+        deleted_id = self.make_task(2)
+        client.delete(f"/{deleted_id}")
+
+        compact_history(engine, RetentionPolicy(keep_revisions=1))
+        assert self.revision_nos(redo_id) == ([3, 4], [1, 2])
+        assert self.revision_nos(deleted_id) == ([3], [1, 2])
+        assert client.post(f"/redo/{redo_id}").status_code == status.HTTP_200_OK
+        assert client.post(f"/undo/{deleted_id}").status_code == status.HTTP_200_OK
+        assert client.get(f"/{deleted_id}").json()['title'] == 'Update 1'
+
+    def test_keep_days(self) -> None:
+        """Revisions older than the days are archived. A revision kept by either rule is kept."""
+        task_id = self.make_task(3)
+        with Session(engine) as session:
+            session.execute(
+                text("UPDATE taskcontent SET created_at = created_at - interval '10 days' WHERE id = :id AND revision_no <= 2"),
+                {'id': task_id},
+            )
+            session.commit()
+        compact_history(engine, RetentionPolicy(keep_days=5))
+        assert self.revision_nos(task_id) == ([3, 4], [1, 2])
+        compact_history(engine, RetentionPolicy(keep_days=0, keep_revisions=2))
+        assert self.revision_nos(task_id) == ([3, 4], [1, 2])
+
+    def test_policy_is_required(self) -> None:
+        """Nothing to compact without a rule."""
+        with self.assertRaises(ValueError):
+            compact_history(engine, RetentionPolicy())
+        with self.assertRaises(ValueError):
+            compact_history(engine, RetentionPolicy(keep_revisions=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,12 @@
 
 from fastapi import status
 from fastapi.testclient import TestClient
-from sqlalchemy import desc
+from sqlalchemy import desc, text
 from sqlmodel import Session
 
 from app import engine
-from core.models.models import CurrentTaskContent, TaskContent, User
+from core.models.models import (CurrentTaskContent, TaskContent,
+                                TaskContentArchive, TaskCurrentView, User)
 from main import app
 
 client = TestClient(app)
@@ -33,8 +34,12 @@ def remove_all_tasks_and_users() -> None:
 
     with Session(engine) as session:
         session.query(TaskContent).delete()
+        session.query(TaskContentArchive).delete()
         session.query(CurrentTaskContent).delete()
+        session.query(TaskCurrentView).delete()
         session.query(User).delete()
+        # Tests expect the task ids to start from 1.
+        session.execute(text('ALTER SEQUENCE task_id_seq RESTART WITH 1'))
         session.commit()
 
 
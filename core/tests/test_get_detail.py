@@ -2,11 +2,14 @@
 import sys
 import typing as typ
 import unittest
+from unittest import mock
 
 import httpx
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from core.common.revision_cache import revision_cache
+from core.common.validate_input import CheckTaskId, GenericTaskInput
 from core.tests.test_gadgets import (manual_create_task,
                                      prepare_users_for_test,
                                      remove_all_tasks_and_users)
@@ -70,6 +73,19 @@ class TestGetDetail(unittest.TestCase):
             'id': 1,
         }
 
+    def test_detail_runs_no_validators(self) -> None:
+        """GET detail reads the current task and its read model row. No validator queries the database."""
+        task_id = manual_create_task()
+        revision_cache.clear()
+        with mock.patch.object(CheckTaskId, 'task_id_exists_in_db') as task_id_exists, \
+                mock.patch.object(GenericTaskInput, 'user_exists_in_db') as user_exists:
+            response = client.get(f"/{task_id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['id'] == task_id
+        assert int(response.headers['X-Query-Count']) <= 2
+        task_id_exists.assert_not_called()
+        user_exists.assert_not_called()
+
     def test_use_wrong_id(self) -> None:
         """Test wrong id."""
         task_id = manual_create_task()
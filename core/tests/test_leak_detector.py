@@ -0,0 +1,63 @@
+"""Test the connection leak detector."""
+import unittest
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlmodel import Session
+
+from app import engine, leak_detector
+from main import app
+
+client = TestClient(app)
+
+
+class TestLeakDetector(unittest.TestCase):
+    """Report connections held longer than the threshold."""
+
+    def setUp(self) -> None:
+        """Record every checkout."""
+        self.threshold_ms = leak_detector.threshold_ms
+        leak_detector.enabled = True
+        leak_detector.threshold_ms = 0
+        leak_detector.reset()
+
+    def tearDown(self):
+        """Restore the detector."""
+        leak_detector.enabled = False
+        leak_detector.threshold_ms = self.threshold_ms
+        leak_detector.reset()
+
+    def _has_this_test(self, checkouts: list) -> bool:
+        return any(self._testMethodName in ''.join(checkout.stack) for checkout in checkouts)
+
+    def test_unclosed_session(self) -> None:
+        """Session without context manager holds the connection until it is closed."""
+        session = Session(engine)
+        session.scalar(select(1))
+        held_before_close = leak_detector.diagnostics().held
+        session.close()
+        diagnostics = leak_detector.diagnostics()
+
+        assert self._has_this_test(held_before_close)
+        assert not self._has_this_test(diagnostics.held)
+        assert self._has_this_test(diagnostics.slow)
+
+    def test_diagnostics_endpoint(self) -> None:
+        """Expose the report."""
+        response = client.get('/diagnostics/connections')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['enabled'] is True
+        assert response.json()['threshold_ms'] == 0
+        assert isinstance(response.json()['held'], list)
+        assert isinstance(response.json()['slow'], list)
+
+    def test_diagnostics_endpoint_hidden_when_disabled(self) -> None:
+        """The stacks are not exposed unless the detector is on."""
+        leak_detector.enabled = False
+        response = client.get('/diagnostics/connections')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+if __name__ == '__main__':
+    unittest.main()
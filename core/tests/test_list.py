@@ -6,9 +6,10 @@ import httpx
 from faker import Faker
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlmodel import Session
 
-from app import engine
+from app import async_engine, engine
 from core.tests.test_gadgets import (manual_create_task,
                                      prepare_users_for_test,
                                      remove_all_tasks_and_users)
@@ -501,6 +502,88 @@ class TestList(unittest.TestCase):  # pylint: disable=too-many-public-methods
             'pages': 1
         }
 
+    def test_pagination_reads_only_the_page(self) -> None:
+        """The database counts the tasks and returns the rows of the page only."""
+        self._make_35_tasks()
+        statements: typ.List[str] = []
+
+        def _record(_conn: typ.Any, _cursor: typ.Any, statement: str, *_: typ.Any) -> None:
+            statements.append(statement)
+
+        event.listen(async_engine.sync_engine, 'before_cursor_execute', _record)
+        try:
+            response = client.get('/?page=2&size=10&task_status=pending')
+        finally:
+            event.remove(async_engine.sync_engine, 'before_cursor_execute', _record)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()['items']) == min(10, max(0, response.json()['total'] - 10))
+        assert any('count(*)' in statement for statement in statements), statements
+        assert any('LIMIT' in statement and 'OFFSET' in statement for statement in statements), statements
+
+    def test_list_query_count_is_constant(self) -> None:
+        """Number of queries does not grow with the number of listed tasks."""
+        manual_create_task()
+        one_task_response = client.get('/')
+        self._make_35_tasks()
+        many_tasks_response = client.get('/')
+
+        assert len(one_task_response.json()['items']) == 1
+        assert len(many_tasks_response.json()['items']) == 36
+        assert one_task_response.headers['X-Query-Count'] == many_tasks_response.headers['X-Query-Count']
+
+    def test_list_task_without_optional_fields(self) -> None:
+        """Missing fields are listed as null."""
+        client.post('/create-task/', json={'title': 'Only title', 'created_by': 1})
+        response = client.get('/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['items'] == [{
+            'id': 1,
+            'title': 'Only title',
+            'description': None,
+            'due_date': None,
+            'status': 'StatusEnum.PENDING',
+            'created_by': 1,
+            'updated_by': 1,
+            'created_by_username': 'sarit',
+            'updated_by_username': 'sarit',
+        }]
+
+    def test_cursor_pagination(self) -> None:
+        """Walk all the pages with keyset pagination."""
+        self._make_35_tasks()
+        first_page = client.get('/tasks/cursor?limit=15')
+        second_page = client.get(f"/tasks/cursor?limit=15&after_id={first_page.json()['next_cursor']}")
+        last_page = client.get(f"/tasks/cursor?limit=15&after_id={second_page.json()['next_cursor']}")
+
+        assert first_page.status_code == status.HTTP_200_OK
+        assert second_page.status_code == status.HTTP_200_OK
+        assert last_page.status_code == status.HTTP_200_OK
+        assert list(range(1, 16)) == [task['id'] for task in first_page.json()['items']]
+        assert list(range(16, 31)) == [task['id'] for task in second_page.json()['items']]
+        assert list(range(31, 36)) == [task['id'] for task in last_page.json()['items']]
+        assert last_page.json()['next_cursor'] is None
+
+    def test_cursor_pagination_with_filter(self) -> None:
+        """Keyset pagination respects the filters."""
+        self.before_test()
+        response = client.get('/tasks/cursor?limit=2&created_by_username=test_user')
+        next_response = client.get(
+            f"/tasks/cursor?limit=2&created_by_username=test_user&after_id={response.json()['next_cursor']}"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert [1, 2] == [task['id'] for task in response.json()['items']]
+        assert [3, 4] == [task['id'] for task in next_response.json()['items']]
+        assert next_response.json()['next_cursor'] is None
+
+    def test_cursor_pagination_invalid_cursor(self) -> None:
+        """Tampered cursor is rejected."""
+        response = client.get('/tasks/cursor?after_id=not-a-cursor')
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+        assert response.json() == {'detail': [{'loc': ['after_id'],
+                                               'msg': 'Invalid cursor.',
+                                               'type': 'ValueError'}]}
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,124 @@
+"""Test the cache of the list pages."""
+import unittest
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from core.common.list_cache import ListCache, list_cache
+from core.tests.test_gadgets import (manual_create_task,
+                                     prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+from main import app
+
+client = TestClient(app)
+
+
+class FakeClock:
+    """Clock the test moves by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestListCache(unittest.TestCase):
+    """LRU, TTL, generations and counters of the cache."""
+
+    def setUp(self) -> None:
+        """Small cache with a fake clock."""
+        self.clock = FakeClock()
+        self.cache = ListCache(max_size=2, ttl_seconds={'page': 10, 'cursor': 0}, clock=self.clock)
+
+    def test_expire_after_ttl(self) -> None:
+        """An expired page is a miss and is removed."""
+        key = self.cache.key('page', 'a')
+        self.cache.put(key, b'a')
+        assert self.cache.get(key) == b'a'
+        self.clock.now = 10
+        assert self.cache.get(key) is None
+        stats = self.cache.stats()
+        assert (stats.hits, stats.misses, stats.hit_rate, stats.size) == (1, 1, 0.5, 0)
+
+    def test_evict_least_recently_used(self) -> None:
+        """The cache keeps `max_size` pages."""
+        first, second, third = (self.cache.key('page', name) for name in 'abc')
+        self.cache.put(first, b'a')
+        self.cache.put(second, b'b')
+        self.cache.get(first)
+        self.cache.put(third, b'c')
+        assert self.cache.get(second) is None
+        assert self.cache.get(first) == b'a'
+        assert self.cache.get(third) == b'c'
+
+    def test_bump_forgets_pages(self) -> None:
+        """A page read before a write is neither served nor cached after it."""
+        key = self.cache.key('page', 'a')
+        self.cache.put(key, b'a')
+        late_key = self.cache.key('page', 'b')
+        self.cache.bump()
+        self.cache.put(late_key, b'b')
+        assert self.cache.get(key) is None
+        assert self.cache.get(late_key) is None
+        assert self.cache.stats().generation == 1
+
+    def test_zero_ttl_disables(self) -> None:
+        """An endpoint with no time to live is not cached."""
+        key = self.cache.key('cursor', 'a')
+        self.cache.put(key, b'a')
+        assert self.cache.get(key) is None
+
+
+class TestCachedList(unittest.TestCase):
+    """The list endpoints serve the cached page until a write."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def test_second_poll_skips_the_database(self) -> None:
+        """The same filters in another order are a hit and run no query."""
+        manual_create_task(_status='in_progress')
+        first = client.get('/?task_status=in_progress&created_by_username=test_user')
+        hits = list_cache.stats().hits
+        second = client.get('/?created_by_username=test_user&task_status=in_progress')
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.json() == second.json()
+        assert len(second.json()['items']) == 1
+        assert second.headers['X-Query-Count'] == '0'
+        assert list_cache.stats().hits == hits + 1
+
+    def test_pages_are_separate(self) -> None:
+        """Another page or cursor is another entry."""
+        for __ in range(3):
+            manual_create_task()
+        assert [task['id'] for task in client.get('/?size=2').json()['items']] == [1, 2]
+        assert [task['id'] for task in client.get('/?size=2&page=2').json()['items']] == [3]
+        first_page = client.get('/tasks/cursor?limit=2').json()
+        second_page = client.get(f"/tasks/cursor?limit=2&after_id={first_page['next_cursor']}").json()
+        assert [task['id'] for task in second_page['items']] == [3]
+
+    def test_writes_invalidate(self) -> None:
+        """Create, update, delete and undo are listed on the next poll."""
+        task_id = manual_create_task()
+        assert len(client.get('/').json()['items']) == 1
+        assert len(client.get('/tasks/cursor').json()['items']) == 1
+        client.put('/', json={'id': task_id, 'title': 'Updated', 'created_by': 1})
+        assert client.get('/').json()['items'][0]['title'] == 'Updated'
+        assert client.get('/tasks/cursor').json()['items'][0]['title'] == 'Updated'
+        manual_create_task()
+        assert len(client.get('/').json()['items']) == 2
+        client.delete(f"/{task_id}")
+        assert len(client.get('/').json()['items']) == 1
+        client.post(f"/undo/{task_id}")
+        assert len(client.get('/').json()['items']) == 2
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Test the monthly partitions of the revisions."""
+import unittest
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app import engine
+from core.jobs.partitions import ensure_partitions
+from core.models.models import TaskContent
+from core.tests.test_gadgets import (manual_create_task,
+                                     prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+
+
+class TestPartitions(unittest.TestCase):
+    """Create the partitions ahead."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks, users and the partitions of the test."""
+        remove_all_tasks_and_users()
+        with engine.begin() as connection:
+            connection.execute(text('DROP TABLE IF EXISTS taskcontent_p2040_12, taskcontent_p2041_01'))
+
+    def partition_of(self, created_at: datetime) -> str:
+        """Partition holding a revision created at the time."""
+        task_id = manual_create_task()
+        with Session(engine) as session:
+            session.execute(
+                text('UPDATE taskcontent SET created_at = :created_at WHERE id = :id'),
+                {'created_at': created_at, 'id': task_id},
+            )
+            session.commit()
+            return session.scalar(
+                text('SELECT tableoid::regclass::text FROM taskcontent WHERE id = :id'), {'id': task_id},
+            )
+
+    def test_ensure_partitions(self) -> None:
+        """The month and the months ahead get a partition. Running it again changes nothing."""
+        names = ensure_partitions(engine, months_ahead=1, today=date(2040, 12, 15))
+        assert names == ['taskcontent_p2040_12', 'taskcontent_p2041_01']
+        assert ensure_partitions(engine, months_ahead=1, today=date(2040, 12, 15)) == names
+        assert self.partition_of(datetime(2041, 1, 31, 23, 59)) == 'taskcontent_p2041_01'
+
+    def test_default_partition(self) -> None:
+        """A revision of a month without a partition is kept."""
+        assert self.partition_of(datetime(2099, 1, 1)) == 'taskcontent_default'
+        with Session(engine) as session:
+            assert session.query(TaskContent).count() == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
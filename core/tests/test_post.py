@@ -5,6 +5,7 @@ I made this script because I am lazy to manually test the POST request to create
 NOT INTENTIONALLY TO RUN IN THE CI/CD PIPELINE.
 """
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 
 from fastapi import status
@@ -69,6 +70,23 @@ class TestPost(unittest.TestCase):
         assert response.status_code == status.HTTP_201_CREATED
         assert response.json() == {'message': 'Instance created successfully!'}
 
+    def test_concurrent_create_tasks_get_unique_ids(self) -> None:
+        """Concurrent creates never share the same id."""
+        def _create(index: int) -> int:
+            response = client.post(
+                '/create-task/',
+                json={'title': f"Concurrent task {index}", 'created_by': 1},
+            )
+            return response.status_code
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            status_codes = list(executor.map(_create, range(30)))
+
+        with Session(engine) as session:
+            ids = session.exec(select(CurrentTaskContent.id)).all()
+        assert status_codes == [status.HTTP_201_CREATED] * 30
+        assert sorted(ids) == list(range(1, 31))
+
     def test_post_create_task_no_created_by(self) -> None:
         """Test happy path for creating a task without created_by."""
         response = client.post(
@@ -15,6 +15,8 @@ from sqlalchemy import asc, desc
 from sqlmodel import Session
 
 from app import engine
+from core.common.update_stats import (UpdateStats, record_updates,
+                                      update_counter)
 from core.models.models import CurrentTaskContent, StatusEnum, TaskContent
 from core.tests.test_gadgets import (manual_create_task,
                                      prepare_users_for_test,
@@ -190,6 +192,75 @@ class TestPut(unittest.TestCase):
             ]
         }
 
+    def test_update_deleted_task(self) -> None:
+        """Update of a deleted task is not found and writes no revision."""
+        task_id = manual_create_task()
+        client.delete(f"/{task_id}")
+        response = client.put('/', json={'id': task_id, 'title': 'New updated title', 'created_by': 2})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json() == {'detail': f"Task not found: {task_id}"}
+        with Session(engine) as session:
+            assert session.query(TaskContent).filter(TaskContent.id == task_id).count() == 1
+
+    def test_update_in_one_statement(self) -> None:
+        """Revision and current task are written by one statement."""
+        task_id = manual_create_task()
+        # The request checks the id, the user is cached by the create.
+        response = client.put('/', json={'id': task_id, 'title': 'New updated title', 'created_by': 10})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers['X-Query-Count'] == '2'
+
+    def test_created_at_is_the_time_of_the_request(self) -> None:
+        """Each task gets the time it is created."""
+        first_id = manual_create_task()
+        second_id = manual_create_task()
+        with Session(engine) as session:
+            first, second = (
+                session.query(TaskContent).filter(TaskContent.id == task_id).one()
+                for task_id in (first_id, second_id)
+            )
+            current = session.query(CurrentTaskContent).filter(CurrentTaskContent.id == second_id).one()
+        assert first.created_at < second.created_at
+        assert current.created_at == current.updated_at == second.created_at
+
+    def test_update_with_same_content(self) -> None:
+        """An update with the content of the current revision writes nothing."""
+        task_id = manual_create_task()
+        same = {
+            'id': task_id,
+            'title': 'Test Task with created_by',
+            'description': 'This is a test task',
+            'status': 'pending',
+            'due_date': '2022-12-31',
+            'created_by': 10,
+        }
+        update_counter.reset()
+        response = client.put('/', json=same)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {'message': 'Instance updated successfully!'}
+        assert client.put('/', json={**same, 'status': 'completed'}).status_code == status.HTTP_200_OK
+        # Back to the content of the first revision. It is not the current one.
+        assert client.put('/', json=same).status_code == status.HTTP_200_OK
+
+        assert client.get('/diagnostics/updates').json() == {'written': 2, 'skipped': 1}
+        with Session(engine) as session:
+            revisions = session.query(TaskContent).filter(TaskContent.id == task_id).order_by(TaskContent.revision_no).all()
+        assert [revision.status for revision in revisions] == [StatusEnum.PENDING, StatusEnum.COMPLETED, StatusEnum.PENDING]
+        assert revisions[0].content_hash == revisions[2].content_hash != revisions[1].content_hash
+
+    def test_rolled_back_updates_are_not_counted(self) -> None:
+        """The updates are counted once their transaction commits."""
+        update_counter.reset()
+        with Session(engine) as session:
+            session.begin()
+            record_updates(session, written=1, skipped=1)
+            assert update_counter.stats() == UpdateStats(written=0, skipped=0)
+            session.rollback()
+            session.begin()
+            record_updates(session, written=2)
+            session.commit()
+        assert update_counter.stats() == UpdateStats(written=2, skipped=0)
+
 
 if __name__ == '__main__':
     unittest.main()
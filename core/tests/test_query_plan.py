@@ -0,0 +1,117 @@
+"""Test the hot path queries use the indexes instead of a sequential scan."""
+import re
+import unittest
+from datetime import date
+
+from sqlalchemy import exists, select, text
+from sqlalchemy.sql import Select
+from sqlmodel import Session
+
+from app import engine
+from core.methods.crud import _current_hashes_statement
+from core.models.models import (CurrentTaskContent, StatusEnum, TaskContent,
+                                TaskCurrentView, User)
+from core.tests.test_gadgets import (manual_create_task,
+                                     prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+
+
+class TestQueryPlan(unittest.TestCase):
+    """EXPLAIN the repository queries."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+        self.task_id = manual_create_task()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def explain(self, statement: Select) -> str:
+        """Return the plan of the statement. Sequential scan is the last resort of the planner."""
+        compiled = statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})
+        with Session(engine) as session:
+            session.execute(text('SET LOCAL enable_seqscan = off'))
+            plan = session.execute(text(f"EXPLAIN {compiled}")).scalars().all()
+        return '\n'.join(plan)
+
+    def test_revision_by_number(self) -> None:
+        """Used by undo and redo."""
+        plan = self.explain(
+            select(TaskContent)
+            .where(TaskContent.id == self.task_id, TaskContent.revision_no == 1)
+        )
+        assert 'Seq Scan' not in plan, plan
+        # The index of every partition.
+        assert '_id_revision_no_idx' in plan, plan
+
+    def test_revision_of_current_task(self) -> None:
+        """Used by the task detail and delete. One partition is read."""
+        with Session(engine) as session:
+            current = session.query(CurrentTaskContent).filter(CurrentTaskContent.id == self.task_id).one()
+        plan = self.explain(
+            select(TaskContent).where(
+                TaskContent.identifier == current.identifier,
+                TaskContent.created_at == current.revision_created_at,
+            )
+        )
+        assert 'Seq Scan' not in plan, plan
+        assert len(set(re.findall(r'taskcontent_p\d{4}_\d{2}', plan))) == 1, plan
+        assert 'taskcontent_default' not in plan, plan
+
+    def test_current_hashes(self) -> None:
+        """Used by the bulk update. The revision is looked up by its partition key too."""
+        compiled = _current_hashes_statement([self.task_id]).compile(
+            dialect=engine.dialect, compile_kwargs={'literal_binds': True},
+        )
+        with Session(engine) as session:
+            plan = '\n'.join(session.execute(text(f"EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF) {compiled}")).scalars())
+        # The other partitions are pruned when the statement runs.
+        scanned = [line for line in plan.splitlines() if 'on taskcontent_' in line and 'never executed' not in line]
+        assert len(scanned) == 1, plan
+
+    def test_task_id_exists(self) -> None:
+        """Used by CheckTaskId."""
+        plan = self.explain(exists().where(TaskContent.id == self.task_id).select())
+        assert 'Seq Scan' not in plan, plan
+
+    def test_current_task_by_id(self) -> None:
+        """Used by valid_task."""
+        plan = self.explain(select(CurrentTaskContent).where(CurrentTaskContent.id == self.task_id))
+        assert 'Seq Scan' not in plan, plan
+        assert 'ix_currenttaskcontent_id' in plan, plan
+
+    def test_due_date_and_status_filter(self) -> None:
+        """Used by the list filters."""
+        plan = self.explain(
+            select(TaskContent).where(
+                TaskContent.due_date == date(2022, 12, 31),
+                TaskContent.status == StatusEnum.PENDING,
+            )
+        )
+        assert 'Seq Scan' not in plan, plan
+        assert '_due_date_status_idx' in plan, plan
+
+    def test_list_filters_on_read_model(self) -> None:
+        """Used by get_queryset. One table, no joins."""
+        plan = self.explain(
+            select(TaskCurrentView).where(
+                TaskCurrentView.due_date == date(2022, 12, 31),
+                TaskCurrentView.status == StatusEnum.PENDING,
+            )
+        )
+        assert 'Seq Scan' not in plan, plan
+        assert 'ix_task_current_view_due_date_status' in plan, plan
+        assert 'Join' not in plan and 'Nested Loop' not in plan, plan
+
+    def test_user_by_username(self) -> None:
+        """Used by validate_username."""
+        plan = self.explain(select(User).where(User.username == 'sarit'))
+        assert 'Seq Scan' not in plan, plan
+        assert 'ix_user_username' in plan, plan
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Test every request runs on a single connection and transaction."""
+import unittest
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import engine
+from core.models.models import TaskContent
+from core.tests.test_gadgets import (manual_create_task,
+                                     prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+from main import app
+
+client = TestClient(app)
+
+
+class TestRequestSession(unittest.TestCase):
+    """One session per request."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def test_create_uses_one_connection(self) -> None:
+        """Validators and repository share the connection."""
+        response = client.post(
+            '/create-task/',
+            json={'title': 'One connection', 'due_date': '2022-12-31', 'created_by': 1},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.headers['X-Connection-Count'] == '1'
+
+    def test_string_ids_use_one_connection(self) -> None:
+        """Ids sent as strings are prefetched like the validation coerces them."""
+        task_id = manual_create_task()
+        response = client.put(
+            '/',
+            json={'id': str(task_id), 'title': 'One connection', 'status': 'completed', 'created_by': '2'},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers['X-Connection-Count'] == '1'
+        response = client.post('/create-task/', json={'title': 'One connection', 'created_by': '1'})
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.headers['X-Connection-Count'] == '1'
+
+    def test_out_of_range_ids_use_no_connection(self) -> None:
+        """Ids no INTEGER column holds are refused without a connection."""
+        response = client.put(
+            '/',
+            json={'id': 0, 'title': 'One connection', 'status': 'completed', 'created_by': -1},
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.headers['X-Connection-Count'] == '0'
+        response = client.post('/create-task/', json={'title': 'One connection', 'created_by': 2 ** 31})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.headers['X-Connection-Count'] == '0'
+
+    def test_update_uses_one_connection(self) -> None:
+        """Validators and repository share the connection."""
+        task_id = manual_create_task()
+        response = client.put(
+            '/',
+            json={'id': task_id, 'title': 'One connection', 'status': 'completed', 'created_by': 2},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers['X-Connection-Count'] == '1'
+
+    def test_read_and_delete_use_one_connection(self) -> None:
+        """Dependencies and repository share the connection."""
+        task_id = manual_create_task()
+        detail_response = client.get(f"/{task_id}")
+        list_response = client.get('/?created_by_username=test_user&updated_by_username=test_user')
+        delete_response = client.delete(f"/{task_id}")
+        undo_response = client.post(f"/undo/{task_id}")
+
+        assert detail_response.status_code == status.HTTP_200_OK
+        assert detail_response.headers['X-Connection-Count'] == '1'
+        assert list_response.status_code == status.HTTP_200_OK
+        assert list_response.headers['X-Connection-Count'] == '1'
+        assert delete_response.status_code == status.HTTP_204_NO_CONTENT
+        assert delete_response.headers['X-Connection-Count'] == '1'
+        assert undo_response.status_code == status.HTTP_200_OK
+        assert undo_response.headers['X-Connection-Count'] == '1'
+
+    def test_failed_request_rolls_back(self) -> None:
+        """Undo right after create fails and leaves the task untouched."""
+        task_id = manual_create_task()
+        undo_response = client.post(f"/undo/{task_id}")
+
+        with Session(engine) as session:
+            history = session.query(TaskContent).filter(TaskContent.id == task_id).all()
+        assert undo_response.status_code == status.HTTP_400_BAD_REQUEST
+        assert len(history) == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
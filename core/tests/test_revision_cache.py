@@ -0,0 +1,261 @@
+"""Test the revision cache of the task detail."""
+import asyncio
+import fnmatch
+import typing as typ
+import unittest
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from core.common.revision_cache import (InMemoryRevisionBackend, RevisionCache,
+                                        SharedRevisionBackend, revision_cache)
+from core.models.models import CurrentTaskContent
+from core.tests.test_gadgets import (manual_create_task,
+                                     prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+from main import app
+
+client = TestClient(app)
+
+
+class FakeSharedClient:
+    """Stand-in of the Redis client. Ignores the expiry."""
+
+    def __init__(self) -> None:
+        self.values: typ.Dict[str, str] = {}
+
+    def get(self, name: str) -> str | None:
+        return self.values.get(name)
+
+    def set(self, name: str, value: str, px: int | None = None) -> None:  # pylint: disable=unused-argument
+        self.values[name] = value
+
+    def delete(self, *names: str) -> None:
+        for name in names:
+            self.values.pop(name, None)
+
+    def scan_iter(self, match: str) -> typ.Iterator[str]:
+        return iter([name for name in self.values if fnmatch.fnmatch(name, match)])
+
+
+def on_event_loop() -> bool:
+    """Whether the caller runs on an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class RecordingClient(FakeSharedClient):
+    """Record the calls, and whether they run on the event loop."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: typ.List[typ.Tuple[str, typ.Tuple[str, ...], bool]] = []
+
+    def get(self, name: str) -> str | None:
+        self.calls.append(('get', (name,), on_event_loop()))
+        return super().get(name)
+
+    def delete(self, *names: str) -> None:
+        self.calls.append(('delete', names, on_event_loop()))
+        super().delete(*names)
+
+
+class FakeClock:
+    """Clock the test moves by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBackends(unittest.TestCase):
+    """Storage of the cache."""
+
+    def test_in_memory_lru_and_ttl(self) -> None:
+        """Least recently used value is evicted, expired value is gone."""
+        clock = FakeClock()
+        backend = InMemoryRevisionBackend(max_size=2, clock=clock)
+        backend.set('a', {'v': 1})
+        backend.set('b', {'v': 2}, ttl_seconds=1)
+        backend.get('a')
+        backend.set('c', {'v': 3})
+        assert backend.get('b') is None
+        assert backend.get('a') == {'v': 1}
+        backend.set('d', {'v': 4}, ttl_seconds=1)
+        clock.now = 1
+        assert backend.get('d') is None
+        assert backend.get('a') == {'v': 1}
+
+    def test_shared_round_trip(self) -> None:
+        """Values are stored as JSON under the prefix."""
+        fake = FakeSharedClient()
+        backend = SharedRevisionBackend(fake, prefix='test:')
+        backend.set('a', {'v': 1}, ttl_seconds=1)
+        assert backend.get('a') == {'v': 1}
+        assert list(fake.values) == ['test:a']
+        fake.values['other'] = '{}'
+        backend.clear()
+        assert backend.get('a') is None
+        assert list(fake.values) == ['other']
+
+    def test_shared_round_trips_leave_the_event_loop(self) -> None:
+        """The blocking client is called from the thread pool."""
+        fake = RecordingClient()
+        cache = RevisionCache(SharedRevisionBackend(fake), current_ttl_seconds=1)
+        asyncio.run(cache.put_revision('a', {'v': 1}))
+        assert asyncio.run(cache.get_revision('a')) == {'v': 1}
+        asyncio.run(cache.invalidate_tasks([1, 2]))
+        assert [(method, on_loop) for method, _, on_loop in fake.calls] == [
+            ('get', False), ('delete', False),
+        ]
+
+
+class TestFills(unittest.TestCase):
+    """What the readers store."""
+
+    @staticmethod
+    def current_task(task_id: int) -> CurrentTaskContent:
+        """A current task as read from the database."""
+        now = datetime.now(timezone.utc)
+        return CurrentTaskContent(
+            identifier=uuid.uuid4(), id=task_id, revision_no=1, revision_created_at=now,
+            created_by=1, updated_by=1, created_at=now, updated_at=now,
+        )
+
+    def test_fill_after_invalidation_is_skipped(self) -> None:
+        """A reader that read before a write committed does not store the old current task."""
+        cache = RevisionCache(InMemoryRevisionBackend(max_size=10), current_ttl_seconds=10)
+        generation = cache.current_generation(1)
+        asyncio.run(cache.invalidate_tasks([1]))
+        asyncio.run(cache.put_current(self.current_task(1), generation))
+        assert asyncio.run(cache.get_current(1)) is None
+        current = self.current_task(1)
+        asyncio.run(cache.put_current(current, cache.current_generation(1)))
+        assert asyncio.run(cache.get_current(1)) == current
+
+    def test_invalidation_during_the_fill_removes_it(self) -> None:
+        """The fill is removed when a write invalidates the task while it is stored."""
+        class InvalidatedBackend(InMemoryRevisionBackend):
+            """Invalidate the task while the value is stored."""
+
+            def set(self, key: str, value: typ.Dict[str, typ.Any], ttl_seconds: float | None = None) -> None:
+                super().set(key, value, ttl_seconds)
+                cache.invalidate_tasks_sync([1])
+
+        cache = RevisionCache(InvalidatedBackend(max_size=10), current_ttl_seconds=10)
+        asyncio.run(cache.put_current(self.current_task(1), cache.current_generation(1)))
+        assert asyncio.run(cache.get_current(1)) is None
+
+    def test_revisions_expire(self) -> None:
+        """The revisions are cached for `revision_ttl_seconds`."""
+        clock = FakeClock()
+        cache = RevisionCache(
+            InMemoryRevisionBackend(max_size=10, clock=clock), current_ttl_seconds=1, revision_ttl_seconds=60,
+        )
+        asyncio.run(cache.put_revision('a', {'v': 1}))
+        clock.now = 59
+        assert asyncio.run(cache.get_revision('a')) == {'v': 1}
+        clock.now = 60
+        assert asyncio.run(cache.get_revision('a')) is None
+
+
+class TestRevisionCache(unittest.TestCase):
+    """GET detail is served from the cache and follows the writes."""
+
+    backend_factory: typ.Callable[[], typ.Any] = staticmethod(lambda: InMemoryRevisionBackend(max_size=100))
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        self.backend = revision_cache.backend
+        revision_cache.backend = self.backend_factory()
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+        revision_cache.backend = self.backend
+
+    def test_second_get_skips_the_database(self) -> None:
+        """Second GET needs no query."""
+        task_id = manual_create_task()
+        first = client.get(f"/{task_id}")
+        second = client.get(f"/{task_id}")
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.json() == second.json()
+        assert int(first.headers['X-Query-Count']) > 0
+        assert second.headers['X-Query-Count'] == '0'
+
+    def test_update_invalidates(self) -> None:
+        """GET after PUT shows the new revision."""
+        task_id = manual_create_task()
+        client.get(f"/{task_id}")
+        response = client.put(
+            '/',
+            json={'id': task_id, 'title': 'Updated title', 'status': 'completed', 'created_by': 2},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        response = client.get(f"/{task_id}")
+        assert response.json()['title'] == 'Updated title'
+        assert response.json()['status'] == 'completed'
+
+    def test_delete_and_undo_invalidate(self) -> None:
+        """GET after DELETE is not found, after undo it is back."""
+        task_id = manual_create_task()
+        before = client.get(f"/{task_id}").json()
+        assert client.delete(f"/{task_id}").status_code == status.HTTP_204_NO_CONTENT
+        assert client.get(f"/{task_id}").status_code == status.HTTP_404_NOT_FOUND
+        assert client.post(f"/undo/{task_id}").status_code == status.HTTP_200_OK
+        response = client.get(f"/{task_id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == before
+
+    def test_stale_current_task_is_not_found(self) -> None:
+        """A current task cached before another worker deleted the task is a 404, and is forgotten."""
+        task_id = manual_create_task()
+        client.get(f"/{task_id}")
+        stale = revision_cache.backend.get(f"current:{task_id}")
+        assert client.delete(f"/{task_id}").status_code == status.HTTP_204_NO_CONTENT
+        revision_cache.clear()
+        revision_cache.backend.set(f"current:{task_id}", stale)
+        response = client.get(f"/{task_id}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json() == {'detail': f"Task not found: {task_id}"}
+        assert revision_cache.backend.get(f"current:{task_id}") is None
+
+    def test_undo_update_invalidates(self) -> None:
+        """GET after undo of PUT shows the previous revision."""
+        task_id = manual_create_task()
+        before = client.get(f"/{task_id}").json()
+        client.put('/', json={'id': task_id, 'title': 'Updated title', 'created_by': 2})
+        assert client.get(f"/{task_id}").json()['title'] == 'Updated title'
+        assert client.post(f"/undo/{task_id}").status_code == status.HTTP_200_OK
+        assert client.get(f"/{task_id}").json() == before
+
+
+class TestSharedRevisionCache(TestRevisionCache):
+    """Same behaviour on the shared backend."""
+
+    backend_factory = staticmethod(lambda: SharedRevisionBackend(RecordingClient()))
+
+    def test_write_deletes_in_one_round_trip(self) -> None:
+        """The tasks a request writes are forgotten once it commits, with one delete off the event loop."""
+        task_ids = [manual_create_task() for _ in range(3)]
+        fake = revision_cache.backend.client
+        fake.calls.clear()
+        response = client.request('DELETE', '/tasks/bulk', json=task_ids)
+        assert response.status_code == status.HTTP_200_OK
+        deletes = [(names, on_loop) for method, names, on_loop in fake.calls if method == 'delete']
+        assert len(deletes) == 1
+        names, on_loop = deletes[0]
+        assert sorted(names) == sorted(
+            f"{revision_cache.backend.prefix}current:{task_id}" for task_id in task_ids
+        )
+        assert not on_loop
@@ -0,0 +1,148 @@
+"""Test the coalescing of identical concurrent reads."""
+import asyncio
+import typing as typ
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from core.common.list_cache import list_cache
+from core.common.revision_cache import revision_cache
+from core.common.single_flight import SingleFlight, single_flight
+from core.methods.crud import TaskRepository
+from core.tests.test_gadgets import (manual_create_task,
+                                     prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+from main import app
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Sharing of the result in flight."""
+
+    def setUp(self) -> None:
+        """Count the calls of the read."""
+        self.flight = SingleFlight()
+        self.calls: typ.List[str] = []
+
+    async def read(self, value: str, delay: float = 0.01) -> str:
+        """Slow read."""
+        self.calls.append(value)
+        await asyncio.sleep(delay)
+        return value
+
+    def test_identical_reads_share_one_call(self) -> None:
+        """Same key at once runs once. Another key runs on its own."""
+        async def scenario() -> typ.List[str]:
+            return await asyncio.gather(
+                *(self.flight.do('a', lambda: self.read('a')) for __ in range(5)),
+                self.flight.do('b', lambda: self.read('b')),
+            )
+
+        assert asyncio.run(scenario()) == ['a'] * 5 + ['b']
+        assert self.calls == ['a', 'b']
+        stats = self.flight.stats()
+        assert (stats.executed, stats.coalesced, stats.in_flight) == (2, 4, 0)
+
+    def test_reads_after_the_flight_run_again(self) -> None:
+        """Only reads in flight are shared."""
+        async def scenario() -> None:
+            await self.flight.do('a', lambda: self.read('a'))
+            await self.flight.do('a', lambda: self.read('a'))
+
+        asyncio.run(scenario())
+        assert self.calls == ['a', 'a']
+
+    def test_copy_for_the_followers(self) -> None:
+        """The first request gets the result, the others a copy."""
+        async def scenario() -> typ.List[str]:
+            return await asyncio.gather(*(self.flight.do('a', lambda: self.read('a'), copy=str.upper) for __ in range(3)))
+
+        assert asyncio.run(scenario()) == ['a', 'A', 'A']
+
+    def test_error_is_shared(self) -> None:
+        """Every request of the flight gets the error. The key is free again."""
+        async def failing() -> str:
+            await asyncio.sleep(0.01)
+            raise ValueError('boom')
+
+        async def scenario() -> typ.List[typ.Any]:
+            return await asyncio.gather(*(self.flight.do('a', failing) for __ in range(3)), return_exceptions=True)
+
+        assert [str(result) for result in asyncio.run(scenario())] == ['boom'] * 3
+        assert self.flight.stats().in_flight == 0
+
+    def test_cancelled_leader(self) -> None:
+        """The others read on their own when the first request is cancelled."""
+        async def scenario() -> str:
+            leader = asyncio.ensure_future(self.flight.do('a', lambda: self.read('a', delay=1)))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(self.flight.do('a', lambda: self.read('b')))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(scenario()) == 'b'
+        assert self.calls == ['a', 'b']
+
+
+class TestCoalescedEndpoints(unittest.TestCase):
+    """Concurrent identical GET on the same event loop."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def test_concurrent_list_runs_one_query(self) -> None:
+        """Identical list requests at once share the page of the first one."""
+        manual_create_task()
+        list_cache.bump()
+        original = TaskRepository.list_tasks
+        calls = []
+
+        async def slow_list_tasks(*args: typ.Any, **kwargs: typ.Any) -> typ.Any:
+            calls.append(args)
+            await asyncio.sleep(0.2)
+            return await original(*args, **kwargs)
+
+        coalesced = single_flight.stats().coalesced
+        # One portal, one event loop, for the requests of every thread.
+        with TestClient(app) as client, mock.patch.object(TaskRepository, 'list_tasks', slow_list_tasks):
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                responses = list(executor.map(lambda __: client.get('/?task_status=pending'), range(5)))
+
+        assert {response.status_code for response in responses} == {status.HTTP_200_OK}
+        assert all(response.json() == responses[0].json() for response in responses)
+        assert len(responses[0].json()['items']) == 1
+        assert len(calls) == 1
+        assert single_flight.stats().coalesced == coalesced + 4
+
+    def test_concurrent_detail_runs_one_query(self) -> None:
+        """Identical detail requests at once share the payload of the first one."""
+        task_id = manual_create_task()
+        revision_cache.clear()
+        original = TaskRepository.get_task_by_id
+        calls = []
+
+        async def slow_get_task_by_id(*args: typ.Any, **kwargs: typ.Any) -> typ.Any:
+            calls.append(args)
+            await asyncio.sleep(0.2)
+            return await original(*args, **kwargs)
+
+        with TestClient(app) as client, mock.patch.object(TaskRepository, 'get_task_by_id', slow_get_task_by_id):
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                responses = list(executor.map(lambda __: client.get(f"/{task_id}"), range(5)))
+
+        assert {response.status_code for response in responses} == {status.HTTP_200_OK}
+        assert {response.json()['id'] for response in responses} == {task_id}
+        assert len(calls) == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
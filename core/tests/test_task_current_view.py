@@ -0,0 +1,113 @@
+"""Test the read model of the current tasks follows every write."""
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app import engine
+from core.models.models import (CurrentTaskContent, TaskContent,
+                                TaskCurrentView, User)
+from core.tests.test_gadgets import (manual_create_task,
+                                     prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+from main import app
+
+client = TestClient(app)
+
+
+class TestTaskCurrentView(unittest.TestCase):
+    """Compare the read model with the join of the current tasks it replaces."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def assert_view_is_current(self) -> None:
+        """Every current task has its row, with the content of its current revision."""
+        created_user = aliased(User)
+        updated_user = aliased(User)
+        with Session(engine) as session:
+            expected = session.execute(
+                select(
+                    CurrentTaskContent.id, CurrentTaskContent.identifier, CurrentTaskContent.revision_no,
+                    TaskContent.title, TaskContent.description, TaskContent.due_date, TaskContent.status, TaskContent.created_by,
+                    CurrentTaskContent.created_by, created_user.username,
+                    CurrentTaskContent.updated_by, updated_user.username,
+                )
+                .join(TaskContent, TaskContent.identifier == CurrentTaskContent.identifier)
+                .outerjoin(created_user, created_user.id == CurrentTaskContent.created_by)
+                .outerjoin(updated_user, updated_user.id == CurrentTaskContent.updated_by)
+                .order_by(CurrentTaskContent.id)
+            ).all()
+            actual = session.execute(select(TaskCurrentView.__table__).order_by(TaskCurrentView.id)).all()
+        assert [tuple(row) for row in actual] == [tuple(row) for row in expected]
+
+    def test_single_writes(self) -> None:
+        """Create, update, delete, undo, redo and revert."""
+        task_id = manual_create_task()
+        other_id = manual_create_task(user_id=1)
+        self.assert_view_is_current()
+
+        client.put('/', json={'id': task_id, 'title': 'First', 'status': 'completed', 'created_by': 2})
+        self.assert_view_is_current()
+        with Session(engine) as session:
+            row = session.get(TaskCurrentView, task_id)
+            assert (row.title, row.updated_by_username, row.created_by_username) == ('First', 'elcolie', 'test_user')
+
+        client.post(f"/undo/{task_id}")
+        self.assert_view_is_current()
+        client.post(f"/redo/{task_id}")
+        self.assert_view_is_current()
+        first = client.get(f"/tasks/{task_id}/revisions").json()[0]
+        client.post(f"/tasks/{task_id}/revert/{first['identifier']}")
+        self.assert_view_is_current()
+
+        client.delete(f"/{other_id}")
+        self.assert_view_is_current()
+        client.post(f"/undo/{other_id}")
+        self.assert_view_is_current()
+
+    def test_bulk_writes(self) -> None:
+        """Bulk create, update, delete and undo."""
+        response = client.post('/tasks/bulk', json=[{'title': f"Task {i}", 'created_by': 1} for i in range(3)])
+        task_ids = [result['id'] for result in response.json()['results']]
+        self.assert_view_is_current()
+        client.put('/tasks/bulk', json=[{'id': task_id, 'title': 'Updated', 'created_by': 10} for task_id in task_ids[:2]])
+        self.assert_view_is_current()
+        client.request('DELETE', '/tasks/bulk', json=task_ids[1:])
+        self.assert_view_is_current()
+        client.post('/undo/bulk', json=task_ids)
+        self.assert_view_is_current()
+
+    def test_rename_user(self) -> None:
+        """The list shows the new username of the creator and of the updater."""
+        task_id = manual_create_task()
+        client.put('/', json={'id': task_id, 'title': 'First', 'created_by': 2})
+        assert client.get('/').json()['items'][0]['created_by_username'] == 'test_user'
+        with Session(engine) as session:
+            for user_id, username in ((10, 'renamed_creator'), (2, 'renamed_updater')):
+                user = session.get(User, user_id)
+                user.username = username
+                session.add(user)
+            session.commit()
+        self.assert_view_is_current()
+        task = client.get('/').json()['items'][0]
+        assert (task['created_by_username'], task['updated_by_username']) == ('renamed_creator', 'renamed_updater')
+
+    def test_detail_reads_the_view(self) -> None:
+        """The detail shows the author of the current revision like before."""
+        task_id = manual_create_task()
+        client.put('/', json={'id': task_id, 'title': 'First', 'created_by': 2})
+        assert client.get(f"/{task_id}").json()['created_by'] == 2
+        client.post(f"/undo/{task_id}")
+        assert client.get(f"/{task_id}").json()['created_by'] == 10
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 """Test UNDO mechanism."""
+import random
 import time
 import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 
 from fastapi import status
@@ -8,7 +11,8 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session
 
 from app import engine
-from core.models.models import CurrentTaskContent, StatusEnum, TaskContent
+from core.models.models import (CurrentTaskContent, StatusEnum, TaskContent,
+                                TaskCurrentView)
 from core.tests.test_gadgets import (manual_create_task,
                                      prepare_users_for_test,
                                      remove_all_tasks_and_users)
@@ -104,7 +108,7 @@ class UndoMech(unittest.TestCase):
         with Session(engine) as session:
             # Check history in database
             history = (
-                session.query(TaskContent).filter(TaskContent.id == task_id).first()
+                session.query(TaskContent).filter(TaskContent.id == task_id).order_by(TaskContent.revision_no).first()
             )
             assert history.is_deleted is False
             assert history.title == 'Test Task with created_by'
@@ -215,6 +219,19 @@ class UndoMech(unittest.TestCase):
             ]
         }
 
+    def test_undo_purged_task(self) -> None:
+        """A task with history, but neither a current row nor a deleted revision, is not found."""
+        task_id = manual_create_task()
+        with Session(engine) as session:
+            session.query(CurrentTaskContent).filter(CurrentTaskContent.id == task_id).delete()
+            session.query(TaskCurrentView).filter(TaskCurrentView.id == task_id).delete()
+            session.commit()
+        response = client.post(f"/undo/{task_id}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json() == {'detail': 'Task not found'}
+        response = client.post('/undo/bulk', json=[task_id])
+        assert response.json()['results'][0]['errors'][0]['msg'] == 'Task not found'
+
     def test_create_update_delete_undo_undo(self) -> None:
         """Expect undo mechanism to work for all actions."""
         task_id = manual_create_task()
@@ -270,5 +287,192 @@ class UndoMech(unittest.TestCase):
         assert undo_response_2.status_code == status.HTTP_200_OK
 
 
+class RedoMech(unittest.TestCase):
+    """Undo and redo move the current task along its revisions."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def update_titles(self, task_id: int, *titles: str) -> None:
+        """Make a revision per title."""
+        for title in titles:
+            response = client.put('/', json={'id': task_id, 'title': title, 'created_by': 2})
+            assert response.status_code == status.HTTP_200_OK
+
+    def title(self, task_id: int) -> str:
+        """Title of the current revision."""
+        return client.get(f"/{task_id}").json()['title']
+
+    def test_undo_then_redo(self) -> None:
+        """Undo keeps the revisions, redo walks them forward again."""
+        task_id = manual_create_task()
+        self.update_titles(task_id, 'First', 'Second')
+        client.post(f"/undo/{task_id}")
+        client.post(f"/undo/{task_id}")
+        assert self.title(task_id) == 'Test Task with created_by'
+
+        assert client.post(f"/redo/{task_id}").json() == {'message': 'Instance redone successfully!'}
+        assert self.title(task_id) == 'First'
+        assert client.post(f"/redo/{task_id}").status_code == status.HTTP_200_OK
+        assert self.title(task_id) == 'Second'
+
+        response = client.post(f"/redo/{task_id}")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {'detail': 'Nothing to redo.'}
+        with Session(engine) as session:
+            assert session.query(TaskContent).filter(TaskContent.id == task_id).count() == 3
+
+    def test_update_after_undo_discards_redo(self) -> None:
+        """An update replaces the undone revisions."""
+        task_id = manual_create_task()
+        self.update_titles(task_id, 'First', 'Second')
+        client.post(f"/undo/{task_id}")
+        client.post(f"/undo/{task_id}")
+        self.update_titles(task_id, 'Third')
+
+        assert client.post(f"/redo/{task_id}").status_code == status.HTTP_400_BAD_REQUEST
+        revisions = client.get(f"/tasks/{task_id}/revisions").json()
+        assert [(revision['revision_no'], revision['title'], revision['is_current']) for revision in revisions] == [
+            (1, 'Test Task with created_by', False),
+            (2, 'Third', True),
+        ]
+        client.post(f"/undo/{task_id}")
+        assert self.title(task_id) == 'Test Task with created_by'
+
+    def test_redo_after_undo_delete(self) -> None:
+        """Undo of a delete restores the revision the task pointed to. The redo revisions stay."""
+        task_id = manual_create_task()
+        self.update_titles(task_id, 'First')
+        client.post(f"/undo/{task_id}")
+        client.delete(f"/{task_id}")
+        assert client.post(f"/redo/{task_id}").status_code == status.HTTP_404_NOT_FOUND
+
+        client.post(f"/undo/{task_id}")
+        assert self.title(task_id) == 'Test Task with created_by'
+        client.post(f"/redo/{task_id}")
+        assert self.title(task_id) == 'First'
+
+    def test_revert(self) -> None:
+        """Revert points the task to any revision. Undo and redo move from there."""
+        task_id = manual_create_task()
+        self.update_titles(task_id, 'First', 'Second', 'Third')
+        first = client.get(f"/tasks/{task_id}/revisions").json()[1]
+
+        response = client.post(f"/tasks/{task_id}/revert/{first['identifier']}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {'message': 'Instance reverted successfully!'}
+        assert self.title(task_id) == 'First'
+        client.post(f"/redo/{task_id}")
+        assert self.title(task_id) == 'Second'
+        client.post(f"/undo/{task_id}")
+        client.post(f"/undo/{task_id}")
+        assert self.title(task_id) == 'Test Task with created_by'
+
+    def test_revision_identifiers(self) -> None:
+        """Identifiers are listed as 32 hex digits, in the order of the revisions. Revert accepts the dashes too."""
+        task_id = manual_create_task()
+        self.update_titles(task_id, 'First', 'Second')
+        identifiers = [revision['identifier'] for revision in client.get(f"/tasks/{task_id}/revisions").json()]
+        assert all(len(identifier) == 32 for identifier in identifiers)
+        # UUIDv7 sorts by the time of creation.
+        assert sorted(identifiers) == identifiers
+
+        response = client.post(f"/tasks/{task_id}/revert/{uuid.UUID(identifiers[0])}")
+        assert response.status_code == status.HTTP_200_OK
+        assert self.title(task_id) == 'Test Task with created_by'
+        response = client.post(f"/tasks/{task_id}/revert/not-a-uuid")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json() == {'detail': 'Revision not found: not-a-uuid'}
+
+    def test_revert_to_another_task_revision(self) -> None:
+        """A revision of another task is not found."""
+        task_id = manual_create_task()
+        other_id = manual_create_task()
+        other = client.get(f"/tasks/{other_id}/revisions").json()[0]
+
+        response = client.post(f"/tasks/{task_id}/revert/{other['identifier']}")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json() == {'detail': f"Revision not found: {other['identifier']}"}
+        assert self.title(task_id) == 'Test Task with created_by'
+
+
+class ConcurrentUndo(unittest.TestCase):
+    """Parallel writes to one task keep its history consistent."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def fire(self, task_id: int, calls: list) -> list:
+        """Run the calls in parallel. Return (call, status code)."""
+        def _call(call: str) -> tuple:
+            if call == 'update':
+                response = client.put('/', json={'id': task_id, 'title': f"Title {random.random()}", 'created_by': 2})
+            elif call == 'undo':
+                response = client.post(f"/undo/{task_id}")
+            else:
+                response = client.delete(f"/{task_id}")
+            return call, response.status_code
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(_call, calls))
+
+    def assert_history_is_consistent(self, task_id: int) -> list:
+        """The revisions are numbered from 1. The current task points to one, a deleted task is marked on one."""
+        with Session(engine) as session:
+            revisions = (
+                session.query(TaskContent)
+                .filter(TaskContent.id == task_id)
+                .order_by(TaskContent.revision_no)
+                .all()
+            )
+            current = session.query(CurrentTaskContent).filter(CurrentTaskContent.id == task_id).one_or_none()
+        assert [revision.revision_no for revision in revisions] == list(range(1, len(revisions) + 1))
+        deleted = [revision for revision in revisions if revision.is_deleted]
+        if current is None:
+            assert len(deleted) == 1
+        else:
+            assert not deleted
+            pointed = revisions[current.revision_no - 1]
+            assert current.identifier == pointed.identifier
+            detail = client.get(f"/{task_id}").json()
+            assert detail['title'] == pointed.title
+        return revisions
+
+    def test_concurrent_update_and_undo(self) -> None:
+        """Every undo moves the current task one revision back."""
+        task_id = manual_create_task()
+        calls = ['update'] * 30 + ['undo'] * 30
+        random.shuffle(calls)
+        outcomes = self.fire(task_id, calls)
+
+        assert {code for call, code in outcomes if call == 'update'} == {status.HTTP_200_OK}
+        assert {code for call, code in outcomes if call == 'undo'} <= {status.HTTP_200_OK, status.HTTP_400_BAD_REQUEST}
+        revisions = self.assert_history_is_consistent(task_id)
+        assert len(revisions) <= 1 + 30
+
+    def test_concurrent_delete_update_and_undo(self) -> None:
+        """Deletes in the mix. Calls fail cleanly or apply."""
+        task_id = manual_create_task()
+        calls = ['update'] * 20 + ['undo'] * 20 + ['delete'] * 10
+        random.shuffle(calls)
+        outcomes = self.fire(task_id, calls)
+
+        expected = {status.HTTP_200_OK, status.HTTP_204_NO_CONTENT, status.HTTP_400_BAD_REQUEST, status.HTTP_404_NOT_FOUND}
+        assert {code for _, code in outcomes} <= expected
+        self.assert_history_is_consistent(task_id)
+
+
 if __name__ == '__main__':
     unittest.main()
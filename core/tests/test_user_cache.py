@@ -0,0 +1,127 @@
+"""Test the in-process user cache."""
+import unittest
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import engine
+from core.common.list_cache import list_cache
+from core.common.user_cache import UserCache, user_cache
+from core.models.models import User
+from core.tests.test_gadgets import (prepare_users_for_test,
+                                     remove_all_tasks_and_users)
+from main import app
+
+client = TestClient(app)
+
+
+class FakeClock:
+    """Clock the test moves by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestUserCache(unittest.TestCase):
+    """LRU, TTL and counters of the cache."""
+
+    def setUp(self) -> None:
+        """Small cache with a fake clock."""
+        self.clock = FakeClock()
+        self.cache = UserCache(max_size=2, ttl_seconds=10, clock=self.clock)
+
+    def test_lookup_by_id_and_username(self) -> None:
+        """A cached user is found by both keys."""
+        self.cache.put(User(id=1, username='a'))
+        assert self.cache.get_by_id(1).username == 'a'
+        assert self.cache.get_by_username('a').id == 1
+        assert self.cache.get_by_id(2) is None
+        stats = self.cache.stats()
+        assert (stats.hits, stats.misses, stats.size) == (2, 1, 1)
+
+    def test_expire_after_ttl(self) -> None:
+        """An expired user is a miss and is removed."""
+        self.cache.put(User(id=1, username='a'))
+        self.clock.now = 10
+        assert self.cache.get_by_username('a') is None
+        assert self.cache.stats().size == 0
+
+    def test_evict_least_recently_used(self) -> None:
+        """The cache keeps `max_size` users."""
+        self.cache.put(User(id=1, username='a'))
+        self.cache.put(User(id=2, username='b'))
+        self.cache.get_by_id(1)
+        self.cache.put(User(id=3, username='c'))
+        assert self.cache.get_by_id(2) is None
+        assert self.cache.get_by_username('b') is None
+        assert self.cache.get_by_id(1) is not None
+        assert self.cache.get_by_id(3) is not None
+
+    def test_renamed_user(self) -> None:
+        """Putting the user again drops the old username."""
+        self.cache.put(User(id=1, username='a'))
+        self.cache.put(User(id=1, username='b'))
+        assert self.cache.get_by_username('a') is None
+        assert self.cache.get_by_username('b').id == 1
+
+
+class TestUserCacheInvalidation(unittest.TestCase):
+    """The application cache follows the users table."""
+
+    def setUp(self) -> None:
+        """Prepare the data for testing."""
+        remove_all_tasks_and_users()
+        prepare_users_for_test()
+
+    def tearDown(self):
+        """Remove all tasks and users."""
+        remove_all_tasks_and_users()
+
+    def test_second_lookup_skips_the_database(self) -> None:
+        """The filter resolves the username from the cache on the next request."""
+        url = '/?created_by_username=test_user'
+        first = client.get(url)
+        hits = user_cache.stats().hits
+        list_cache.bump()  # Not the cached page
+        second = client.get(url)
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert int(second.headers['X-Query-Count']) == int(first.headers['X-Query-Count']) - 1
+        assert user_cache.stats().hits == hits + 1
+
+    def test_create_task_uses_cached_user(self) -> None:
+        """Prefetch of `created_by` is served from the cache."""
+        client.get('/?created_by_username=test_user')
+        hits = user_cache.stats().hits
+        response = client.post('/create-task/', json={'title': 'Cached', 'created_by': 10})
+        assert response.status_code == status.HTTP_201_CREATED
+        assert user_cache.stats().hits > hits
+
+    def test_update_user_invalidates(self) -> None:
+        """Renaming a user through the ORM forgets the old username."""
+        client.get('/?created_by_username=test_user')
+        with Session(engine) as session:
+            user = session.get(User, 10)
+            user.username = 'renamed_user'
+            session.add(user)
+            session.commit()
+        response = client.get('/?created_by_username=test_user')
+        assert response.status_code == status.HTTP_406_NOT_ACCEPTABLE
+        response = client.get('/?created_by_username=renamed_user')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_remove_users_clears(self) -> None:
+        """Bulk delete of the users empties the cache."""
+        client.get('/?created_by_username=test_user')
+        assert user_cache.stats().size > 0
+        remove_all_tasks_and_users()
+        assert user_cache.stats().size == 0
+
+    def test_diagnostics(self) -> None:
+        """Counters are exposed."""
+        response = client.get('/diagnostics/user-cache')
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.json()) == {'hits', 'misses', 'size', 'max_size', 'ttl_seconds'}
@@ -3,21 +3,41 @@ import logging
 import typing as typ
 from enum import Enum
 
-from fastapi import Body, Depends, FastAPI, status
+from fastapi import (Body, Depends, FastAPI, HTTPException, Request, Response,
+                     status)
+from fastapi.responses import ORJSONResponse
 # import all you need from fastapi-pagination
-from fastapi_pagination import Page, add_pagination, paginate
+from fastapi_pagination import Page, add_pagination, resolve_params
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app import leak_detector
 from core.common.get_instance import valid_task, valid_undo_task
-from core.common.validate_input import (CheckTaskId, GenericTaskInput,
-                                        SummaryTask, TaskSuccessMessage,
+from core.common.leak_detector import ConnectionDiagnostics
+from core.common.list_cache import ListCacheStats, list_cache
+from core.common.query_counter import count_queries
+from core.common.request_session import get_session, prefetch_references
+from core.common.revision_cache import RevisionCacheStats, revision_cache
+from core.common.single_flight import SingleFlightStats, single_flight
+from core.common.update_stats import UpdateStats, update_counter
+from core.common.user_cache import UserCacheStats, user_cache
+from core.common.validate_input import (BulkResult, CheckTaskId, CursorPage,
+                                        GenericTaskInput, RevisionSummary,
+                                        SummaryTask, TaskOut,
+                                        TaskSuccessMessage,
                                         TaskValidationError, UpdateTask)
+from core.methods.bulk_method.method import (bulk_create_tasks,
+                                             bulk_delete_tasks,
+                                             bulk_undo_tasks,
+                                             bulk_update_tasks)
 from core.methods.delete_method.method import delete_task
 from core.methods.get_detail_method.method import get_task
 from core.methods.get_list_method.method import (
-    ConcreteCommonTaskQueryParams, list_tasks,
-    validate_task_common_query_param)
+    ConcreteCommonTaskQueryParams, ConcreteCursorQueryParams,
+    cached_list_response, list_tasks, list_tasks_by_cursor,
+    validate_cursor_query_param, validate_task_common_query_param)
 from core.methods.post_method.method import create_task
-from core.methods.undo_method.method import undo_task
+from core.methods.undo_method.method import (list_revisions, redo_task,
+                                             revert_task, undo_task)
 from core.methods.update_method.method import update_task
 from core.models.models import CurrentTaskContent
 
@@ -35,6 +55,7 @@ DESCRIPTION = """
 - You need to create an user before creating a task.
 - You can create, update, delete, list and undo a task.
 - You can `undo` the last `UPDATE`, `DELETE` to the task.
+- You can `redo` an undone `UPDATE`, or revert the task to any of its revisions.
 - You can filter the tasks by due_date, task_status, created_by_username, updated_by_username.
 
 """
@@ -46,7 +67,11 @@ tags_metadata = [
     {
         'name': 'undo',
         'description': 'Undo the last UPDATE, DELETE to the task',
-    }
+    },
+    {
+        'name': 'diagnostics',
+        'description': 'Debugging information of the service',
+    },
 ]
 
 app = FastAPI(
@@ -65,6 +90,7 @@ app = FastAPI(
     },
     openapi_tags=tags_metadata,
     openapi_url='/api/v1/openapi.json',
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -72,13 +98,120 @@ class Tags(Enum):
     """Enum class of tags."""
     TASKS = 'tasks'
     UNDO = 'undo'
+    DIAGNOSTICS = 'diagnostics'
+
+
+@app.middleware('http')
+async def _report_query_count(
+    request: Request,
+    call_next: typ.Callable[[Request], typ.Awaitable[Response]],
+) -> Response:
+    """Report the number of SQL statements of the request in the `X-Query-Count` header."""
+    with count_queries() as counter:
+        response = await call_next(request)
+    response.headers['X-Query-Count'] = str(counter.count)
+    response.headers['X-Connection-Count'] = str(counter.connections)
+    logger.info('%s %s ran %d queries on %d connections',
+                request.method, request.url.path, counter.count, counter.connections)
+    if leak_detector.enabled:
+        leak_detector.log_held()
+    return response
+
+
+@app.get('/diagnostics/connections',
+         summary='Connections held too long',
+         response_model=ConnectionDiagnostics, tags=[Tags.DIAGNOSTICS])
+async def _connection_diagnostics() -> typ.Any:
+    """
+    Endpoint to show the pool checkouts held longer than `DB_LEAK_THRESHOLD_MS`.
+
+    - **held**: Connections not returned yet, with the stack that checked them out.
+    - **slow**: The latest connections returned after the threshold.
+    - Not found unless `DB_LEAK_DETECTION=True`.
+      The stacks describe the code, do not expose them in production.
+    """
+    if not leak_detector.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not Found')
+    return leak_detector.diagnostics()
+
+
+@app.get('/diagnostics/user-cache',
+         summary='Hit rate of the user cache',
+         response_model=UserCacheStats, tags=[Tags.DIAGNOSTICS])
+async def _user_cache_diagnostics() -> typ.Any:
+    """
+    Endpoint to show the counters of the in-process user cache.
+
+    - **hits**, **misses**: Lookups by id or by username since the start.
+    - **size**: Users cached now, at most `USER_CACHE_SIZE`.
+    - **ttl_seconds**: `USER_CACHE_TTL_SECONDS`, how long a user is trusted.
+    """
+    return user_cache.stats()
+
+
+@app.get('/diagnostics/revision-cache',
+         summary='Hit rate of the revision cache',
+         response_model=RevisionCacheStats, tags=[Tags.DIAGNOSTICS])
+async def _revision_cache_diagnostics() -> typ.Any:
+    """
+    Endpoint to show the counters of the revision cache used by the task detail.
+
+    - **backend**: `memory`, or `shared` when `REVISION_CACHE_URL` is set.
+    - **hits**, **misses**: Lookups of revisions and of current revisions since the start.
+    """
+    return revision_cache.stats()
+
+
+@app.get('/diagnostics/list-cache',
+         summary='Hit rate of the list cache',
+         response_model=ListCacheStats, tags=[Tags.DIAGNOSTICS])
+async def _list_cache_diagnostics() -> typ.Any:
+    """
+    Endpoint to show the counters of the cache of the list pages.
+
+    - **hits**, **misses**, **hit_rate**: Lookups of pages since the start.
+    - **size**: Pages cached now, at most `LIST_CACHE_SIZE`.
+    - **generation**: Bumped by every write of tasks. Pages of an older generation are never served.
+    - **ttl_seconds**: `LIST_CACHE_TTL_SECONDS` of `page`
+      and `LIST_CACHE_CURSOR_TTL_SECONDS` of `cursor`.
+    """
+    return list_cache.stats()
+
+
+@app.get('/diagnostics/coalescing',
+         summary='Identical concurrent reads coalesced',
+         response_model=SingleFlightStats, tags=[Tags.DIAGNOSTICS])
+async def _coalescing_diagnostics() -> typ.Any:
+    """
+    Endpoint to show how many reads of the list and the detail shared the result of another one.
+
+    - **executed**: Reads which ran their queries.
+    - **coalesced**: Reads which awaited the same read in flight instead.
+    - **in_flight**: Reads running now.
+    """
+    return single_flight.stats()
+
+
+@app.get('/diagnostics/updates',
+         summary='Revisions written and skipped by updates',
+         response_model=UpdateStats, tags=[Tags.DIAGNOSTICS])
+async def _update_diagnostics() -> typ.Any:
+    """
+    Endpoint to show how many updates wrote a revision since the start.
+    An update is counted once its transaction commits.
+
+    - **written**: Updates which wrote a new revision.
+    - **skipped**: Updates with the same content as the current revision. Nothing was written.
+    """
+    return update_counter.stats()
 
 
 @app.post('/create-task/',
           summary='Create todo task',
           status_code=status.HTTP_201_CREATED,
           response_model=TaskSuccessMessage,
-          tags=[Tags.TASKS]
+          tags=[Tags.TASKS],
+          dependencies=[Depends(prefetch_references)],
           )
 async def _create_task(
     task_input: typ.Annotated[
@@ -120,7 +253,8 @@ async def _create_task(
                 }
             }
         )
-    ]
+    ],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
 ) -> typ.Any:
     """
     Endpoint to create a task.
@@ -131,32 +265,136 @@ async def _create_task(
     - **due_date**: The due date of the task in 'YYYY-MM-DD' format.
     - **created_by**: The user id who created the task.
     """
-    return create_task(task_input)
+    return await create_task(task_input, session)
+
+
+@app.post('/tasks/bulk',
+          summary='Create many todo tasks',
+          response_model=BulkResult,
+          tags=[Tags.TASKS],
+          dependencies=[Depends(prefetch_references)],
+          )
+async def _bulk_create_tasks(
+    items: typ.Annotated[
+        typ.List[typ.Any],
+        Body(
+            openapi_examples={
+                'normal': {
+                    'summary': 'Create tasks',
+                    'description': 'The second item fails, the others are created',
+                    'value': [
+                        {
+                            'title': 'Buy a pickled plum juice',
+                            'due_date': '2022-12-31',
+                            'created_by': 1,
+                        },
+                        {'title': 'Buy a plum', 'due_date': '2022-99-31', 'created_by': 1},
+                        {'title': 'Buy a pickled plum', 'status': 'in_progress', 'created_by': 2},
+                    ],
+                },
+            }
+        )
+    ],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
+    """
+    Endpoint to create many tasks in one transaction.
+
+    - Every item has the fields of the create endpoint.
+    - An item that is not valid is reported in **results** with its **errors**,
+      the others are created.
+    - **id** of the result is the id of the created task.
+    """
+    return await bulk_create_tasks(items, session)
+
+
+@app.put('/tasks/bulk',
+         summary='Update many todo tasks',
+         response_model=BulkResult,
+         tags=[Tags.TASKS],
+         dependencies=[Depends(prefetch_references)],
+         )
+async def _bulk_update_tasks(
+    items: typ.Annotated[
+        typ.List[typ.Any],
+        Body(
+            openapi_examples={
+                'normal': {
+                    'summary': 'Update tasks',
+                    'description': 'Every item is a whole update, like the update endpoint',
+                    'value': [
+                        {
+                            'id': 1,
+                            'title': 'Buy a pickled plum juice',
+                            'status': 'completed',
+                            'created_by': 1,
+                        },
+                        {'id': 2, 'title': 'Buy a plum', 'status': 'in_progress', 'created_by': 2},
+                    ],
+                },
+            }
+        )
+    ],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
+    """
+    Endpoint to update many tasks in one transaction.
+
+    - Every item has the fields of the update endpoint, a task at most once.
+    - Every task gets a new revision, undo restores the previous one.
+    - An item that is not valid or a deleted task is reported in **results** with its **errors**,
+      the others are updated.
+    """
+    return await bulk_update_tasks(items, session)
 
 
 @app.delete('/{task_id}',
             summary='Delete todo task',
             status_code=status.HTTP_204_NO_CONTENT, tags=[Tags.TASKS])
-async def _delete_task(task_id: CurrentTaskContent = Depends(valid_task)) -> None:
+async def _delete_task(
+    task_id: typ.Annotated[CurrentTaskContent, Depends(valid_task)],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> None:
     """
     Endpoint to delete a task.
 
     - **task_id**: The id of the task to delete.
     """
-    delete_task(task_id)
+    await delete_task(task_id, session)
     return
 
 
+@app.delete('/tasks/bulk',
+            summary='Delete many todo tasks',
+            response_model=BulkResult, tags=[Tags.TASKS])
+async def _bulk_delete_tasks(
+    task_ids: typ.Annotated[typ.List[int], Body(examples=[[1, 2, 3]])],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
+    """
+    Endpoint to delete many tasks in one transaction.
+
+    - Body is the list of task ids, a task at most once.
+    - A task not found or deleted already is reported in **results** with its **errors**.
+    """
+    return await bulk_delete_tasks(task_ids, session)
+
+
 @app.get('/{task_id}',
          summary='Get task detail',
-         response_model=UpdateTask, tags=[Tags.TASKS])
-async def _get_task(task_id: CurrentTaskContent = Depends(valid_task)) -> typ.Any:
+         response_model=TaskOut, tags=[Tags.TASKS])
+async def _get_task(
+    task_id: typ.Annotated[CurrentTaskContent, Depends(valid_task)],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
     """
     Endpoint to get a task detail.
 
     - **task_id**: The id of the task to get.
     """
-    return get_task(task_id)
+    # A response skips the validation against `response_model`.
+    # The payload is built from the database.
+    return ORJSONResponse(await get_task(task_id, session))
 
 
 @app.get('/',
@@ -167,6 +405,7 @@ async def _list_tasks(
         ConcreteCommonTaskQueryParams,
         Depends(validate_task_common_query_param)
     ],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
 ) -> typ.Any:
     """
     Endpoint to list all tasks.
@@ -176,26 +415,125 @@ async def _list_tasks(
     - **created_by_username**: The username of the user who created the task.
     - **updated_by_username**: The username of the user who updated the task.
     """
-    return paginate(list_tasks(commons))
+    params = resolve_params()
+    return await cached_list_response(
+        list_cache.key('page', commons.cache_key(), params.page, params.size),
+        lambda: list_tasks(commons, params, session),
+    )
+
+
+@app.get('/tasks/cursor',
+         summary='List tasks with keyset pagination',
+         response_model=CursorPage, tags=[Tags.TASKS])
+async def _list_tasks_by_cursor(
+    commons: typ.Annotated[
+        ConcreteCommonTaskQueryParams,
+        Depends(validate_task_common_query_param)
+    ],
+    cursor: typ.Annotated[
+        ConcreteCursorQueryParams,
+        Depends(validate_cursor_query_param)
+    ],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
+    """
+    Endpoint to list tasks page by page. Every page costs the same no matter how deep it is.
+
+    - **after_id**: The `next_cursor` of the previous page. Omit it to get the first page.
+    - **limit**: The page size.
+    - The filters are the same as the list endpoint.
+    """
+    return await cached_list_response(
+        list_cache.key('cursor', commons.cache_key(), cursor.after_id, cursor.limit),
+        lambda: list_tasks_by_cursor(commons, cursor, session),
+    )
+
+
+@app.post('/undo/bulk',
+          summary='Undo many tasks',
+          response_model=BulkResult, tags=[Tags.UNDO])
+async def _bulk_undo_tasks(
+    task_ids: typ.Annotated[typ.List[int], Body(examples=[[1, 2, 3]])],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
+    """
+    Endpoint to undo the last UPDATE, DELETE of many tasks in one transaction.
+
+    - Body is the list of task ids, a task at most once.
+    - A task not found, or created and never updated,
+      is reported in **results** with its **errors**.
+    """
+    return await bulk_undo_tasks(task_ids, session)
 
 
 @app.post('/undo/{task_id}',
           summary='Undo task',
           response_model=TaskSuccessMessage, tags=[Tags.UNDO])
-async def _undo_task(task_id: CheckTaskId = Depends(valid_undo_task)) -> typ.Any:
+async def _undo_task(
+    task_id: typ.Annotated[CheckTaskId, Depends(valid_undo_task)],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
     """
     description="Undo last UPDATE, DELETE to the task",
 
     - **task_id**: The id of the task to undo.
     """
-    return undo_task(task_id)
+    return await undo_task(task_id, session)
+
+
+@app.post('/redo/{task_id}',
+          summary='Redo task',
+          response_model=TaskSuccessMessage, tags=[Tags.UNDO])
+async def _redo_task(
+    task_id: typ.Annotated[CurrentTaskContent, Depends(valid_task)],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
+    """
+    Endpoint to redo the last undo of an UPDATE. An update after the undo discards it.
+
+    - **task_id**: The id of the task to redo.
+    """
+    return await redo_task(task_id, session)
+
+
+@app.get('/tasks/{task_id}/revisions',
+         summary='List task revisions',
+         response_model=typ.List[RevisionSummary], tags=[Tags.UNDO])
+async def _list_revisions(
+    task_id: typ.Annotated[CurrentTaskContent, Depends(valid_task)],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
+    """
+    Endpoint to list the revisions of a task. Undo and redo walk them by **revision_no**.
+
+    - **task_id**: The id of the task.
+    """
+    return await list_revisions(task_id, session)
+
+
+@app.post('/tasks/{task_id}/revert/{identifier}',
+          summary='Revert task to a revision',
+          response_model=TaskSuccessMessage, tags=[Tags.UNDO])
+async def _revert_task(
+    task_id: typ.Annotated[CurrentTaskContent, Depends(valid_task)],
+    identifier: str,
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
+) -> typ.Any:
+    """
+    Endpoint to point a task to any of its revisions. Undo and redo then move from there.
+
+    - **task_id**: The id of the task to revert.
+    - **identifier**: The identifier of the revision.
+    """
+    return await revert_task(task_id, identifier, session)
 
 
 @app.put('/',
          summary='Update task',
          description='Make another revision of the task',
          response_model=TaskSuccessMessage,
-         tags=[Tags.TASKS])
+         tags=[Tags.TASKS],
+         dependencies=[Depends(prefetch_references)])
 async def _update_task(
     payload: typ.Annotated[
         UpdateTask,
@@ -240,9 +578,10 @@ async def _update_task(
             }
         )
     ],
+    session: typ.Annotated[AsyncSession, Depends(get_session)],
 ) -> TaskSuccessMessage | TaskValidationError:
     """Endpoint to update a task."""
-    return update_task(payload)
+    return await update_task(payload, session)
 
 
 add_pagination(app)
@@ -0,0 +1,51 @@
+"""Add the indexes of the revision history hot paths.
+
+Revision ID: 0d826a08d003
+Revises: 7b9b5206f053
+Create Date: 2026-10-16 10:03:17.550912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d826a08d003'
+down_revision: Union[str, None] = '7b9b5206f053'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_taskcontent_id_created_at', 'taskcontent',
+            ['id', sa.text('created_at DESC')],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_taskcontent_due_date_status', 'taskcontent',
+            ['due_date', 'status'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_currenttaskcontent_id', 'currenttaskcontent',
+            ['id'], unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_user_username', 'user',
+            ['username'], unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_username', table_name='user', postgresql_concurrently=True)
+        op.drop_index('ix_currenttaskcontent_id', table_name='currenttaskcontent', postgresql_concurrently=True)
+        op.drop_index('ix_taskcontent_due_date_status', table_name='taskcontent', postgresql_concurrently=True)
+        op.drop_index('ix_taskcontent_id_created_at', table_name='taskcontent', postgresql_concurrently=True)
@@ -0,0 +1,30 @@
+"""Default the timestamps to the database now().
+
+Revision ID: 5f3c1a9e2b47
+Revises: 0d826a08d003
+Create Date: 2026-10-16 23:20:05.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3c1a9e2b47'
+down_revision: Union[str, None] = '0d826a08d003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('taskcontent', 'created_at', server_default=sa.text('now()'))
+    op.alter_column('currenttaskcontent', 'created_at', server_default=sa.text('now()'))
+    op.alter_column('currenttaskcontent', 'updated_at', server_default=sa.text('now()'))
+
+
+def downgrade() -> None:
+    op.alter_column('currenttaskcontent', 'updated_at', server_default=None)
+    op.alter_column('currenttaskcontent', 'created_at', server_default=None)
+    op.alter_column('taskcontent', 'created_at', server_default=None)
@@ -0,0 +1,30 @@
+"""Add the sequence of the task id.
+
+Revision ID: 7b9b5206f053
+Revises: 8dce0e433b92
+Create Date: 2026-10-16 09:12:41.208377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b9b5206f053'
+down_revision: Union[str, None] = '8dce0e433b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('task_id_seq')))
+    # Continue from the ids that are already handed out.
+    op.execute(
+        "SELECT setval('task_id_seq', COALESCE((SELECT MAX(id) FROM taskcontent), 0) + 1, false)"
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('task_id_seq')))
@@ -0,0 +1,77 @@
+"""Number the revisions of every task and point the current task to one.
+
+Revision ID: a41e7c2d9f10
+Revises: 5f3c1a9e2b47
+Create Date: 2026-10-16 23:58:40.402615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41e7c2d9f10'
+down_revision: Union[str, None] = '5f3c1a9e2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('taskcontent', sa.Column('revision_no', sa.Integer(), nullable=True))
+    op.add_column('currenttaskcontent', sa.Column('revision_no', sa.Integer(), nullable=True))
+    # Undo deleted the newer revisions so far. The history is the order of creation.
+    op.execute(
+        """
+        UPDATE taskcontent SET revision_no = numbered.revision_no
+        FROM (
+            SELECT identifier, row_number() OVER (PARTITION BY id ORDER BY created_at, identifier) AS revision_no
+            FROM taskcontent
+        ) AS numbered
+        WHERE taskcontent.identifier = numbered.identifier
+        """
+    )
+    op.execute(
+        """
+        UPDATE currenttaskcontent SET revision_no = taskcontent.revision_no
+        FROM taskcontent
+        WHERE currenttaskcontent.identifier = taskcontent.identifier
+        """
+    )
+    op.alter_column('taskcontent', 'revision_no', nullable=False)
+    op.alter_column('currenttaskcontent', 'revision_no', nullable=False)
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_taskcontent_id_revision_no', 'taskcontent',
+            ['id', 'revision_no'], unique=True,
+            postgresql_concurrently=True,
+        )
+        # Checked at commit. An update replaces the redo revisions and inserts the next one in one statement.
+        op.execute(
+            'ALTER TABLE taskcontent ADD CONSTRAINT uq_taskcontent_id_revision_no '
+            'UNIQUE USING INDEX uq_taskcontent_id_revision_no DEFERRABLE INITIALLY DEFERRED'
+        )
+        # The revision number replaces the latest revision by created_at.
+        op.drop_index('ix_taskcontent_id_created_at', table_name='taskcontent', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_taskcontent_id_created_at', 'taskcontent',
+            ['id', sa.text('created_at DESC')],
+            postgresql_concurrently=True,
+        )
+    op.drop_constraint('uq_taskcontent_id_revision_no', 'taskcontent', type_='unique')
+    # Undo kept the newer revisions as redo. Without the numbers they would look like the latest ones.
+    op.execute(
+        """
+        DELETE FROM taskcontent USING currenttaskcontent
+        WHERE taskcontent.id = currenttaskcontent.id AND taskcontent.revision_no > currenttaskcontent.revision_no
+        """
+    )
+    op.drop_column('currenttaskcontent', 'revision_no')
+    op.drop_column('taskcontent', 'revision_no')
@@ -0,0 +1,117 @@
+"""Store the revision identifiers as native UUIDs.
+
+Online. A new column is filled by a trigger and by a batched backfill, each batch
+commits. The unique indexes are built concurrently. Only the swap of the columns at
+the end locks the tables, for a moment. The archive is converted in place, it is
+read by nobody. Run it again when it fails before the swap, it resumes.
+
+Revision ID: b8e4f0a2c6d9
+Revises: f1b6c3d8e2a4
+Create Date: 2026-10-17 03:12:48.907215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f0a2c6d9'
+down_revision: Union[str, None] = 'f1b6c3d8e2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+TABLES = ('taskcontent', 'currenttaskcontent')
+
+
+def partitions(connection: sa.Connection) -> list:
+    return list(connection.execute(
+        sa.text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'taskcontent'::regclass")
+    ).scalars())
+
+
+def backfill(connection: sa.Connection, table: str) -> None:
+    """Convert the rows written before the trigger, one committed batch at a time."""
+    last_identifier = ''
+    while True:
+        last = connection.execute(
+            sa.text(
+                f"""
+                WITH batch AS (
+                    UPDATE {table} SET identifier_uuid = identifier::uuid
+                    WHERE identifier IN (
+                        SELECT identifier FROM {table} WHERE identifier > :last ORDER BY identifier LIMIT :limit
+                    )
+                    RETURNING identifier
+                )
+                SELECT max(identifier) FROM batch
+                """
+            ),
+            {'last': last_identifier, 'limit': BATCH_SIZE},
+        ).scalar()
+        if last is None:
+            break
+        last_identifier = last
+
+
+def upgrade() -> None:
+    # The uuid input accepts the 32 hex digits of uuid4().hex.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION copy_identifier_uuid() RETURNS trigger AS $$
+        BEGIN
+            NEW.identifier_uuid := NEW.identifier::uuid;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TABLES:
+        op.add_column(table, sa.Column('identifier_uuid', sa.Uuid(), nullable=True), if_not_exists=True)
+        op.execute(
+            f"CREATE OR REPLACE TRIGGER {table}_copy_identifier_uuid BEFORE INSERT OR UPDATE OF identifier ON {table} "
+            'FOR EACH ROW EXECUTE FUNCTION copy_identifier_uuid()'
+        )
+
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            backfill(connection, table)
+            # Validated without blocking the writes. SET NOT NULL trusts it instead of scanning the table.
+            op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_identifier_uuid_not_null")
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_identifier_uuid_not_null CHECK (identifier_uuid IS NOT NULL) NOT VALID")
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_identifier_uuid_not_null")
+        # CONCURRENTLY is refused on a partitioned table. The index of every partition is built instead.
+        for partition in partitions(connection):
+            op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {partition}_uuid_pkey ON {partition} (identifier_uuid, created_at)")
+        op.execute('CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS currenttaskcontent_uuid_pkey ON currenttaskcontent (identifier_uuid)')
+        op.execute('CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS currenttaskcontent_uuid_id_key ON currenttaskcontent (identifier_uuid, id)')
+
+    # The swap.
+    op.execute('LOCK TABLE taskcontent, currenttaskcontent IN ACCESS EXCLUSIVE MODE')
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER {table}_copy_identifier_uuid ON {table}")
+        # Drops the primary key and the unique constraint on it too.
+        op.drop_column(table, 'identifier')
+        op.alter_column(table, 'identifier_uuid', new_column_name='identifier', nullable=False)
+        op.drop_constraint(f"{table}_identifier_uuid_not_null", table, type_='check')
+    op.execute('DROP FUNCTION copy_identifier_uuid()')
+    op.execute('ALTER TABLE currenttaskcontent ADD CONSTRAINT currenttaskcontent_pkey PRIMARY KEY USING INDEX currenttaskcontent_uuid_pkey')
+    op.execute(
+        'ALTER TABLE currenttaskcontent ADD CONSTRAINT currenttaskcontent_identifier_id_key '
+        'UNIQUE USING INDEX currenttaskcontent_uuid_id_key'
+    )
+    # The primary key of the partitioned table attaches the primary key of every partition.
+    for partition in partitions(connection):
+        op.execute(f"ALTER TABLE {partition} ADD CONSTRAINT {partition}_pkey PRIMARY KEY USING INDEX {partition}_uuid_pkey")
+    op.create_primary_key('taskcontent_pkey', 'taskcontent', ['identifier', 'created_at'])
+
+    op.execute('ALTER TABLE taskcontentarchive ALTER COLUMN identifier TYPE uuid USING identifier::uuid')
+
+
+def downgrade() -> None:
+    # Back to the 32 hex digits. It rewrites the tables under a lock.
+    for table in (*TABLES, 'taskcontentarchive'):
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN identifier TYPE varchar USING replace(identifier::text, '-', '')")
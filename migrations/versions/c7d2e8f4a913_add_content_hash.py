@@ -0,0 +1,67 @@
+"""Store the digest of the content of every revision.
+
+Revision ID: c7d2e8f4a913
+Revises: a41e7c2d9f10
+Create Date: 2026-10-17 00:41:12.530917
+
+"""
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e8f4a913'
+down_revision: Union[str, None] = 'a41e7c2d9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+taskcontent = sa.table(
+    'taskcontent',
+    sa.column('identifier', sa.String),
+    sa.column('title', sa.String),
+    sa.column('description', sa.String),
+    sa.column('due_date', sa.Date),
+    sa.column('status', sa.String),
+    sa.column('created_by', sa.Integer),
+    sa.column('content_hash', sa.String),
+)
+
+
+def content_hash(row: sa.Row) -> str:
+    """Same digest as `core.models.models.content_hash`. The status is stored by its name."""
+    content = [row.title, row.description, row.due_date.isoformat() if row.due_date else None, row.status, row.created_by]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('taskcontent', sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    connection = op.get_bind()
+    last_identifier = ''
+    while True:
+        rows = connection.execute(
+            sa.select(taskcontent)
+            .where(taskcontent.c.identifier > last_identifier)
+            .order_by(taskcontent.c.identifier)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            taskcontent.update()
+            .where(taskcontent.c.identifier == sa.bindparam('_identifier'))
+            .values(content_hash=sa.bindparam('_content_hash')),
+            [{'_identifier': row.identifier, '_content_hash': content_hash(row)} for row in rows],
+        )
+        last_identifier = rows[-1].identifier
+    op.alter_column('taskcontent', 'content_hash', nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column('taskcontent', 'content_hash')
@@ -0,0 +1,63 @@
+"""Add the read model of the current tasks.
+
+The rows are copied from the current tasks in the transaction of the migration. The writes
+of the release before it do not maintain the read model, deploy them together.
+
+Revision ID: d2f7a4c9e1b3
+Revises: b8e4f0a2c6d9
+Create Date: 2026-10-17 04:26:03.551870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7a4c9e1b3'
+down_revision: Union[str, None] = 'b8e4f0a2c6d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_current_view',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('identifier', sa.Uuid(), nullable=False),
+        sa.Column('revision_no', sa.Integer(), nullable=False),
+        sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('due_date', sa.Date(), nullable=True),
+        sa.Column('status', postgresql.ENUM(name='statusenum', create_type=False), nullable=False),
+        sa.Column('revision_created_by', sa.Integer(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_by_username', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('updated_by', sa.Integer(), nullable=True),
+        sa.Column('updated_by_username', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_task_current_view_due_date_status', 'task_current_view', ['due_date', 'status'])
+    op.create_index('ix_task_current_view_created_by', 'task_current_view', ['created_by'])
+    op.create_index('ix_task_current_view_updated_by', 'task_current_view', ['updated_by'])
+    op.execute(
+        """
+        INSERT INTO task_current_view
+        SELECT currenttaskcontent.id, currenttaskcontent.identifier, currenttaskcontent.revision_no,
+               taskcontent.title, taskcontent.description, taskcontent.due_date, taskcontent.status, taskcontent.created_by,
+               currenttaskcontent.created_by, created_user.username,
+               currenttaskcontent.updated_by, updated_user.username
+        FROM currenttaskcontent
+        JOIN taskcontent ON taskcontent.identifier = currenttaskcontent.identifier
+            AND taskcontent.created_at = currenttaskcontent.revision_created_at
+        LEFT JOIN "user" AS created_user ON created_user.id = currenttaskcontent.created_by
+        LEFT JOIN "user" AS updated_user ON updated_user.id = currenttaskcontent.updated_by
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('task_current_view')
@@ -0,0 +1,44 @@
+"""Archive table for the revisions moved out by the retention policy.
+
+Revision ID: e3a9b1c5d7f2
+Revises: c7d2e8f4a913
+Create Date: 2026-10-17 01:20:44.718203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9b1c5d7f2'
+down_revision: Union[str, None] = 'c7d2e8f4a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('taskcontentarchive',
+    sa.Column('identifier', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('due_date', sa.Date(), nullable=True),
+    sa.Column('status', postgresql.ENUM(name='statusenum', create_type=False), nullable=False),
+    sa.Column('revision_no', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('identifier')
+    )
+    op.create_index('ix_taskcontentarchive_id_revision_no', 'taskcontentarchive', ['id', 'revision_no'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_taskcontentarchive_id_revision_no', table_name='taskcontentarchive')
+    op.drop_table('taskcontentarchive')
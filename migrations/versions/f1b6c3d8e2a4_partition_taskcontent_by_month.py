@@ -0,0 +1,95 @@
+"""Partition taskcontent by the month of created_at.
+
+The rows are copied to the partitioned table in the transaction of the migration.
+The table is locked meanwhile, run it in a maintenance window.
+
+Revision ID: f1b6c3d8e2a4
+Revises: e3a9b1c5d7f2
+Create Date: 2026-10-17 02:05:31.264810
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b6c3d8e2a4'
+down_revision: Union[str, None] = 'e3a9b1c5d7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created ahead of the current month. `python -m core.jobs.partitions` keeps creating them.
+MONTHS_AHEAD = 3
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def create_partition(table: str, month: date) -> None:
+    """Same partition as `core.jobs.partitions.create_partition_statement`."""
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS {table}_p{month:%Y_%m} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    )
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    op.execute(
+        'CREATE TABLE taskcontent_partitioned (LIKE taskcontent INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (created_at)'
+    )
+    first, today = connection.execute(sa.text('SELECT min(created_at)::date, current_date FROM taskcontent')).one()
+    month = (first or today).replace(day=1)
+    last = today.replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last = next_month(last)
+    while month <= last:
+        create_partition('taskcontent_partitioned', month)
+        month = next_month(month)
+    # Rows out of every range. Move them out before creating their month.
+    op.execute('CREATE TABLE taskcontent_default PARTITION OF taskcontent_partitioned DEFAULT')
+    op.execute('INSERT INTO taskcontent_partitioned SELECT * FROM taskcontent')
+
+    op.execute('DROP TABLE taskcontent')
+    op.execute('ALTER TABLE taskcontent_partitioned RENAME TO taskcontent')
+    for partition in connection.execute(
+        sa.text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'taskcontent'::regclass")
+    ).scalars():
+        if partition.startswith('taskcontent_partitioned_'):
+            op.execute(f"ALTER TABLE {partition} RENAME TO {partition.replace('taskcontent_partitioned_', 'taskcontent_')}")
+    op.create_primary_key('taskcontent_pkey', 'taskcontent', ['identifier', 'created_at'])
+    op.create_foreign_key('taskcontent_created_by_fkey', 'taskcontent', 'user', ['created_by'], ['id'])
+    # An index per partition.
+    op.create_index('ix_taskcontent_id_revision_no', 'taskcontent', ['id', 'revision_no'])
+    op.create_index('ix_taskcontent_due_date_status', 'taskcontent', ['due_date', 'status'])
+
+    # The current task finds the partition of its revision.
+    op.add_column('currenttaskcontent', sa.Column('revision_created_at', sa.DateTime(), nullable=True))
+    op.execute(
+        """
+        UPDATE currenttaskcontent SET revision_created_at = taskcontent.created_at
+        FROM taskcontent
+        WHERE currenttaskcontent.identifier = taskcontent.identifier
+        """
+    )
+    op.alter_column('currenttaskcontent', 'revision_created_at', nullable=False, server_default=sa.text('now()'))
+
+
+def downgrade() -> None:
+    op.drop_column('currenttaskcontent', 'revision_created_at')
+    op.execute('CREATE TABLE taskcontent_unpartitioned (LIKE taskcontent INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO taskcontent_unpartitioned SELECT * FROM taskcontent')
+    op.execute('DROP TABLE taskcontent')
+    op.execute('ALTER TABLE taskcontent_unpartitioned RENAME TO taskcontent')
+    op.create_primary_key('taskcontent_pkey', 'taskcontent', ['identifier'])
+    op.create_foreign_key('taskcontent_created_by_fkey', 'taskcontent', 'user', ['created_by'], ['id'])
+    op.execute(
+        'ALTER TABLE taskcontent ADD CONSTRAINT uq_taskcontent_id_revision_no '
+        'UNIQUE (id, revision_no) DEFERRABLE INITIALLY DEFERRED'
+    )
+    op.create_index('ix_taskcontent_due_date_status', 'taskcontent', ['due_date', 'status'])